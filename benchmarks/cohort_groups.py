@@ -0,0 +1,80 @@
+"""
+Time `conduct_matching` with and without `cohort_workers`, on a synthetic intake from `benchmarks.intake` in which
+each role is suitable for one cohort only, so that every cohort is a group of its own. Run with
+
+    python -m benchmarks.cohort_groups --candidates 2000 --workers 1,4
+"""
+from __future__ import annotations
+
+import contextlib
+import csv
+import io
+import tempfile
+import time
+
+import click
+
+from benchmarks.intake import generate_intake
+from fast_stream_22.matching.match import conduct_matching
+from fast_stream_22.matching.solvers import SOLVERS, get_solver
+
+
+def split_cohorts(role_file: str) -> None:
+    """
+    Make each role suitable for the first of its cohorts only
+    """
+    with open(role_file, newline="") as file:
+        rows = list(csv.DictReader(file))
+    for row in rows:
+        row["suitable_for_year_group"] = row["suitable_for_year_group"].split(",")[0]
+    with open(role_file, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@click.command
+@click.option("--candidates", default=1_000, type=click.IntRange(min=1))
+@click.option("--solvers", default="jv,sparse", help="Comma-separated solver names")
+@click.option("--workers", default="1,4", help="Comma-separated numbers of threads")
+@click.option("--iterations", default=2, type=click.IntRange(min=1))
+@click.option("--repeats", default=3, type=click.IntRange(min=1))
+@click.option("--seed", default=0, type=int)
+def main(
+    candidates: int,
+    solvers: str,
+    workers: str,
+    iterations: int,
+    repeats: int,
+    seed: int,
+):
+    click.echo("solver,releases_gil,cohort_workers,seconds")
+    with tempfile.TemporaryDirectory() as directory:
+        bids, roles, candidate_file = generate_intake(directory, candidates, seed=seed)
+        split_cohorts(roles)
+        for name in solvers.split(","):
+            if name not in SOLVERS:
+                raise click.BadParameter(f"Unknown solver {name}")
+            for threads in [None, *map(int, workers.split(","))]:
+                runs = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        conduct_matching(
+                            bids,
+                            roles,
+                            candidate_file,
+                            True,
+                            None,
+                            iterations,
+                            name,
+                            seed=seed,
+                            cohort_workers=threads,
+                        )
+                    runs.append(time.perf_counter() - start)
+                releases_gil = get_solver(name).releases_gil
+                click.echo(f"{name},{releases_gil},{threads or ''},{min(runs):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Generate a synthetic intake: a `candidates.csv`, `roles.csv` and `bids.csv` in the base or generalist schema, at any
+scale. Run with
+
+    python -m benchmarks.intake --candidates 2000 --schema generalist --output ./intake
+"""
+from __future__ import annotations
+
+import csv
+import math
+import os
+import random
+from typing import Optional
+
+import click
+
+from fast_stream_22.specialism.generalist import GeneralistCandidate, GeneralistRole
+from fast_stream_22.specialism.models import Candidate, Role
+
+SCHEMAS = {None: (Candidate, Role), "generalist": (GeneralistCandidate, GeneralistRole)}
+
+departments = ["DWP", "HO", "MOJ", "MOD", "HMRC", "CO", "BEIS", "DFE", "DHSC"]
+locations = ["London", "Leeds", "Manchester", "Bristol", "Glasgow", "Cardiff"]
+skills = ["Operations", "Finance", "Policy", "Digital"]
+anchors = ["Policy", "Delivery", "Corporate"]
+patterns = ["Office", "Hybrid", "Remote"]
+adjustments = ["", "Step free", "Screen reader"]
+preferences = ["Anchor", "Location", "Department", "Skill", ""]
+
+
+def cohorts_for(schema: Optional[str]) -> list[str]:
+    """
+    :return: the year groups candidates in this schema can be in
+    """
+    return ["1", "2", "3", "6m"] if schema == "generalist" else ["1", "2", "3"]
+
+
+def chance(rng: random.Random, probability: float) -> str:
+    """
+    :return: "true" with the given probability, otherwise "false"
+    """
+    return str(rng.random() < probability).lower()
+
+
+def candidate_row(
+    i: int,
+    rng: random.Random,
+    schema: Optional[str] = None,
+    disqualification_rate: float = 0.0,
+) -> dict[str, str]:
+    """
+    :param i: the candidate's number, from which their uid is made
+    :param rng: the random number generator to draw the candidate's answers from
+    :param schema: None for the base schema, or "generalist"
+    :param disqualification_rate: the share of pairings the intake should rule out by passport. See `generate_intake`
+    :return: one row of a candidates CSV
+    """
+    year = rng.choice(cohorts_for(schema))
+    prior = rng.sample(departments, k=0 if year == "6m" else int(year) - 1)
+    row = {
+        "uuid": f"C-{i}",
+        "clearance_held": rng.choice(["SC", "DV"]),
+        "year_group": year,
+        "prior_departments": ",".join(prior),
+        "first_location_preference": rng.choice(locations),
+        "second_location_preference": rng.choice(locations),
+        "can_relocate": chance(rng, 0.7),
+        "wants_line_management": chance(rng, 0.8),
+        "wants_private_office": chance(rng, 0.8),
+        "no_defence": "false",
+        "no_immigration": "false",
+        "preferred_office_attendance": "",
+        "primary_skills_seeking": rng.choice(skills),
+        "secondary_skills_seeking": rng.choice(skills),
+        "british_national": "British National",
+        "has_passport": chance(rng, 1 - math.sqrt(disqualification_rate)),
+        "last_role_main_skill": rng.choice(skills),
+        "last_role_secondary_skill": rng.choice(skills),
+    }
+    if schema == "generalist":
+        row.update(
+            {
+                "prior_departments": " ".join(prior),
+                "preferred_office_attendance": rng.choice(patterns),
+                "accessibility": rng.choice(adjustments),
+                "primary_anchor_seeking": rng.choice(anchors),
+                "secondary_anchor_seeking": rng.choice(anchors),
+                **{f"dept_pref_{n}": rng.choice(departments) for n in range(1, 6)},
+                "travel_requirements": rng.choice(
+                    [
+                        "I can travel nationally",
+                        "I can travel locally, within the same region",
+                    ]
+                ),
+                "match_pref_1": rng.choice(preferences),
+                "match_pref_2": rng.choice(preferences),
+            }
+        )
+    return row
+
+
+def role_row(
+    i: int,
+    rng: random.Random,
+    schema: Optional[str] = None,
+    disqualification_rate: float = 0.0,
+) -> dict[str, str]:
+    """
+    :param i: the role's number, from which its uid is made
+    :param rng: the random number generator to draw the role's details from
+    :param schema: None for the base schema, or "generalist"
+    :param disqualification_rate: the share of pairings the intake should rule out by passport. See `generate_intake`
+    :return: one row of a roles CSV
+    """
+    cohorts = cohorts_for(schema)
+    row = {
+        "uuid": f"R-{i}",
+        "clearance_required": "SC",
+        "nationality_requirement": "British National",
+        "passport_requirement": chance(rng, math.sqrt(disqualification_rate)),
+        "location": ",".join(rng.sample(locations, k=rng.randint(1, 3))),
+        "department": rng.choice(departments),
+        "priority_role": rng.choice(["High", "Medium", "Low"]),
+        "suitable_for_year_group": ",".join(
+            rng.sample(cohorts, k=rng.randint(1, len(cohorts)))
+        ),
+        "private_office_role": chance(rng, 0.15),
+        "line_management_role": chance(rng, 0.25),
+        "office_arrangement": "",
+        "defence_role": "false",
+        "travel_requirements": "None",
+        "immigration_role": "false",
+        "skill_focus": rng.choice(skills),
+        "secondary_focus": rng.choice(skills),
+    }
+    if schema == "generalist":
+        row.update(
+            {
+                "office_arrangement": ",".join(
+                    rng.sample(patterns, k=rng.randint(1, 3))
+                ),
+                "accessibility": ",".join(rng.sample(adjustments, k=rng.randint(1, 3))),
+                "travel_requirements": rng.choice(["Within Region", "None"]),
+                "anchor": rng.choice(anchors),
+            }
+        )
+    return row
+
+
+def make_candidate(
+    i: int, rng: random.Random, schema: Optional[str] = None
+) -> Candidate:
+    """
+    :return: a candidate built from `candidate_row`
+    """
+    return SCHEMAS[schema][0](**candidate_row(i, rng, schema))
+
+
+def make_role(i: int, rng: random.Random, schema: Optional[str] = None) -> Role:
+    """
+    :return: a role built from `role_row`
+    """
+    return SCHEMAS[schema][1](**role_row(i, rng, schema))
+
+
+def bid_rows(
+    candidates: list[dict[str, str]], schema: Optional[str], oversubscription: float
+) -> list[dict[str, str]]:
+    """
+    Share each cohort's candidates out evenly between the departments, rounding up and then asking for
+    `oversubscription` times as many again, as departments do
+
+    :return: the rows of a bids CSV
+    """
+    cohorts = cohorts_for(schema)
+    sizes = {
+        cohort: sum(row["year_group"] == cohort for row in candidates)
+        for cohort in cohorts
+    }
+    return [
+        {
+            "dept": department,
+            **{
+                cohort: str(
+                    math.ceil(sizes[cohort] / len(departments) * oversubscription)
+                )
+                for cohort in cohorts
+            },
+        }
+        for department in departments
+    ]
+
+
+def write_csv(path: str, rows: list[dict[str, str]]) -> None:
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, rows[0].keys())
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def generate_intake(
+    directory: str,
+    candidates: int,
+    schema: Optional[str] = None,
+    disqualification_rate: float = 0.1,
+    roles_per_candidate: float = 1.5,
+    oversubscription: float = 1.1,
+    seed: int = 0,
+) -> tuple[str, str, str]:
+    """
+    Write a synthetic intake to `directory`. Each role requires a passport, and each candidate lacks one, with a
+    probability of the square root of `disqualification_rate`, so about that share of pairings is ruled out by the
+    passport check alone. The other checks rule out more; `benchmarks.pipeline` reports the share that's allowed.
+
+    :param directory: where to write the CSVs. It is created if need be
+    :param candidates: the number of candidates
+    :param schema: None for the base schema, or "generalist"
+    :param disqualification_rate: the share of pairings to rule out by passport, between 0 and 1
+    :param roles_per_candidate: the number of roles offered for each candidate
+    :param oversubscription: how many more candidates the departments bid for than there are
+    :param seed: the seed for the random number generator, so that the same arguments give the same intake
+    :return: a tuple of the paths to the bids, roles and candidates files, in the order `conduct_matching` takes them
+    """
+    if not 0 <= disqualification_rate <= 1:
+        raise ValueError("The disqualification rate must be between 0 and 1")
+    rng = random.Random(seed)
+    candidate_rows = [
+        candidate_row(i, rng, schema, disqualification_rate) for i in range(candidates)
+    ]
+    role_rows = [
+        role_row(i, rng, schema, disqualification_rate)
+        for i in range(math.ceil(candidates * roles_per_candidate))
+    ]
+    os.makedirs(directory, exist_ok=True)
+    paths = tuple(
+        os.path.join(directory, f"{name}.csv")
+        for name in ("bids", "roles", "candidates")
+    )
+    for path, rows in zip(
+        paths,
+        (bid_rows(candidate_rows, schema, oversubscription), role_rows, candidate_rows),
+    ):
+        write_csv(path, rows)
+    return paths  # type: ignore
+
+
+@click.command
+@click.option("--output", default="./intake", type=str)
+@click.option("--candidates", default=1_000, type=click.IntRange(min=1))
+@click.option("--schema", default=None, type=click.Choice(["generalist"]))
+@click.option("--disqualification-rate", default=0.1, type=click.FloatRange(0, 1))
+@click.option("--roles-per-candidate", default=1.5, type=click.FloatRange(min=0))
+@click.option("--seed", default=0, type=int)
+def main(
+    output: str,
+    candidates: int,
+    schema: Optional[str],
+    disqualification_rate: float,
+    roles_per_candidate: float,
+    seed: int,
+):
+    for path in generate_intake(
+        output,
+        candidates,
+        schema,
+        disqualification_rate,
+        roles_per_candidate,
+        seed=seed,
+    ):
+        click.echo(path)
+
+
+if __name__ == "__main__":
+    main()
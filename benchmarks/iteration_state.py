@@ -0,0 +1,55 @@
+"""
+Compare resetting an iteration by deep-copying the candidates, roles and bids with resetting an `IterationState`.
+Run with
+
+    python -m benchmarks.iteration_state --candidates 10000
+"""
+import random
+import time
+import tracemalloc
+from copy import deepcopy
+from typing import Callable
+
+import click
+
+from benchmarks.intake import departments, make_candidate, make_role
+from fast_stream_22.matching.match import Bid, IterationState
+from fast_stream_22.specialism.models import Cohort
+
+
+def measure(reset: Callable[[], object], repeats: int) -> tuple[float, int]:
+    """
+    :return: the mean time per reset in seconds, and the peak memory allocated by one reset in bytes
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        reset()
+    elapsed = (time.perf_counter() - start) / repeats
+    tracemalloc.start()
+    reset()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+@click.command
+@click.option("--candidates", default=10_000, type=int)
+@click.option("--repeats", default=5, type=int)
+def main(candidates: int, repeats: int):
+    rng = random.Random(0)
+    all_candidates = [make_candidate(i, rng) for i in range(candidates)]
+    all_roles = [make_role(i, rng) for i in range(int(candidates * 1.5))]
+    bids = [Bid(cohort, dept, 10) for cohort in Cohort for dept in departments]
+    state = IterationState.empty(len(all_candidates), len(all_roles), len(bids))
+
+    def deep_copy():
+        return deepcopy(all_candidates), deepcopy(all_roles), deepcopy(bids)
+
+    click.echo("method,seconds_per_iteration,peak_bytes")
+    for name, reset in (("deepcopy", deep_copy), ("IterationState", state.reset)):
+        elapsed, peak = measure(reset, repeats)
+        click.echo(f"{name},{elapsed:.6f},{peak}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Time each stage of the matching pipeline on a synthetic intake from `benchmarks.intake`, and compare two runs. Run
+with
+
+    python -m benchmarks.pipeline run --candidates 2000 --json before.json
+    python -m benchmarks.pipeline run --candidates 2000 --json after.json
+    python -m benchmarks.pipeline compare before.json after.json --threshold 0.1
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import click
+import numpy as np
+
+from benchmarks.intake import generate_intake
+from fast_stream_22.matching.match import Matching, conduct_matching, pair_type_for
+from fast_stream_22.matching.read_in import input_cache, read_candidates, read_roles
+from fast_stream_22.matching.solvers import SOLVERS, get_solver
+
+STAGES = ["read", "score", "reject_impossible_roles", "match", "conduct_matching"]
+
+
+def measure(run: Callable[[], object], repeats: int) -> dict[str, object]:
+    """
+    :return: the seconds each of `repeats` calls took, with their fastest and median
+    """
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - start)
+    return {"best": min(runs), "median": statistics.median(runs), "runs": runs}
+
+
+def time_stages(
+    bids: str,
+    roles: str,
+    candidates: str,
+    schema: Optional[str],
+    solver: str,
+    iterations: int,
+    repeats: int,
+    seed: int,
+) -> tuple[dict[str, dict[str, object]], dict[str, object]]:
+    """
+    Time reading the intake, scoring, rejecting impossible roles and solving the largest cohort's grid, and then a
+    whole run of `conduct_matching`. The cohort's grid holds the cohort's candidates and every role suitable for them.
+    A high disqualification rate can leave iterations unsolvable, which are quicker, so the number solved is noted
+
+    :return: a tuple of the timings of each stage, and facts about the intake
+    """
+    timings = {}
+
+    def read():
+        input_cache.clear()
+        return read_candidates(candidates, schema), read_roles(roles, schema)
+
+    timings["read"] = measure(read, repeats)
+    all_candidates, all_roles = read()
+    cohort = statistics.mode(candidate.year_group for candidate in all_candidates)
+    cohort_candidates = [c for c in all_candidates if c.year_group == cohort]
+    cohort_roles = [r for r in all_roles if cohort in r.suitable_year_groups]
+    pair_type = pair_type_for(schema)
+
+    def score():
+        return Matching(
+            list(cohort_candidates),
+            list(cohort_roles),
+            pair_type,
+            solver=get_solver(solver),
+            rng=seed,
+        )
+
+    timings["score"] = measure(score, repeats)
+    matching = score()
+    timings["reject_impossible_roles"] = measure(
+        matching.reject_impossible_roles, repeats
+    )
+
+    def match():
+        matching.duals = None
+        return matching.match()
+
+    timings["match"] = measure(match, repeats)
+    outcomes = {}
+
+    def run_all():
+        outcomes.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            outcomes.update(
+                conduct_matching(
+                    bids, roles, candidates, True, schema, iterations, solver, seed=seed
+                )
+            )
+
+    timings["conduct_matching"] = measure(run_all, repeats)
+    intake = {
+        "candidates": len(all_candidates),
+        "roles": len(all_roles),
+        "grid": [len(cohort_candidates), len(cohort_roles)],
+        "allowed_share": matching.edges.nnz
+        / max(len(cohort_candidates) * len(cohort_roles), 1),
+        "iterations_solved": len(outcomes),
+    }
+    return timings, intake
+
+
+def find_regressions(
+    old: dict, new: dict, threshold: float
+) -> list[tuple[str, float, float, bool]]:
+    """
+    :param old: the results of the earlier run
+    :param new: the results of the later run
+    :param threshold: how much slower a stage's fastest time may be, as a share of the earlier time, before it
+    counts as a regression
+    :return: for each stage in both runs, its name, earlier and later fastest times, and whether it regressed
+    """
+    return [
+        (
+            stage,
+            old["stages"][stage]["best"],
+            new["stages"][stage]["best"],
+            new["stages"][stage]["best"]
+            > old["stages"][stage]["best"] * (1 + threshold),
+        )
+        for stage in STAGES
+        if stage in old["stages"] and stage in new["stages"]
+    ]
+
+
+@click.group
+def main():
+    pass
+
+
+@main.command
+@click.option("--candidates", default=1_000, type=click.IntRange(min=1))
+@click.option("--schema", default=None, type=click.Choice(["generalist"]))
+@click.option("--disqualification-rate", default=0.1, type=click.FloatRange(0, 1))
+@click.option("--solver", default="jv", type=click.Choice(list(SOLVERS)))
+@click.option("--iterations", default=3, type=click.IntRange(min=1))
+@click.option("--repeats", default=3, type=click.IntRange(min=1))
+@click.option("--seed", default=0, type=int)
+@click.option(
+    "--json", "json_path", default=None, help="Write the results here, not stdout"
+)
+def run(
+    candidates: int,
+    schema: Optional[str],
+    disqualification_rate: float,
+    solver: str,
+    iterations: int,
+    repeats: int,
+    seed: int,
+    json_path: Optional[str],
+):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = generate_intake(
+            directory, candidates, schema, disqualification_rate, seed=seed
+        )
+        timings, intake = time_stages(*paths, schema, solver, iterations, repeats, seed)
+    results = {
+        "settings": {
+            "candidates": candidates,
+            "schema": schema,
+            "disqualification_rate": disqualification_rate,
+            "solver": solver,
+            "iterations": iterations,
+            "repeats": repeats,
+            "seed": seed,
+        },
+        "intake": intake,
+        "environment": {
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "finished": datetime.now(timezone.utc).isoformat(),
+        },
+        "stages": timings,
+    }
+    if json_path is None:
+        click.echo(json.dumps(results, indent=2))
+    else:
+        with open(json_path, "w") as file:
+            json.dump(results, file, indent=2)
+        for stage, timing in timings.items():
+            click.echo(f"{stage}: {timing['best']:.4f}s")
+
+
+@main.command
+@click.argument("old", type=click.File())
+@click.argument("new", type=click.File())
+@click.option(
+    "--threshold",
+    default=0.1,
+    type=click.FloatRange(min=0),
+    help="The share by which a stage may slow down before it counts as a regression",
+)
+def compare(old, new, threshold: float):
+    """
+    Compare the fastest time of each stage in two runs, exiting with an error if any stage regressed
+    """
+    old, new = json.load(old), json.load(new)
+    if old["settings"] != new["settings"]:
+        click.echo("Warning: the runs had different settings", err=True)
+    click.echo("stage,old_seconds,new_seconds,change,regressed")
+    regressions = find_regressions(old, new, threshold)
+    for stage, before, after, regressed in regressions:
+        change = after / before - 1 if before else 0.0
+        click.echo(f"{stage},{before:.4f},{after:.4f},{change:+.1%},{regressed}")
+    if any(regressed for *_, regressed in regressions):
+        raise click.ClickException("At least one stage regressed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compare the assignment solvers on random score grids. Run with
+
+    python -m benchmarks.solvers --sizes 100,1000,5000
+"""
+import time
+
+import click
+import numpy as np
+
+from fast_stream_22.matching.solvers import SOLVERS, get_solver
+
+
+def random_grid(
+    candidates: int, disallowed_rate: float, seed: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Make a grid with 20% more roles than candidates, which always has at least one complete pairing
+
+    :param candidates: the number of rows
+    :param disallowed_rate: the share of cells that are disqualified
+    :param seed: a seed for the random number generator
+    :return: a tuple of the scores and the allowed cells
+    """
+    rng = np.random.default_rng(seed)
+    shape = (candidates, int(candidates * 1.2))
+    scores = rng.integers(15, 100, size=shape)
+    allowed = rng.random(shape) >= disallowed_rate
+    allowed[np.arange(candidates), rng.permutation(shape[1])[:candidates]] = True
+    return scores, allowed
+
+
+@click.command
+@click.option(
+    "--sizes", default="100,1000,5000", help="Comma-separated numbers of candidates"
+)
+@click.option(
+    "--disallowed-rate", default=0.9, type=float, help="Share of disqualified cells"
+)
+@click.option(
+    "--munkres-limit",
+    default=1000,
+    type=int,
+    help="Skip the munkres solver above this many candidates",
+)
+@click.option("--seed", default=0, type=int)
+def main(sizes: str, disallowed_rate: float, munkres_limit: int, seed: int):
+    click.echo("candidates,solver,seconds,total_score")
+    for size in map(int, sizes.split(",")):
+        scores, allowed = random_grid(size, disallowed_rate, seed)
+        for name in SOLVERS:
+            if name == "munkres" and size > munkres_limit:
+                click.echo(f"{size},{name},skipped,")
+                continue
+            start = time.perf_counter()
+            pairs = get_solver(name).solve(scores, allowed)
+            elapsed = time.perf_counter() - start
+            total = sum(int(scores[row, col]) for row, col in pairs)
+            click.echo(f"{size},{name},{elapsed:.3f},{total}")
+
+
+if __name__ == "__main__":
+    main()
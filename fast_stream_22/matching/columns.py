@@ -0,0 +1,715 @@
+from __future__ import annotations
+
+import csv
+import dataclasses
+import itertools
+from enum import IntEnum
+from typing import Any, Callable, Iterable, Optional, Sequence, Type, Union
+
+import numpy as np
+
+from fast_stream_22.specialism.models import (
+    BaseClass,
+    Candidate,
+    Clearance,
+    Cohort,
+    Nationality,
+    NationalityRequirement,
+    Priority,
+    Role,
+    Travel,
+)
+from fast_stream_22.specialism.vocabulary import VocabularyRegistry
+
+FROM_ANYWHERE = ("Available Nationally", "Remote")
+
+
+def to_bitsets(
+    rows: Sequence[int] | np.ndarray,
+    ids: Sequence[int] | np.ndarray,
+    n_rows: int,
+    n_ids: int,
+) -> np.ndarray:
+    """
+    :param rows: the row of each member
+    :param ids: the vocabulary ID of each member
+    :param n_rows: the number of rows
+    :param n_ids: the size of the vocabulary
+    :return: a `(n_rows, words)` array of uint64, where bit `i % 64` of word `i // 64` is set if ID `i` is a member
+    """
+    bits = np.zeros((n_rows, max(1, -(-n_ids // 64))), dtype=np.uint64)
+    ids = np.asarray(ids, dtype=np.uint64)
+    np.bitwise_or.at(
+        bits,
+        (np.asarray(rows, dtype=np.intp), (ids // 64).astype(np.intp)),
+        np.left_shift(np.uint64(1), ids % np.uint64(64)),
+    )
+    return bits
+
+
+def bitset_members(bits: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :param bits: an array of bitsets, as made by `to_bitsets`
+    :return: a tuple of the row and the vocabulary ID of each member
+    """
+    flags = np.unpackbits(bits.astype("<u8").view(np.uint8), axis=1, bitorder="little")
+    rows, ids = np.nonzero(flags)
+    return rows, ids
+
+
+def has_member(bits: np.ndarray, word_id: Optional[int]) -> np.ndarray:
+    """
+    :param bits: an array of bitsets, as made by `to_bitsets`
+    :param word_id: a vocabulary ID, or None for a word that isn't in the vocabulary
+    :return: for each bitset, whether the ID is a member
+    """
+    if word_id is None:
+        return np.zeros(len(bits), dtype=bool)
+    word = bits[:, word_id // 64]
+    return (word >> np.uint64(word_id % 64)) & np.uint64(1) == 1
+
+
+def widen(bits: np.ndarray, n_ids: int) -> np.ndarray:
+    """
+    :param bits: an array of bitsets, as made by `to_bitsets`
+    :param n_ids: the size the vocabulary has grown to
+    :return: the bitsets, with zeroed words added so that every ID has a bit
+    """
+    words = max(1, -(-n_ids // 64))
+    if bits.shape[1] >= words:
+        return bits
+    return np.pad(bits, ((0, 0), (0, words - bits.shape[1])))
+
+
+def contains(bits: np.ndarray, word_ids: np.ndarray) -> np.ndarray:
+    """
+    :param bits: an array of `n` bitsets, as made by `to_bitsets`
+    :param word_ids: `m` vocabulary IDs, all of which have a bit in `bits`
+    :return: an `(n, m)` boolean grid of whether each ID is a member of each bitset
+    """
+    word_ids = np.asarray(word_ids, dtype=np.uint64)
+    words = bits[:, (word_ids // np.uint64(64)).astype(np.intp)]
+    return (words >> (word_ids % np.uint64(64))) & np.uint64(1) == 1
+
+
+def subsets(bits: np.ndarray, supersets: np.ndarray) -> np.ndarray:
+    """
+    :param bits: an array of `n` bitsets
+    :param supersets: an array of `m` bitsets of the same width
+    :return: an `(n, m)` boolean grid of whether each of `bits` is a subset of each of `supersets`
+    """
+    outside = ~supersets
+    result = np.ones((len(bits), len(supersets)), dtype=bool)
+    for word in range(bits.shape[1]):
+        result &= (bits[:, word, np.newaxis] & outside[np.newaxis, :, word]) == 0
+    return result
+
+
+def popcount(masks: np.ndarray) -> np.ndarray:
+    """
+    :param masks: an array of non-negative 64-bit integers
+    :return: the number of bits set in each
+    """
+    as_bytes = masks.astype("<u8").view(np.uint8).reshape(-1, 8)
+    return np.unpackbits(as_bytes, axis=1).sum(axis=1).astype(np.int64)
+
+
+def _boolify(value: str) -> bool:
+    return BaseClass._boolify(value.lower())
+
+
+@dataclasses.dataclass(frozen=True)
+class Field:
+    """
+    How one column of a table is read from a CSV. `kind` is one of
+
+    - `text`: the raw string, held as UTF-8 bytes
+    - `flag`: a boolean
+    - `enum`: an `IntEnum`, held as its value
+    - `enum_set`: a set of `IntEnum` members, held as a bitmask of `1 << value`
+    - `word`: a string from `vocabulary`, held as its ID
+    - `set`: a set of strings from `vocabulary`, held as a bitset of their IDs
+
+    An `optional` field whose source columns are missing from the CSV takes the value `default` in every row.
+    """
+
+    name: str
+    sources: tuple[str, ...]
+    kind: str
+    parse: Callable[[str], Any] = str
+    enum: Optional[Type[IntEnum]] = None
+    vocabulary: Optional[str] = None
+    separators: str = ","
+    optional: bool = False
+    default: Optional[str] = None
+
+    def items(self, values: Sequence[Optional[str]]) -> list[Optional[str]]:
+        """
+        :param values: the value of each source column in one row
+        :return: the items of a set-valued field
+        """
+        if len(self.sources) > 1:
+            return list(values)
+        value = values[0]
+        if value is None:
+            return [None]
+        for separator in self.separators[1:]:
+            value = value.replace(separator, self.separators[0])
+        return value.split(self.separators[0])
+
+
+def _department(value: str) -> str:
+    return value.lower().strip()
+
+
+def _strip(value: str) -> str:
+    return value.strip()
+
+
+def _nationality(value: str) -> Nationality:
+    return Nationality[value.replace(" ", "_").upper()]
+
+
+def _nationality_requirement(value: str) -> NationalityRequirement:
+    return NationalityRequirement[value.replace(" ", "_").upper()]
+
+
+class _ColumnBuilder:
+    """
+    Collects one column, a chunk of rows at a time
+    """
+
+    def __init__(self, field: Field, registry: VocabularyRegistry):
+        self.field = field
+        self.vocabulary = registry[field.vocabulary] if field.vocabulary else None
+        self.chunks: list[np.ndarray] = []
+        self.rows: list[int] = []
+        self.ids: list[int] = []
+        self.n_rows = 0
+
+    def add(self, values: list[Sequence[Optional[str]]]) -> None:
+        """
+        :param values: for each row in the chunk, the value of each of the field's source columns
+        """
+        field, n = self.field, len(values)
+        if field.kind == "text":
+            self.chunks.append(np.array([v[0].encode() for v in values], dtype=bytes))
+        elif field.kind == "flag":
+            self.chunks.append(
+                np.fromiter((_boolify(v[0]) for v in values), dtype=bool, count=n)
+            )
+        elif field.kind == "enum":
+            self.chunks.append(
+                np.fromiter((field.parse(v[0]) for v in values), dtype=np.int8, count=n)
+            )
+        elif field.kind == "enum_set":
+            self.chunks.append(
+                np.fromiter(
+                    (
+                        sum({1 << field.parse(item) for item in field.items(v)})
+                        for v in values
+                    ),
+                    dtype=np.int64,
+                    count=n,
+                )
+            )
+        elif field.kind == "word":
+            intern = self.vocabulary.intern
+            self.chunks.append(
+                np.fromiter(
+                    (
+                        intern(field.parse(v[0]) if v[0] is not None else None)
+                        for v in values
+                    ),
+                    dtype=np.int32,
+                    count=n,
+                )
+            )
+        elif field.kind == "set":
+            intern = self.vocabulary.intern
+            for row, v in enumerate(values, start=self.n_rows):
+                for item in field.items(v):
+                    self.rows.append(row)
+                    self.ids.append(
+                        intern(field.parse(item) if item is not None else None)
+                    )
+        else:
+            raise ValueError(f"Unknown kind of field {field.kind}")
+        self.n_rows += n
+
+    def finish(self) -> np.ndarray:
+        if self.field.kind == "set":
+            return to_bitsets(self.rows, self.ids, self.n_rows, len(self.vocabulary))
+        if not self.chunks:
+            return np.zeros(0, dtype=bytes if self.field.kind == "text" else np.int64)
+        return np.concatenate(self.chunks)
+
+
+class Row:
+    """
+    A lightweight, read-only view of one row of a `Table`, for code that wants objects. Attributes are decoded from
+    the table's columns as they're read.
+    """
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: Table, index: int):
+        self.table = table
+        self.index = index
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_") or name in Row.__slots__:
+            raise AttributeError(name)
+        try:
+            return self.table.value(name, self.index)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __repr__(self) -> str:
+        return self.uid
+
+
+class CandidateRow(Row):
+    __slots__ = ()
+
+
+class GeneralistCandidateRow(CandidateRow):
+    __slots__ = ()
+
+    @property
+    def accessibility_needs(self) -> set[str]:
+        return self.accessibility
+
+
+class RoleRow(Row):
+    __slots__ = ()
+
+    @property
+    def clearance_required(self) -> Clearance:
+        return self.clearance
+
+    def from_anywhere(self) -> bool:
+        return bool(self.table.columns["from_anywhere"][self.index])
+
+
+class GeneralistRoleRow(RoleRow):
+    __slots__ = ()
+
+    @property
+    def accessibility_adjustment(self) -> set[str]:
+        return self.accessibility
+
+
+# A candidate or role as the matching code sees it: a full object, or a row view of a `Table`, which reads the same
+CandidateRecord = Union[Candidate, Row]
+RoleRecord = Union[Role, Row]
+
+Fix = Callable[[dict[str, np.ndarray], VocabularyRegistry], None]
+
+
+@dataclasses.dataclass(frozen=True)
+class Schema:
+    """
+    The columns of one kind of table, the row view that reads it, and any fixes applied to the columns once they
+    have all been read, mirroring what the matching model class does in its constructor
+    """
+
+    fields: tuple[Field, ...]
+    row_type: Type[Row]
+    fixes: tuple[Fix, ...] = ()
+
+    def extend(
+        self, fields: Sequence[Field], row_type: Type[Row], fixes: Sequence[Fix] = ()
+    ) -> Schema:
+        """
+        :param fields: fields to add, replacing any of this schema's fields with the same name
+        :param row_type: the row view for the new schema
+        :param fixes: fixes to run after this schema's
+        """
+        replaced = {field.name for field in fields}
+        return Schema(
+            tuple(f for f in self.fields if f.name not in replaced) + tuple(fields),
+            row_type,
+            self.fixes + tuple(fixes),
+        )
+
+    @property
+    def by_name(self) -> dict[str, Field]:
+        return {field.name: field for field in self.fields}
+
+
+class Table:
+    """
+    Candidates or roles held as one NumPy array per attribute
+    """
+
+    def __init__(
+        self,
+        schema: Schema,
+        columns: dict[str, np.ndarray],
+        registry: VocabularyRegistry,
+    ):
+        self.schema = schema
+        self.columns = columns
+        self.registry = registry
+        self._fields = schema.by_name
+
+    def __len__(self) -> int:
+        return len(self.columns["uid"])
+
+    def rows(self) -> list[Row]:
+        return [self.schema.row_type(self, i) for i in range(len(self))]
+
+    def value(self, name: str, index: int) -> Any:
+        """
+        Decode a single value
+
+        :param name: the name of the column
+        :param index: the row
+        :raises KeyError: if there is no such column
+        """
+        column = self.columns[name]
+        field = self._fields.get(name)
+        if field is None:
+            return column[index].item()
+        if field.kind == "text":
+            return column[index].decode()
+        if field.kind == "flag":
+            return bool(column[index])
+        if field.kind == "enum":
+            return field.enum(column[index])
+        if field.kind == "enum_set":
+            mask = int(column[index])
+            return {member for member in field.enum if mask & (1 << member)}
+        vocabulary = self.registry[field.vocabulary]
+        if field.kind == "word":
+            return vocabulary[column[index]]
+        _, ids = bitset_members(column[index : index + 1])
+        return {vocabulary[i] for i in ids.tolist()}
+
+    @classmethod
+    def read(
+        cls,
+        path: str,
+        schema: Schema,
+        registry: Optional[VocabularyRegistry] = None,
+        chunk_size: int = 4096,
+    ) -> Table:
+        """
+        Stream a CSV into columns, `chunk_size` rows at a time, without building an object per row
+
+        :param path: the CSV to read
+        :param schema: the columns to read from it
+        :param registry: the vocabularies to intern strings into. Tables that will be scored against each other
+            should share one
+        :param chunk_size: the number of rows to parse at once
+        :return: a table
+        """
+        with open(path, newline="") as file:
+            return cls.parse(file, schema, registry, chunk_size, name=path)
+
+    @classmethod
+    def parse(
+        cls,
+        lines: Iterable[str],
+        schema: Schema,
+        registry: Optional[VocabularyRegistry] = None,
+        chunk_size: int = 4096,
+        name: str = "The CSV",
+    ) -> Table:
+        """
+        Parse the lines of a CSV into columns, as `read` does
+
+        :param lines: the CSV's lines, such as an open file
+        :param name: what to call the CSV in errors
+        """
+        registry = registry or VocabularyRegistry()
+        builders = [_ColumnBuilder(field, registry) for field in schema.fields]
+        reader = csv.reader(lines)
+        header = {column: i for i, column in enumerate(next(reader, []))}
+        for field in schema.fields:
+            missing = [s for s in field.sources if s not in header]
+            if missing and not field.optional:
+                raise ValueError(f"{name} has no {', '.join(missing)} column")
+        positions = [
+            [header.get(source) for source in field.sources] for field in schema.fields
+        ]
+        while chunk := list(itertools.islice(reader, chunk_size)):
+            for builder, field, sources in zip(builders, schema.fields, positions):
+                builder.add(
+                    [
+                        [
+                            row[i].strip() if i is not None else field.default
+                            for i in sources
+                        ]
+                        for row in chunk
+                    ]
+                )
+        columns = {
+            field.name: builder.finish()
+            for field, builder in zip(schema.fields, builders)
+        }
+        for fix in schema.fixes:
+            fix(columns, registry)
+        return cls(schema, columns, registry)
+
+
+def rows_of(items: Sequence[Any]) -> Optional[tuple[Table, np.ndarray]]:
+    """
+    :param items: candidates or roles
+    :return: if every item is a row view of the same table, a tuple of the table and the rows' indices
+    """
+    if not items or not isinstance(items[0], Row):
+        return None
+    table = items[0].table
+    if not all(isinstance(item, Row) and item.table is table for item in items):
+        return None
+    return table, np.fromiter((item.index for item in items), dtype=np.intp)
+
+
+def _fix_role(columns: dict[str, np.ndarray], registry: VocabularyRegistry) -> None:
+    bpss = columns["clearance"] == Clearance.BPSS
+    columns["nationality_requirement"][bpss] = NationalityRequirement.NO_RESTRICTION
+    locations = registry["location"]
+    columns["from_anywhere"] = np.zeros(len(columns["uid"]), dtype=bool)
+    for place in FROM_ANYWHERE:
+        columns["from_anywhere"] |= has_member(
+            columns["locations"], locations.ids.get(place)
+        )
+
+
+def _fix_generalist_candidate(
+    columns: dict[str, np.ndarray], registry: VocabularyRegistry
+) -> None:
+    dv = columns["clearance"] == Clearance.DV
+    columns["clearance"][dv] = Clearance.SC
+    departments = registry["department"]
+    stays = ~columns["can_relocate"]
+    for department in ("wg", "sg"):
+        if (word_id := departments.ids.get(department)) is not None:
+            bit = np.uint64(1) << np.uint64(word_id % 64)
+            columns["prior_departments"][stays, word_id // 64] &= ~bit
+    six_month = columns["year_group"] == Cohort.SixMonth
+    columns["can_relocate"][six_month] = False
+
+
+def _fix_generalist_role(
+    columns: dict[str, np.ndarray], registry: VocabularyRegistry
+) -> None:
+    two = (columns["suitable_year_groups"] & (1 << Cohort.Two)) != 0
+    columns["suitable_year_groups"][two] |= 1 << Cohort.SixMonth
+
+
+CANDIDATE_SCHEMA = Schema(
+    (
+        Field("uid", ("uuid",), "text"),
+        Field(
+            "clearance", ("clearance_held",), "enum", Clearance.__getitem__, Clearance
+        ),
+        Field("year_group", ("year_group",), "enum", Cohort.factory, Cohort),
+        Field(
+            "prior_departments",
+            ("prior_departments",),
+            "set",
+            _department,
+            vocabulary="department",
+        ),
+        Field(
+            "first_preference_location",
+            ("first_location_preference",),
+            "word",
+            vocabulary="location",
+        ),
+        Field(
+            "second_preference_location",
+            ("second_location_preference",),
+            "word",
+            vocabulary="location",
+        ),
+        Field("can_relocate", ("can_relocate",), "flag"),
+        Field("wants_line_management", ("wants_line_management",), "flag"),
+        Field("wants_private_office", ("wants_private_office",), "flag"),
+        Field("no_defence", ("no_defence",), "flag"),
+        Field("no_immigration", ("no_immigration",), "flag"),
+        Field(
+            "preferred_office_attendance",
+            ("preferred_office_attendance",),
+            "word",
+            vocabulary="working_pattern",
+        ),
+        Field("primary_skill", ("primary_skills_seeking",), "word", vocabulary="skill"),
+        Field(
+            "secondary_skill", ("secondary_skills_seeking",), "word", vocabulary="skill"
+        ),
+        Field(
+            "british_national", ("british_national",), "enum", _nationality, Nationality
+        ),
+        Field("has_passport", ("has_passport",), "flag"),
+        Field(
+            "last_role_main_skill",
+            ("last_role_main_skill",),
+            "word",
+            vocabulary="skill",
+            optional=True,
+        ),
+        Field(
+            "last_role_secondary_skill",
+            ("last_role_secondary_skill",),
+            "word",
+            vocabulary="skill",
+            optional=True,
+        ),
+        Field(
+            "has_relocated",
+            ("previous_relocation",),
+            "flag",
+            optional=True,
+            default="false",
+        ),
+    ),
+    CandidateRow,
+)
+
+GENERALIST_CANDIDATE_SCHEMA = CANDIDATE_SCHEMA.extend(
+    (
+        Field(
+            "prior_departments",
+            ("prior_departments",),
+            "set",
+            _department,
+            vocabulary="department",
+            separators=", ",
+        ),
+        Field(
+            "working_patterns",
+            ("preferred_office_attendance",),
+            "set",
+            _strip,
+            vocabulary="working_pattern",
+        ),
+        Field(
+            "accessibility",
+            ("accessibility",),
+            "set",
+            _strip,
+            vocabulary="accessibility",
+        ),
+        Field(
+            "primary_anchor",
+            ("primary_anchor_seeking",),
+            "word",
+            vocabulary="anchor",
+        ),
+        Field(
+            "secondary_anchor",
+            ("secondary_anchor_seeking",),
+            "word",
+            vocabulary="anchor",
+        ),
+        Field(
+            "dept_prefs",
+            tuple(f"dept_pref_{i}" for i in range(1, 6)),
+            "set",
+            _department,
+            vocabulary="department",
+        ),
+        Field(
+            "travel_requirements",
+            ("travel_requirements",),
+            "enum",
+            Travel.factory,
+            Travel,
+        ),
+        Field(
+            "match_preferences",
+            ("match_pref_1", "match_pref_2"),
+            "set",
+            vocabulary="preference",
+            optional=True,
+        ),
+    ),
+    GeneralistCandidateRow,
+    (_fix_generalist_candidate,),
+)
+
+ROLE_SCHEMA = Schema(
+    (
+        Field("uid", ("uuid",), "text"),
+        Field(
+            "clearance",
+            ("clearance_required",),
+            "enum",
+            Clearance.__getitem__,
+            Clearance,
+        ),
+        Field(
+            "nationality_requirement",
+            ("nationality_requirement",),
+            "enum",
+            _nationality_requirement,
+            NationalityRequirement,
+        ),
+        Field("passport_requirement", ("passport_requirement",), "flag"),
+        Field("locations", ("location",), "set", _strip, vocabulary="location"),
+        Field(
+            "department", ("department",), "word", _department, vocabulary="department"
+        ),
+        Field(
+            "priority_role",
+            ("priority_role",),
+            "enum",
+            lambda value: Priority[value.upper()],
+            Priority,
+        ),
+        Field(
+            "suitable_year_groups",
+            ("suitable_for_year_group",),
+            "enum_set",
+            Cohort.factory,
+            Cohort,
+        ),
+        Field("private_office_role", ("private_office_role",), "flag"),
+        Field("line_management_role", ("line_management_role",), "flag"),
+        Field("office_arrangements", ("office_arrangement",), "text"),
+        Field(
+            "travel_requirements",
+            ("travel_requirements",),
+            "enum",
+            Travel.factory,
+            Travel,
+        ),
+        Field("defence_role", ("defence_role",), "flag"),
+        Field("immigration_role", ("immigration_role",), "flag"),
+        Field("skill_focus", ("skill_focus",), "word", vocabulary="skill"),
+        Field("secondary_focus", ("secondary_focus",), "word", vocabulary="skill"),
+    ),
+    RoleRow,
+    (_fix_role,),
+)
+
+GENERALIST_ROLE_SCHEMA = ROLE_SCHEMA.extend(
+    (
+        Field(
+            "working_patterns",
+            ("office_arrangement",),
+            "set",
+            _strip,
+            vocabulary="working_pattern",
+        ),
+        Field(
+            "accessibility",
+            ("accessibility",),
+            "set",
+            _strip,
+            vocabulary="accessibility",
+        ),
+        Field("anchor", ("anchor",), "word", vocabulary="anchor"),
+    ),
+    GeneralistRoleRow,
+    (_fix_generalist_role,),
+)
+
+SCHEMAS: dict[Optional[str], tuple[Schema, Schema]] = {
+    None: (CANDIDATE_SCHEMA, ROLE_SCHEMA),
+    "generalist": (GENERALIST_CANDIDATE_SCHEMA, GENERALIST_ROLE_SCHEMA),
+}
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import dataclasses
+from typing import Sequence
+
+import numpy as np
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class EdgeGrid:
+    """
+    The allowed pairings of a grid of candidates and roles, held as compressed rows. Only allowed cells are stored,
+    so memory grows with the number of feasible pairings rather than with candidates × roles. Within each row, the
+    columns are in ascending order.
+    """
+
+    shape: tuple[int, int]
+    starts: np.ndarray
+    cols: np.ndarray
+    scores: np.ndarray
+
+    @classmethod
+    def from_dense(cls, scores: np.ndarray, allowed: np.ndarray) -> EdgeGrid:
+        """
+        :param scores: an integer grid of scores
+        :param allowed: a boolean grid of the same shape, which is False where a pairing is disqualified
+        """
+        rows, cols = np.nonzero(allowed)
+        return cls(
+            (int(allowed.shape[0]), int(allowed.shape[1])),
+            np.searchsorted(rows, np.arange(allowed.shape[0] + 1)),
+            cols.astype(np.int32),
+            scores[rows, cols].astype(np.int32),
+        )
+
+    @classmethod
+    def from_coordinates(
+        cls,
+        shape: tuple[int, int],
+        rows: np.ndarray,
+        cols: np.ndarray,
+        scores: np.ndarray,
+    ) -> EdgeGrid:
+        """
+        :param shape: the number of rows and columns
+        :param rows: the row of each edge, in any order
+        :param cols: the column of each edge
+        :param scores: the score of each edge
+        """
+        order = np.lexsort((cols, rows))
+        return cls(
+            shape,
+            np.searchsorted(rows[order], np.arange(shape[0] + 1)),
+            np.asarray(cols)[order].astype(np.int32),
+            np.asarray(scores)[order].astype(np.int32),
+        )
+
+    @classmethod
+    def stack(cls, grids: Sequence[EdgeGrid], n_cols: int) -> EdgeGrid:
+        """
+        Join grids with the same columns one above the other
+
+        :param grids: the grids to join, from top to bottom
+        :param n_cols: the number of columns in every grid
+        """
+        n_rows = sum(grid.shape[0] for grid in grids)
+        if not grids:
+            return cls.from_coordinates((n_rows, n_cols), *np.zeros((3, 0), int))
+        offsets = np.cumsum([0] + [grid.nnz for grid in grids[:-1]])
+        return cls(
+            (n_rows, n_cols),
+            np.concatenate(
+                [grid.starts[:-1] + offset for grid, offset in zip(grids, offsets)]
+                + [[offsets[-1] + grids[-1].nnz]]
+            ),
+            np.concatenate([grid.cols for grid in grids]),
+            np.concatenate([grid.scores for grid in grids]),
+        )
+
+    def hstack(self, other: EdgeGrid) -> EdgeGrid:
+        """
+        Join a grid with the same rows to the right of this one
+
+        :param other: the grid whose columns will follow this grid's
+        """
+        return self.from_coordinates(
+            (self.shape[0], self.shape[1] + other.shape[1]),
+            np.concatenate([self.row_indices(), other.row_indices()]),
+            np.concatenate([self.cols, other.cols + self.shape[1]]),
+            np.concatenate([self.scores, other.scores]),
+        )
+
+    @property
+    def nnz(self) -> int:
+        return len(self.cols)
+
+    @property
+    def nbytes(self) -> int:
+        return self.starts.nbytes + self.cols.nbytes + self.scores.nbytes
+
+    def row_indices(self) -> np.ndarray:
+        """
+        :return: the row of each edge
+        """
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.starts))
+
+    def row_degrees(self) -> np.ndarray:
+        return np.diff(self.starts)
+
+    def column_degrees(self) -> np.ndarray:
+        return np.bincount(self.cols, minlength=self.shape[1])
+
+    def to_dense(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :return: a tuple of the integer scores, which are zero where there is no edge, and a boolean grid that is True
+            where there is
+        """
+        scores = np.zeros(self.shape, dtype=np.int32)
+        allowed = np.zeros(self.shape, dtype=bool)
+        rows = self.row_indices()
+        scores[rows, self.cols] = self.scores
+        allowed[rows, self.cols] = True
+        return scores, allowed
+
+    def transpose(self) -> EdgeGrid:
+        return self.from_coordinates(
+            (self.shape[1], self.shape[0]), self.cols, self.row_indices(), self.scores
+        )
+
+    def take(self, rows: np.ndarray, cols: np.ndarray) -> EdgeGrid:
+        """
+        Select a sub-grid
+
+        :param rows: the rows to keep, in their new order
+        :param cols: the columns to keep, in their new order
+        :return: a grid of `len(rows)` × `len(cols)`
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        lengths = np.diff(self.starts)[rows]
+        first = np.cumsum(lengths) - lengths
+        edges = np.arange(lengths.sum()) + np.repeat(self.starts[rows] - first, lengths)
+        new_cols = np.full(self.shape[1], -1, dtype=np.intp)
+        new_cols[cols] = np.arange(len(cols))
+        mapped = new_cols[self.cols[edges]]
+        keep = mapped >= 0
+        return self.from_coordinates(
+            (len(rows), len(cols)),
+            np.repeat(np.arange(len(rows)), lengths)[keep],
+            mapped[keep],
+            self.scores[edges][keep],
+        )
+
+    def score(self, row: int, col: int) -> int:
+        """
+        :raises KeyError: if the pairing is not allowed
+        """
+        start, end = self.starts[row], self.starts[row + 1]
+        i = start + np.searchsorted(self.cols[start:end], col)
+        if i == end or self.cols[i] != col:
+            raise KeyError(f"({row}, {col}) is not an allowed pairing")
+        return int(self.scores[i])
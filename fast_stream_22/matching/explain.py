@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import csv
+import dataclasses
+from typing import Optional, Sequence, Type
+
+import numpy as np
+
+from fast_stream_22.matching.columns import CandidateRecord, RoleRecord
+from fast_stream_22.matching.edges import EdgeGrid
+from fast_stream_22.matching.match import pair_type_for
+from fast_stream_22.matching.output import read_pair_columns
+from fast_stream_22.matching.scoring import ScoreCache
+from fast_stream_22.matching.snapshot import load_inputs
+from fast_stream_22.specialism.pair import P, is_check
+
+
+@dataclasses.dataclass
+class Explanation:
+    """
+    Why a candidate could or couldn't be paired with a role, and what else they could have had
+    """
+
+    candidate: str
+    role: str
+    disqualified_by: list[str]
+    contributions: dict[str, int]
+    score: int
+    alternatives: list[tuple[str, int]]
+    iteration: Optional[int] = None
+    paired_with: Optional[str] = None
+
+    @property
+    def eligible(self) -> bool:
+        return not self.disqualified_by
+
+    def describe(self) -> list[str]:
+        """
+        :return: the explanation as lines of text
+        """
+        if self.eligible:
+            lines = [
+                f"{self.candidate} is eligible for {self.role}, scoring {self.score}"
+            ]
+        else:
+            lines = [
+                f"{self.candidate} is disqualified from {self.role} by"
+                f" {', '.join(self.disqualified_by)}"
+            ]
+        lines.extend(
+            f"  {name}: {points:+d}" for name, points in self.contributions.items()
+        )
+        if self.iteration is not None:
+            paired = self.paired_with or "no role"
+            lines.append(
+                f"In iteration {self.iteration} they were paired with {paired}"
+            )
+        lines.append(f"Their {len(self.alternatives)} best-scoring roles:")
+        lines.extend(f"  {role}: {score}" for role, score in self.alternatives)
+        return lines
+
+
+class DecisionIndex:
+    """
+    Answers questions about individual pairings without running the match. Each candidate's row of the score grid
+    is worked out the first time they are asked about and kept, so the cost of an answer grows with the number of
+    roles rather than with the size of the intake.
+    """
+
+    def __init__(
+        self,
+        candidates: Sequence[CandidateRecord],
+        roles: Sequence[RoleRecord],
+        pair_type: Type[P],
+        cache: Optional[ScoreCache] = None,
+    ):
+        """
+        :param candidates: every candidate in the intake
+        :param roles: every role in the intake
+        :param pair_type: the class of `Pair` that defines the scoring rules
+        :param cache: a `ScoreCache` of the whole intake, if one has already been built
+        """
+        self.candidates = {c.uid: c for c in candidates}
+        self.roles = list(roles)
+        self.role_index = {r.uid: i for i, r in enumerate(self.roles)}
+        self.pair_type = pair_type
+        self.cache = cache
+        self._rows: dict[str, EdgeGrid] = {}
+
+    def candidate_row(self, candidate_uid: str) -> EdgeGrid:
+        """
+        :param candidate_uid: the uid of a candidate
+        :return: a one-row grid of the roles the candidate may be paired with and their scores
+        :raises KeyError: if there is no such candidate
+        """
+        if candidate_uid not in self._rows:
+            candidate = self.candidates[candidate_uid]
+            if self.cache is not None:
+                row = self.cache.grid([candidate], self.roles)
+            else:
+                row = ScoreCache([candidate], self.roles, self.pair_type).edges
+            self._rows[candidate_uid] = row
+        return self._rows[candidate_uid]
+
+    def alternatives(self, candidate_uid: str, top: int = 5) -> list[tuple[str, int]]:
+        """
+        :param candidate_uid: the uid of a candidate
+        :param top: the number of roles to list
+        :return: the uid and score of the candidate's highest-scoring roles, best first
+        """
+        row = self.candidate_row(candidate_uid)
+        order = np.lexsort((row.cols, -row.scores))[:top]
+        return [(self.roles[row.cols[i]].uid, int(row.scores[i])) for i in order]
+
+    def breakdown(
+        self, candidate_uid: str, role_uid: str
+    ) -> tuple[list[str], dict[str, int], int]:
+        """
+        Run every check and scoring method on the pair, not stopping at the first check that fails, so that every
+        reason is given
+
+        :param candidate_uid: the uid of a candidate
+        :param role_uid: the uid of a role
+        :return: a tuple of the names of the checks that disqualify the pair, the points from each scoring method
+            that awarded any, and the total score
+        :raises KeyError: if there is no such candidate or role
+        """
+        candidate = self.candidates[candidate_uid]
+        role = self.roles[self.role_index[role_uid]]
+        disqualified_by = []
+        scored = self.pair_type(candidate, role)
+        contributions = {}
+        for name in sorted(self.pair_type.scoring_method_names):
+            if is_check(name):
+                check = self.pair_type(candidate, role)
+                getattr(check, name)()
+                if check.disqualified:
+                    disqualified_by.append(name)
+                continue
+            before = scored.score
+            getattr(scored, name)()
+            if scored.score != before:
+                contributions[name] = scored.score - before
+        scored._check_score()
+        if scored.disqualified:
+            disqualified_by.append("_check_score")
+        if hasattr(scored, "_score_preferences"):
+            before = scored.score
+            scored._score_preferences()
+            if scored.score != before:
+                contributions["_score_preferences"] = scored.score - before
+        return disqualified_by, contributions, scored.score
+
+    def explain(
+        self,
+        candidate_uid: str,
+        role_uid: str,
+        top: int = 5,
+        iteration: Optional[int] = None,
+        results: Optional[dict[int, dict[str, str]]] = None,
+    ) -> Explanation:
+        """
+        :param candidate_uid: the uid of a candidate
+        :param role_uid: the uid of a role
+        :param top: the number of alternative roles to list
+        :param iteration: an iteration of a run whose pairings are in `results`
+        :param results: the pairings of each iteration of a run, as read by `read_results`
+        :return: the explanation
+        :raises KeyError: if there is no such candidate or role, or `results` has no such iteration
+        """
+        disqualified_by, contributions, score = self.breakdown(candidate_uid, role_uid)
+        paired_with = None
+        if iteration is not None and results is not None:
+            paired_with = results[iteration].get(candidate_uid)
+        return Explanation(
+            candidate_uid,
+            role_uid,
+            disqualified_by,
+            contributions,
+            score,
+            self.alternatives(candidate_uid, top),
+            iteration,
+            paired_with,
+        )
+
+
+def read_results(path: str) -> dict[int, dict[str, str]]:
+    """
+    Read the pairings printed by `pairing_script`, one `iteration,cohort,candidate,role,score` row per pair. Other
+    lines are skipped. A path ending `.npz` is read as the columns written by `pairing_script --output`.
+
+    :param path: a file holding the script's output
+    :return: for each iteration, a dictionary of candidate uid to role uid
+    """
+    results: dict[int, dict[str, str]] = {}
+    if str(path).endswith(".npz"):
+        columns = read_pair_columns(path)
+        for iteration, candidate, role in zip(
+            columns["iteration"].tolist(),
+            columns["candidate"].tolist(),
+            columns["role"].tolist(),
+        ):
+            results.setdefault(iteration, {})[candidate] = role
+        return results
+    with open(path, newline="") as file:
+        for row in csv.reader(file):
+            if len(row) != 5 or not row[0].isdigit():
+                continue
+            iteration, _, candidate, role, _ = row
+            results.setdefault(int(iteration), {})[candidate] = role
+    return results
+
+
+def explain_pair(
+    candidate_file: str,
+    role_file: str,
+    candidate_uid: str,
+    role_uid: str,
+    specialism: Optional[str] = None,
+    top: int = 5,
+    iteration: Optional[int] = None,
+    results_file: Optional[str] = None,
+    snapshot: Optional[str] = None,
+) -> Explanation:
+    """
+    Explain one pairing straight from the input files
+
+    :param candidate_file: path to the candidates CSV
+    :param role_file: path to the roles CSV
+    :param candidate_uid: the uid of the candidate
+    :param role_uid: the uid of the role
+    :param specialism: the scheme specialism
+    :param top: the number of alternative roles to list
+    :param iteration: the iteration of the run in `results_file` to report the candidate's pairing from
+    :param results_file: a file holding the output of `pairing_script`
+    :param snapshot: a directory written by `compile_snapshot`, used if it is fresh
+    :return: the explanation
+    """
+    candidates, roles = load_inputs(candidate_file, role_file, specialism, snapshot)
+    index = DecisionIndex(candidates, roles, pair_type_for(specialism))
+    results = read_results(results_file) if results_file else None
+    return index.explain(candidate_uid, role_uid, top, iteration, results)
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import heapq
+from typing import Sequence
+
+import numpy as np
+
+from fast_stream_22.matching.edges import EdgeGrid
+from fast_stream_22.matching.solvers import Assignment
+
+
+def min_cost_flow(
+    n_nodes: int,
+    tails: Sequence[int] | np.ndarray,
+    heads: Sequence[int] | np.ndarray,
+    capacities: Sequence[int] | np.ndarray,
+    costs: Sequence[int] | np.ndarray,
+    source: int,
+    sink: int,
+) -> np.ndarray:
+    """
+    Find the cheapest flow from `source` to `sink` by successive shortest paths, sending flow along the cheapest
+    path with room until there is none left, or the cheapest would cost more than it saves. Paths are found with
+    Dijkstra's algorithm on costs reduced by node potentials, so costs may be negative, and every path that is as
+    cheap as the shortest is filled before the next search. The first potentials are
+    found in one pass over the edges, so every edge must run from a lower-numbered node to a higher-numbered one.
+
+    :param n_nodes: the number of nodes
+    :param tails: the node each edge leaves
+    :param heads: the node each edge enters
+    :param capacities: the most each edge can carry
+    :param costs: the integer cost of each unit carried by each edge
+    :param source: the node flow starts from
+    :param sink: the node flow ends at
+    :return: the flow along each edge
+    """
+    n_edges = len(tails)
+    tails, heads = list(map(int, tails)), list(map(int, heads))
+    if any(tail >= head for tail, head in zip(tails, heads)):
+        raise ValueError("Every edge must run to a higher-numbered node")
+    to = [0] * (2 * n_edges)
+    room = [0] * (2 * n_edges)
+    cost = [0] * (2 * n_edges)
+    adjacency: list[list[int]] = [[] for _ in range(n_nodes)]
+    for edge, (tail, head, capacity, unit_cost) in enumerate(
+        zip(tails, heads, map(int, capacities), map(int, costs))
+    ):
+        forward, backward = 2 * edge, 2 * edge + 1
+        to[forward], room[forward], cost[forward] = head, capacity, unit_cost
+        to[backward], room[backward], cost[backward] = tail, 0, -unit_cost
+        adjacency[tail].append(forward)
+        adjacency[head].append(backward)
+    unreached = float("inf")
+    potential = [unreached] * n_nodes
+    potential[source] = 0
+    for edge in sorted(range(n_edges), key=tails.__getitem__):
+        if potential[tails[edge]] < unreached and room[2 * edge]:
+            potential[heads[edge]] = min(
+                potential[heads[edge]], potential[tails[edge]] + cost[2 * edge]
+            )
+    potential = [p if p < unreached else 0 for p in potential]
+    while True:
+        distance = [unreached] * n_nodes
+        arrived_by = [-1] * n_nodes
+        distance[source] = 0
+        heap: list[tuple[float, int]] = [(0, source)]
+        done = [False] * n_nodes
+        while heap:
+            dist, node = heapq.heappop(heap)
+            if done[node]:
+                continue
+            done[node] = True
+            if node == sink:
+                break
+            for edge in adjacency[node]:
+                if room[edge]:
+                    head = to[edge]
+                    reduced = dist + cost[edge] + potential[node] - potential[head]
+                    if reduced < distance[head]:
+                        distance[head] = reduced
+                        arrived_by[head] = edge
+                        heapq.heappush(heap, (reduced, head))
+        if not done[sink]:
+            break
+        if distance[sink] + potential[sink] - potential[source] >= 0:
+            break
+        for node in range(n_nodes):
+            potential[node] += min(distance[node], distance[sink])
+        _augment_shortest_paths(to, room, cost, adjacency, potential, source, sink)
+    return np.array(room[1::2], dtype=np.int64)
+
+
+def assign_with_quotas(
+    edges: EdgeGrid,
+    departments: np.ndarray,
+    lower: Sequence[int] | np.ndarray,
+    upper: Sequence[int] | np.ndarray,
+) -> Assignment:
+    """
+    Pair candidates with roles in one min-cost flow, where each department can take between `lower` and `upper`
+    candidates. A lower bound that can't be met isn't an error: the flow fills as many of the departments' lower
+    bounds as it can, then pairs as many candidates as it can, and then finds the highest total score.
+
+    :param edges: the allowed pairings, with candidates as rows and roles as columns
+    :param departments: for each role, the position of its department in `lower` and `upper`
+    :param lower: the number of candidates each department should get
+    :param upper: the most candidates each department can take
+    :return: a list of (row, column) tuples
+    """
+    n_rows, n_cols = edges.shape
+    n_departments = len(upper)
+    if edges.nnz == 0:
+        return []
+    scores = edges.scores.astype(np.int64)
+    pair_reward = n_rows * (int(np.abs(scores).max()) + 1) + 1
+    quota_reward = pair_reward * (n_rows + 1)
+    first_role, first_department = 1 + n_rows, 1 + n_rows + n_cols
+    sink = first_department + n_departments
+    lower = np.minimum(lower, upper)
+    tails = np.concatenate(
+        [
+            np.zeros(n_rows, dtype=np.int64),
+            1 + edges.row_indices(),
+            first_role + np.arange(n_cols),
+            first_department + np.arange(n_departments),
+            first_department + np.arange(n_departments),
+        ]
+    )
+    heads = np.concatenate(
+        [
+            1 + np.arange(n_rows),
+            first_role + edges.cols,
+            first_department + np.asarray(departments, dtype=np.int64),
+            np.full(2 * n_departments, sink),
+        ]
+    )
+    capacities = np.concatenate(
+        [
+            np.ones(n_rows + edges.nnz + n_cols, dtype=np.int64),
+            lower,
+            np.subtract(upper, lower),
+        ]
+    )
+    costs = np.concatenate(
+        [
+            np.full(n_rows, -pair_reward),
+            -scores,
+            np.zeros(n_cols, dtype=np.int64),
+            np.full(n_departments, -quota_reward),
+            np.zeros(n_departments, dtype=np.int64),
+        ]
+    )
+    flow = min_cost_flow(sink + 1, tails, heads, capacities, costs, 0, sink)
+    used = np.flatnonzero(flow[n_rows : n_rows + edges.nnz])
+    rows = edges.row_indices()[used]
+    return sorted(zip(rows.tolist(), edges.cols[used].tolist()))
+
+
+def _augment_shortest_paths(
+    to: list[int],
+    room: list[int],
+    cost: list[int],
+    adjacency: list[list[int]],
+    potential: list[float],
+    source: int,
+    sink: int,
+) -> None:
+    """
+    Send flow along every path from `source` to `sink` on which each edge has room and a reduced cost of zero, which
+    are the shortest paths once the potentials have been updated. The search keeps its place in each node's edges
+    and forgets nodes that lead nowhere, so each edge is tried at most once per path found and once more overall.
+    """
+    next_edge = [0] * len(adjacency)
+    on_path = [False] * len(adjacency)
+    while True:
+        path: list[int] = []
+        node = source
+        on_path[source] = True
+        while node != sink:
+            edges = adjacency[node]
+            while next_edge[node] < len(edges):
+                edge = edges[next_edge[node]]
+                head = to[edge]
+                if (
+                    room[edge]
+                    and not on_path[head]
+                    and cost[edge] + potential[node] == potential[head]
+                ):
+                    break
+                next_edge[node] += 1
+            else:
+                if node == source:
+                    return
+                on_path[node] = False
+                edge = path.pop()
+                node = to[edge ^ 1]
+                next_edge[node] += 1
+                continue
+            path.append(edge)
+            node = head
+            on_path[node] = True
+        for node in [source] + [to[edge] for edge in path]:
+            on_path[node] = False
+        bottleneck = min(room[edge] for edge in path)
+        for edge in path:
+            room[edge] -= bottleneck
+            room[edge ^ 1] += bottleneck
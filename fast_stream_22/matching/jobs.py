@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Iterator, Optional, Sequence
+
+from fast_stream_22.matching.match import (
+    IterationOutcome,
+    MatchingInputs,
+    iterate_matching,
+)
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ("done", "cancelled", "failed")
+
+
+@dataclasses.dataclass(frozen=True)
+class Progress:
+    """
+    How far a job has got: its status, the iterations it has run and solved, the best outcomes so far and how quickly
+    it is getting through iterations
+    """
+
+    status: str
+    iterations: int
+    iterations_done: int = 0
+    iterations_solved: int = 0
+    best_iteration_by_score: Optional[int] = None
+    best_total_score: Optional[int] = None
+    best_iteration_by_success: Optional[int] = None
+    best_success_count: Optional[int] = None
+    seconds: float = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def iterations_per_second(self) -> float:
+        return self.iterations_done / self.seconds if self.seconds else 0.0
+
+    @property
+    def seconds_left(self) -> Optional[float]:
+        """
+        :return: roughly how long the iterations still to run will take, at the rate so far
+        """
+        rate = self.iterations_per_second
+        return (self.iterations - self.iterations_done) / rate if rate else None
+
+    def as_dict(self) -> dict:
+        return {
+            **dataclasses.asdict(self),
+            "iterations_per_second": self.iterations_per_second,
+        }
+
+    def describe(self) -> str:
+        """
+        :return: the progress as one line, for a terminal
+        """
+        line = (
+            f"{self.iterations_done}/{self.iterations} iterations,"
+            f" {self.iterations_solved} solved"
+        )
+        if self.best_total_score is not None:
+            line += (
+                f", best score {self.best_total_score}"
+                f" (iteration {self.best_iteration_by_score}),"
+                f" best success {self.best_success_count}"
+                f" (iteration {self.best_iteration_by_success})"
+            )
+        line += f", {self.iterations_per_second:.2f} iterations/s"
+        if not self.finished and self.seconds_left is not None:
+            line += f", about {self.seconds_left:.0f}s left"
+        return line
+
+
+@dataclasses.dataclass(frozen=True)
+class JobEvent:
+    """
+    Something that happened to a job: an iteration finishing, in which case `iteration` is its index and `outcome`
+    is None if it couldn't be solved, or a change of status
+    """
+
+    progress: Progress
+    iteration: Optional[int] = None
+    outcome: Optional[IterationOutcome] = None
+
+    @property
+    def name(self) -> str:
+        return "iteration" if self.iteration is not None else self.progress.status
+
+    def as_dict(self) -> dict:
+        data = self.progress.as_dict()
+        if self.iteration is not None:
+            data["iteration"] = {
+                "index": self.iteration,
+                "solved": self.outcome is not None,
+                "total_score": self.outcome.total_score if self.outcome else None,
+                "success_count": self.outcome.success_count if self.outcome else None,
+            }
+        return data
+
+
+class MatchingJob:
+    """
+    A run of matching that goes on in the background. Everyone following the job with `events` hears about each
+    iteration's outcome as it finishes, along with the progress so far. Only the best outcomes by score and by
+    success are kept, unless the job is asked to keep them all. Cancelling the job stops it once the iteration it is
+    running has finished.
+    """
+
+    def __init__(
+        self,
+        prepare: Callable[[], MatchingInputs],
+        iterations: Sequence[int],
+        master_seed: int,
+        workers: int = 1,
+        keep_outcomes: bool = False,
+    ):
+        """
+        :param prepare: makes the inputs to each iteration. It is called when the job starts, so reading and scoring
+            them happens in the background too
+        :param iterations: the indices of the iterations to run
+        :param master_seed: the seed from which each iteration's seed is derived
+        :param workers: the number of worker processes to run iterations in
+        :param keep_outcomes: keep every solved iteration's outcome in `outcomes`, rather than only the best ones
+        """
+        self.prepare = prepare
+        self.iterations = iterations
+        self.master_seed = master_seed
+        self.workers = workers
+        self.keep_outcomes = keep_outcomes
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.outcomes: dict[int, IterationOutcome] = {}
+        self.iterations_done = 0
+        self.iterations_solved = 0
+        self.best_by_score: Optional[IterationOutcome] = None
+        self.best_by_success: Optional[IterationOutcome] = None
+        self.finished: Optional[datetime.datetime] = None
+        self._started: Optional[float] = None
+        self._stopped: Optional[float] = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._followers: list[queue.SimpleQueue] = []
+
+    def start(self) -> MatchingJob:
+        """
+        Run the job on a thread of its own
+        """
+        threading.Thread(target=self.run, name="matching-job", daemon=True).start()
+        return self
+
+    def cancel(self) -> None:
+        """
+        Stop the job after the iteration it is running, or stop it from starting
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(self) -> None:
+        """
+        Run the job on this thread
+        """
+        if self.cancelled:
+            self._finish("cancelled")
+            return
+        self._set_status("running")
+        try:
+            inputs = self.prepare()
+            self._started = time.monotonic()
+            run = iterate_matching(
+                inputs, self.iterations, self.master_seed, self.workers, chunksize=1
+            )
+            try:
+                for i, outcome in run:
+                    self._record(i, outcome)
+                    if self.cancelled:
+                        break
+            finally:
+                run.close()
+        except Exception as error:
+            logger.exception("Matching job failed")
+            self.error = repr(error)
+            self._finish("failed")
+            return
+        finished_early = self.iterations_done < len(self.iterations)
+        self._finish("cancelled" if self.cancelled and finished_early else "done")
+
+    def progress(self) -> Progress:
+        with self._lock:
+            return self._progress()
+
+    def events(self, heartbeat: Optional[float] = None) -> Iterator[Optional[JobEvent]]:
+        """
+        Follow the job. The first event is the progress so far, and the last is the job finishing. The job is followed
+        from when this is called, not from the first `next`, so subscribe before starting the job to hear about every
+        iteration
+
+        :param heartbeat: if given, yield None whenever this many seconds pass without an event
+        :return: an iterator of the job's events, as they happen
+        """
+        follower: queue.SimpleQueue = queue.SimpleQueue()
+        with self._lock:
+            current = JobEvent(self._progress())
+            if not current.progress.finished:
+                self._followers.append(follower)
+        return self._follow(follower, current, heartbeat)
+
+    def _follow(
+        self,
+        follower: queue.SimpleQueue,
+        current: JobEvent,
+        heartbeat: Optional[float],
+    ) -> Iterator[Optional[JobEvent]]:
+        yield current
+        if current.progress.finished:
+            return
+        try:
+            while True:
+                try:
+                    event = follower.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield None
+                    continue
+                yield event
+                if event.progress.finished:
+                    return
+        finally:
+            with self._lock:
+                if follower in self._followers:
+                    self._followers.remove(follower)
+
+    def wait(self, timeout: Optional[float] = None) -> Progress:
+        """
+        :param timeout: the most seconds to wait for the job to finish
+        :return: the job's progress once it has finished, or once the timeout has passed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for event in self.events(heartbeat=timeout):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if event is not None and event.progress.finished:
+                break
+        return self.progress()
+
+    def _progress(self) -> Progress:
+        by_score, by_success = self.best_by_score, self.best_by_success
+        if self._started is None:
+            seconds = 0.0
+        else:
+            seconds = (self._stopped or time.monotonic()) - self._started
+        return Progress(
+            status=self.status,
+            iterations=len(self.iterations),
+            iterations_done=self.iterations_done,
+            iterations_solved=self.iterations_solved,
+            best_iteration_by_score=by_score.iteration if by_score else None,
+            best_total_score=by_score.total_score if by_score else None,
+            best_iteration_by_success=by_success.iteration if by_success else None,
+            best_success_count=by_success.success_count if by_success else None,
+            seconds=seconds,
+        )
+
+    def _record(self, iteration: int, outcome: Optional[IterationOutcome]) -> None:
+        with self._lock:
+            self.iterations_done += 1
+            if outcome is not None:
+                self.iterations_solved += 1
+                if self.keep_outcomes:
+                    self.outcomes[iteration] = outcome
+                if (
+                    self.best_by_score is None
+                    or outcome.total_score > self.best_by_score.total_score
+                ):
+                    self.best_by_score = outcome
+                if (
+                    self.best_by_success is None
+                    or outcome.success_count > self.best_by_success.success_count
+                ):
+                    self.best_by_success = outcome
+            self._publish(JobEvent(self._progress(), iteration, outcome))
+
+    def _set_status(self, status: str) -> None:
+        with self._lock:
+            self.status = status
+            self._publish(JobEvent(self._progress()))
+
+    def _finish(self, status: str) -> None:
+        with self._lock:
+            self._stopped = time.monotonic()
+            self.finished = datetime.datetime.now(datetime.timezone.utc)
+            self.status = status
+            self._publish(JobEvent(self._progress()))
+            self._followers.clear()
+        logger.info(f"Matching job {status} after {self.iterations_done} iterations")
+
+    def _publish(self, event: JobEvent) -> None:
+        for follower in self._followers:
+            follower.put(event)
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+import copy
 import csv
 import dataclasses
 import datetime
+import heapq
 import logging
 import random
-import sys
+import time
 from collections import defaultdict
-from copy import deepcopy
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from functools import partial
 from typing import (
     Sequence,
@@ -17,16 +19,33 @@ from typing import (
     Type,
     Iterable,
     MutableSequence,
+    Iterator,
+    Generator,
 )
 
-from munkres import DISALLOWED, make_cost_matrix, Munkres, UnsolvableMatrix
+from munkres import UnsolvableMatrix
 
-from fast_stream_22.specialism.generalist import GeneralistPair
-from fast_stream_22.specialism.models import Candidate, Role, BaseClass, Cohort
-from fast_stream_22.specialism.pair import Pair, P
+from fast_stream_22.matching.columns import CandidateRecord, RoleRecord, Row
+from fast_stream_22.matching.edges import EdgeGrid
+from fast_stream_22.matching.flow import assign_with_quotas
+from fast_stream_22.matching.metrics import Metrics, NULL_METRICS
+from fast_stream_22.matching.scoring import (
+    columnar_scorer_for,
+    ScoreCache,
+    score_objects,
+)
+from fast_stream_22.matching.solvers import (
+    Assignment,
+    Solver,
+    MunkresSolver,
+    get_solver,
+)
+from fast_stream_22.specialism.generalist import GeneralistPair, TracedGeneralistPair
+from fast_stream_22.specialism.models import BaseClass, Cohort
+from fast_stream_22.specialism.pair import Pair, P, BasePair, TracedPair
 import numpy as np
 
-from fast_stream_22.matching.read_in import read_candidates, read_roles
+from fast_stream_22.matching.snapshot import load_inputs
 
 logger = logging.getLogger(__name__)
 
@@ -60,26 +79,113 @@ class OutOfRolesException(Exception):
     pass
 
 
+def make_rng(rng: Union[random.Random, int, None]) -> random.Random:
+    """
+    :param rng: a random number generator, a seed, or None for a generator seeded from the operating system
+    :return: a random number generator
+    """
+    if isinstance(rng, random.Random):
+        return rng
+    return random.Random(rng)
+
+
+@dataclasses.dataclass
+class IterationState:
+    """
+    Everything that changes as an iteration matches candidates: which candidates and roles have been paired, which
+    roles have been rejected for the current cohort, and how many candidates each bid has been given. The candidates,
+    roles and bids themselves are never changed, so they can be shared between iterations without being copied.
+    """
+
+    candidate_paired: np.ndarray
+    role_paired: np.ndarray
+    role_rejected: np.ndarray
+    bid_counts: np.ndarray
+
+    @classmethod
+    def empty(cls, candidates: int, roles: int, bids: int) -> IterationState:
+        return cls(
+            np.zeros(candidates, dtype=bool),
+            np.zeros(roles, dtype=bool),
+            np.zeros(roles, dtype=bool),
+            np.zeros(bids, dtype=np.int64),
+        )
+
+    def reset(self) -> None:
+        """
+        Make the state ready for a new iteration
+        """
+        self.candidate_paired.fill(False)
+        self.role_paired.fill(False)
+        self.role_rejected.fill(False)
+        self.bid_counts.fill(0)
+
+
 class Process:
+    shuffles = True
+
     def __init__(
         self,
-        all_candidates: MutableSequence[Candidate],
-        all_roles: MutableSequence[Role],
+        all_candidates: Sequence[CandidateRecord],
+        all_roles: Sequence[RoleRecord],
         bids: Sequence[Bid],
         senior_to_junior: bool = False,
-        pair_type: Type[P] = Pair,  # type: ignore
+        pair_type: Type[BasePair] = Pair,
+        solver: Optional[Solver] = None,
+        rng: Union[random.Random, int, None] = None,
+        state: Optional[IterationState] = None,
+        cache: Optional[ScoreCache] = None,
+        incremental: bool = False,
+        cohort_workers: Optional[int] = None,
+        metrics: Metrics = NULL_METRICS,
     ):
+        """
+        :param all_candidates: every candidate to be matched
+        :param all_roles: every role on offer
+        :param bids: the departments' bids for each cohort
+        :param senior_to_junior: whether to match the most senior cohort first
+        :param pair_type: the class of `Pair` that defines the scoring rules
+        :param solver: the assignment solver to use. Defaults to `MunkresSolver`
+        :param rng: a random number generator, or a seed for one, used to shuffle each round of matching
+        :param state: the state to record matches in. Defaults to a fresh `IterationState`
+        :param cache: scores for every candidate against every role. Without one, each round is scored as it is
+            prepared
+        :param incremental: whether to carry each cohort's grid from round to round, rather than shuffling and
+            scoring it afresh after every rejection and every round
+        :param cohort_workers: if given, split the cohorts into groups that compete for none of the same roles, and
+            match the groups at the same time on this many threads. Each group is shuffled with its own random
+            number generator, so the result doesn't depend on the number of threads, but does differ from matching
+            every cohort in turn. Threads only help where the solver `releases_gil`; with any other solver the
+            groups are matched one after another on this thread
+        :param metrics: where to record the time spent in each stage and counts of rounds and failures
+        """
         self._all_candidates = all_candidates
-        self.candidate_mapping: dict[str, Candidate] = {
+        self.candidate_mapping: dict[str, CandidateRecord] = {
             c.uid: c for c in all_candidates
         }
+        self.candidate_index = {c.uid: i for i, c in enumerate(all_candidates)}
         self._all_roles = all_roles
-        self.all_roles_mapping: dict[str, Role] = {r.uid: r for r in all_roles}
+        self.all_roles_mapping: dict[str, RoleRecord] = {r.uid: r for r in all_roles}
+        self.role_index = {r.uid: i for i, r in enumerate(all_roles)}
+        self._role_priority_order = sorted(
+            range(len(all_roles)),
+            key=lambda i: all_roles[i].priority_role,
+            reverse=True,
+        )
         self.bids = bids
+        self.state = state or IterationState.empty(
+            len(all_candidates), len(all_roles), len(bids)
+        )
         self.pairings: dict[Cohort, list[Result]] = defaultdict(list)
         self.max_rounds = 5
         self.senior_to_junior = senior_to_junior
         self.specialism = pair_type
+        self.solver = solver or MunkresSolver()
+        self.rng = make_rng(rng)
+        self.cache = cache
+        self.incremental = incremental
+        self.cohort_workers = cohort_workers
+        self.metrics = metrics
 
     def _compute_cohort(self, cohort: Cohort):
         if self.match_cohort(cohort):
@@ -97,15 +203,104 @@ class Process:
 
         :return:
         """
-        cohorts = sorted(
-            set((bid.cohort for bid in self.bids)), reverse=self.senior_to_junior
+        if self.cohort_workers is None:
+            for cohort in self.cohort_order():
+                self._compute_cohort(cohort)
+        else:
+            self._compute_groups(self.cohort_groups())
+        self.print_bids()
+
+    def _role_pool(self, cohort: Cohort) -> set[int]:
+        """
+        :param cohort: a cohort
+        :return: the positions in `all_roles` of the roles the cohort could be offered: those suitable for it, from
+            departments with an unfilled bid for it
+        """
+        cohort_bids = self._cohort_bids(cohort)
+        return {
+            i
+            for i, role in enumerate(self._all_roles)
+            if cohort in role.suitable_year_groups and role.department in cohort_bids
+        }
+
+    def cohort_groups(self) -> list[list[Cohort]]:
+        """
+        Group together cohorts that could be offered any of the same roles, directly or through other cohorts.
+        Cohorts in different groups can be matched independently
+
+        :return: the groups, each in the order its cohorts are matched, ordered by their first cohort
+        """
+        groups: list[tuple[list[Cohort], set[int]]] = []
+        for cohort in self.cohort_order():
+            cohorts, pool = [cohort], self._role_pool(cohort)
+            for group in [g for g in groups if g[1] & pool]:
+                groups.remove(group)
+                cohorts = group[0] + cohorts
+                pool |= group[1]
+            groups.append((cohorts, pool))
+        order = {cohort: i for i, cohort in enumerate(self.cohort_order())}
+        return sorted(
+            (sorted(cohorts, key=order.__getitem__) for cohorts, _ in groups),
+            key=lambda cohorts: order[cohorts[0]],
         )
+
+    def _compute_group(self, cohorts: list[Cohort], seed: int) -> Process:
+        """
+        :param cohorts: a group of cohorts that compete for none of the roles of cohorts outside it
+        :param seed: the seed for the group's random number generator
+        :return: a copy of this process, sharing its candidates, roles and bids, that has matched the group
+        """
+        process = copy.copy(self)
+        process.state = IterationState.empty(
+            len(self._all_candidates), len(self._all_roles), len(self.bids)
+        )
+        process.pairings = defaultdict(list)
+        process.rng = make_rng(seed)
+        process.metrics = self.metrics.spawn()
         for cohort in cohorts:
-            self._compute_cohort(cohort)
+            process._compute_cohort(cohort)
+        return process
+
+    def _compute_groups(self, groups: list[list[Cohort]]) -> None:
+        """
+        Match the groups of cohorts, then merge what each group paired into this process's state, in group order.
+        The groups are matched on a pool of threads if the solver releases the GIL. Scoring and the pure-Python
+        solvers hold it, so for them threads only add overhead, and the groups are matched in turn
+
+        :param groups: groups of cohorts, as returned by `cohort_groups`
+        """
+        seeds = [self.rng.randrange(2**32) for _ in groups]
+        if self.solver.releases_gil:
+            with ThreadPoolExecutor(self.cohort_workers) as pool:
+                matched = list(pool.map(self._compute_group, groups, seeds))
+        else:
+            matched = list(map(self._compute_group, groups, seeds))
+        pairings: dict[Cohort, list[Result]] = {}
+        for cohorts, process in zip(groups, matched):
+            self.state.candidate_paired |= process.state.candidate_paired
+            self.state.role_paired |= process.state.role_paired
+            self.state.bid_counts += process.state.bid_counts
+            self.metrics.merge(process.metrics.as_dict())
+            pairings.update((cohort, process.pairings[cohort]) for cohort in cohorts)
+        for cohort in self.cohort_order():
+            self.pairings[cohort].extend(pairings[cohort])
+
+    def cohort_order(self) -> list[Cohort]:
+        """
+        :return: the cohorts that have bids, most senior first if `senior_to_junior` is set
+        """
+        return sorted(
+            set((bid.cohort for bid in self.bids)), reverse=self.senior_to_junior
+        )
+
+    def print_bids(self):
+        """
+        Print each department's bids against the number of candidates it has been given
+        """
         total_bids = 0
         total_count = 0
         dept_bids_mapping = defaultdict(list)
-        for bid in self.bids:
+        for bid in self.counted_bids():
             dept_bids_mapping[bid.department].append(bid)
             total_bids += bid.number
         all_min_bids = 0
@@ -122,52 +317,70 @@ class Process:
             " candidates"
         )
 
+    def counted_bids(self) -> list[Bid]:
+        """
+        :return: a copy of each bid, with its count set to the number of candidates it has been given
+        """
+        return [
+            dataclasses.replace(bid, count=int(count))
+            for bid, count in zip(self.bids, self.state.bid_counts)
+        ]
+
     def reset_roles(self):
         """
         Mark all roles as matchable
 
         :return:
         """
-        for r in self._all_roles:
-            r.no_match = False
+        self.state.role_rejected.fill(False)
         logger.info("Roles reset")
 
     @property
-    def all_candidates(self) -> list[Candidate]:
+    def all_candidates(self) -> list[CandidateRecord]:
         """
         Get all candidates that haven't been paired
 
         :return: a list of unpaired candidates
         """
-        return self.mask_paired(self._all_candidates)
+        return self.mask_paired(self._all_candidates, self.state.candidate_paired)
 
     @property
-    def all_roles(self) -> list[Role]:
+    def all_roles(self) -> list[RoleRecord]:
         """
-        Get all the roles that haven't been paired and haven't been marked as 'rejected'
+        Get all the roles that haven't been paired and haven't been marked as 'rejected', highest priority first
 
         :return: a list of unpaired, unrejected roles
         """
-        return sorted(
-            self.mask_paired([r for r in self._all_roles if not r.no_match]),
-            key=lambda role: role.priority_role,
-            reverse=True,
-        )
+        unavailable = self.state.role_paired | self.state.role_rejected
+        return [
+            self._all_roles[i] for i in self._role_priority_order if not unavailable[i]
+        ]
+
+    def score(self, candidate_id: str, role: RoleRecord) -> int:
+        if self.cache:
+            return self.cache.score(candidate_id, role.uid)
+        return self.specialism(self.candidate_mapping[candidate_id], role).score_pair()
+
+    def _is_paired(self, candidate: CandidateRecord) -> bool:
+        return self.state.candidate_paired[self.candidate_index[candidate.uid]]
 
-    Pairable = TypeVar("Pairable", bound=BaseClass)
+    Pairable = TypeVar("Pairable", bound=Union[BaseClass, Row])
 
     @staticmethod
-    def mask_paired(data: Sequence[Pairable]) -> list[Pairable]:
+    def mask_paired(data: Sequence[Pairable], paired: np.ndarray) -> list[Pairable]:
         """
         Hide the data that's already been paired
 
         :param data: a sequence of Pairable objects
+        :param paired: a boolean array, which is True where the matching Pairable has been paired
         :return: a list of Pairable objects that haven't yet been paired
         """
-        return [data_point for data_point in data if not data_point.paired]
+        return [data[i] for i in np.flatnonzero(~paired).tolist()]
 
     def pair_off(
-        self, candidates: MutableSequence[Candidate], roles: MutableSequence[Role]
+        self,
+        candidates: MutableSequence[CandidateRecord],
+        roles: MutableSequence[RoleRecord],
     ) -> list[tuple[str, str]]:
         """
         Create a round of Matching, compute it, and return the pairs
@@ -176,18 +389,58 @@ class Process:
         :param roles: the potential set of roles
         :return: a list of paired candidate/role
         """
-        return Matching(candidates, roles, self.specialism).report_pairs()
+        return Matching(
+            candidates,
+            roles,
+            self.specialism,
+            solver=self.solver,
+            rng=self.rng,
+            cache=self.cache,
+            metrics=self.metrics,
+        ).report_pairs()
 
-    def _cohort_bids(self, cohort: Cohort) -> dict[str, Bid]:
+    def _cohort_bids(self, cohort: Cohort) -> dict[str, int]:
+        """
+        :param cohort: the cohort being matched
+        :return: a mapping of department to the position in `self.bids` of its unfilled bid for this cohort
+        """
         return {
-            bid.department: bid
-            for bid in self.bids
-            if bid.cohort == cohort and bid.count < bid.number
+            bid.department: i
+            for i, bid in enumerate(self.bids)
+            if bid.cohort == cohort and self.state.bid_counts[i] < bid.number
         }
 
+    def _record_pairs(
+        self,
+        cohort: Cohort,
+        cohort_bids: dict[str, int],
+        pairs: Sequence[tuple[str, str]],
+    ) -> None:
+        """
+        Mark the candidates and roles as paired, count each pair against its department's bid, and add the pairs to
+        the cohort's pairings
+
+        :param cohort: the cohort being matched
+        :param cohort_bids: the cohort's unfilled bids, as returned by `_cohort_bids`
+        :param pairs: a list of (candidate uid, role uid) tuples
+        :raises ValueError: if a department is given more candidates than it bid for
+        """
+        counts = self.state.bid_counts
+        pair_scores: list[Result] = []
+        for candidate_id, role_id in pairs:
+            self.state.candidate_paired[self.candidate_index[candidate_id]] = True
+            role = self.all_roles_mapping[role_id]
+            self.state.role_paired[self.role_index[role_id]] = True
+            bid = cohort_bids[role.department]
+            counts[bid] += 1
+            if counts[bid] > self.bids[bid].number:
+                raise ValueError
+            pair_scores.append((candidate_id, role_id, self.score(candidate_id, role)))
+        self.pairings[cohort].extend(pair_scores)
+
     def _prepare_round(
         self, cohort: Cohort, round_number: int
-    ) -> tuple[list[Candidate], list[Role]]:
+    ) -> tuple[list[CandidateRecord], list[RoleRecord]]:
         """
         Prepare the inputs for a round of matching. If this is the zeroth round, limit roles to be put forward to 80% of
         a department's total bid. After that, put forward (bids - awarded) bids from each department
@@ -202,13 +455,12 @@ class Process:
             role for role in self.all_roles if cohort in role.suitable_year_groups
         ]
         shortlisted_roles = []
-        for bid in sorted(
-            cohort_bids.values(), key=lambda bid: bid.number, reverse=False
-        ):
+        for i in sorted(cohort_bids.values(), key=lambda i: self.bids[i].number):
+            bid = self.bids[i]
             if round_number == 0:
                 shortlist_length = bid.min_number
             else:
-                shortlist_length = bid.number - bid.count
+                shortlist_length = bid.number - self.state.bid_counts[i]
             departmental_roles = [
                 role for role in suitable_roles if role.department == bid.department
             ][:shortlist_length]
@@ -220,8 +472,37 @@ class Process:
             shortlisted_roles.extend(departmental_roles)
         return candidates, shortlisted_roles
 
+    def _round_matching(
+        self,
+        candidates: MutableSequence[CandidateRecord],
+        roles: MutableSequence[RoleRecord],
+        previous: Optional[Matching],
+    ) -> Matching:
+        """
+        :param candidates: the round's candidates
+        :param roles: the round's shortlisted roles
+        :param previous: the cohort's last Matching, if there has been one
+        :return: a Matching for this round. In incremental mode, this is `previous`, updated for the new round
+        """
+        if self.incremental and previous is not None:
+            previous.update(candidates, roles)
+            return previous
+        return Matching(
+            candidates,
+            roles,
+            self.specialism,
+            solver=self.solver,
+            rng=self.rng,
+            cache=self.cache,
+            metrics=self.metrics,
+        )
+
     def match_cohort(
-        self, cohort: Cohort, round_number: int = 0, failures: int = 0
+        self,
+        cohort: Cohort,
+        round_number: int = 0,
+        failures: int = 0,
+        previous: Optional[Matching] = None,
     ) -> bool:
         """
         This method takes a cohort and tries to match the candidates to potential roles. Where matches are made, bids
@@ -230,15 +511,18 @@ class Process:
         :param cohort: the year group we're matching
         :param round_number: the number of times we've tried this
         :param failures: the number of failures from this cohort
+        :param previous: the Matching from the cohort's last attempt, to be updated in incremental mode
         :return: a boolean signifying if we were successful
         """
         cohort_bids = self._cohort_bids(cohort)
+        counts = self.state.bid_counts
         if failures > 20:
             raise Exception("Too many failures")
         if round_number >= self.max_rounds:
             logger.info("Too many rounds!")
+            self.metrics.count("round_limits")
             return all(
-                map(lambda bid: bid.count >= bid.min_number, cohort_bids.values())
+                counts[i] >= self.bids[i].min_number for i in cohort_bids.values()
             )
         candidates, shortlisted_roles = self._prepare_round(cohort, round_number)
         if not shortlisted_roles:
@@ -248,84 +532,319 @@ class Process:
                 f"Cohort {cohort.name} round {round_number}: More candidates"
                 f" ({len(candidates)}) than roles ({len(shortlisted_roles)})"
             )
-        this_round = Matching(candidates, shortlisted_roles, self.specialism)
+        if not failures:
+            self.metrics.count("rounds")
+        this_round = self._round_matching(candidates, shortlisted_roles, previous)
         if rejects := this_round.reject_impossible_roles():
+            self.metrics.count("failures")
+            self.metrics.count("rejected_roles", len(rejects))
+            self.state.role_rejected[[self.role_index[r.uid] for r in rejects]] = True
             logger.info(f"Attempt #{failures}: Failed to find enough roles")
             logger.info(f"Rejected following roles: {','.join(map(str, rejects))}")
-            return self.match_cohort(cohort, round_number, failures + 1)
-        pairs = self.pair_off(candidates, shortlisted_roles)
-        pair_scores: list[Result] = []
-        for candidate_id, role_id in pairs:
-            self.candidate_mapping[candidate_id].mark_paired()
-            role = self.all_roles_mapping[role_id]
-            role.mark_paired()
-            cohort_bids[role.department].count += 1
-            if cohort_bids[role.department].count > cohort_bids[role.department].number:
-                raise ValueError
-            pair_scores.append(
-                (
-                    candidate_id,
-                    role_id,
-                    self.specialism(
-                        self.candidate_mapping[candidate_id], role
-                    ).score_pair(),
-                )
-            )
-
-        self.pairings[cohort].extend(pair_scores)
+            return self.match_cohort(cohort, round_number, failures + 1, this_round)
+        pairs = this_round.report_pairs()
+        self._record_pairs(cohort, cohort_bids, pairs)
         if len(pairs) == len(candidates):
             return True
         else:
             logger.info(
                 f"Round {round_number} incomplete. {len(candidates) - len(pairs)} still"
-                f" to pair ({[c for c in candidates if not c.paired]}"
+                f" to pair ({[c for c in candidates if not self._is_paired(c)]}"
             )
-            return self.match_cohort(cohort, round_number + 1)
+            return self.match_cohort(cohort, round_number + 1, previous=this_round)
+
+
+class FlowProcess(Process):
+    """
+    Matches each cohort in a single solve, rather than in rounds. The departments' bids become capacities in a
+    min-cost flow: each department can take up to `number` candidates, and its first `min_number` are rewarded so
+    heavily that they are filled wherever they can be. Of the matchings that fill the most of those, the flow pairs
+    as many candidates as it can, and of those it finds the highest total score. Nothing is shuffled, so every
+    iteration gives the same result, and candidates no role can take are left unpaired rather than failing the
+    iteration.
+    """
+
+    shuffles = False
+
+    def _flow_inputs(self, cohort: Cohort) -> CohortFlow:
+        """
+        :param cohort: the year group we're matching
+        :return: the cohort's unpaired candidates, the unpaired roles it can take, and their allowed pairings
+        """
+        cohort_bids = self._cohort_bids(cohort)
+        candidates = [c for c in self.all_candidates if c.year_group == cohort]
+        roles = [
+            role
+            for role in self.all_roles
+            if cohort in role.suitable_year_groups and role.department in cohort_bids
+        ]
+        with self.metrics.time("score"):
+            if not candidates or not roles:
+                edges = EdgeGrid.from_dense(
+                    np.zeros((len(candidates), len(roles)), dtype=np.int32),
+                    np.zeros((len(candidates), len(roles)), dtype=bool),
+                )
+            elif self.cache is not None:
+                edges = self.cache.grid(candidates, roles)
+            else:
+                edges = ScoreCache(candidates, roles, self.specialism).edges
+        self.metrics.grid(len(candidates), len(roles), edges.nnz)
+        return CohortFlow(cohort, cohort_bids, candidates, roles, edges)
+
+    def _solve_flow(
+        self, flow: CohortFlow, penalties: Optional[np.ndarray] = None
+    ) -> Assignment:
+        """
+        :param flow: the cohort's candidates, roles and allowed pairings
+        :param penalties: points to take off the score of every pairing with each role
+        :return: a list of (row, column) tuples
+        """
+        counts = self.state.bid_counts
+        edges = flow.edges
+        if penalties is not None:
+            edges = dataclasses.replace(
+                edges, scores=edges.scores - penalties[edges.cols]
+            )
+        departments = list(flow.cohort_bids)
+        position = {department: i for i, department in enumerate(departments)}
+        bids = [flow.cohort_bids[department] for department in departments]
+        with self.metrics.time("solve"):
+            return assign_with_quotas(
+                edges,
+                np.array(
+                    [position[role.department] for role in flow.roles], dtype=np.int64
+                ),
+                [max(0, self.bids[i].min_number - counts[i]) for i in bids],
+                [self.bids[i].number - counts[i] for i in bids],
+            )
+
+    def _record_flow(self, flow: CohortFlow, pairs: Assignment) -> bool:
+        """
+        :param flow: the cohort's candidates, roles and allowed pairings
+        :param pairs: the (row, column) tuples to record
+        :return: a boolean signifying if every candidate was paired and every bid got at least its `min_number`
+        """
+        self._record_pairs(
+            flow.cohort,
+            flow.cohort_bids,
+            [(flow.candidates[row].uid, flow.roles[col].uid) for row, col in pairs],
+        )
+        counts = self.state.bid_counts
+        return len(pairs) == len(flow.candidates) and all(
+            counts[i] >= self.bids[i].min_number for i in flow.cohort_bids.values()
+        )
+
+    def match_cohort(self, cohort: Cohort, *args, **kwargs) -> bool:
+        """
+        :param cohort: the year group we're matching
+        :return: a boolean signifying if every candidate was paired and every bid got at least its `min_number`
+        """
+        flow = self._flow_inputs(cohort)
+        return self._record_flow(flow, self._solve_flow(flow))
+
+
+class JointProcess(FlowProcess):
+    """
+    Matches every cohort at once, rather than each cohort taking what earlier cohorts left. Each cohort is a
+    min-cost flow over its own sparse grid, as in `FlowProcess`, and the cohorts are coupled only through roles whose
+    `suitable_year_groups` hold more than one of them. Each cohort is solved on its own, and every role claimed by
+    more than one cohort is given a price, which is taken off its score for every cohort, before those cohorts are
+    solved again in `senior_to_junior` order. A cohort is solved again only if one of its roles is still claimed by
+    another cohort, counting the claims that cohorts solved earlier in the round have just made or given up. A
+    role's price doubles each time it is contested, so the cohorts that can do nearly as well elsewhere move away
+    from it first; the prices are kept in `prices`, by role index. Once no role is contested, or after
+    `max_price_rounds`, each cohort is solved one last time without prices, in `senior_to_junior` order, leaving out
+    the roles that are claimed by one other cohort alone and the roles taken by earlier cohorts. A role still claimed
+    by several cohorts goes to the first.
+    """
+
+    max_price_rounds = 32
+
+    def compute(self):
+        flows = [self._flow_inputs(cohort) for cohort in self.cohort_order()]
+        columns = [
+            np.array([self.role_index[role.uid] for role in flow.roles], dtype=np.intp)
+            for flow in flows
+        ]
+        self.prices = np.zeros(len(self._all_roles), dtype=np.int64)
+        charges = np.ones(len(self._all_roles), dtype=np.int64)
+        claims = [self._solve_flow(flow) for flow in flows]
+        claimed = np.zeros(len(self._all_roles), dtype=np.int64)
+        for pairs, cols in zip(claims, columns):
+            np.add.at(claimed, cols[[col for _, col in pairs]], 1)
+        for price_round in range(self.max_price_rounds):
+            contested = np.flatnonzero(claimed > 1)
+            if not len(contested):
+                break
+            self.metrics.count("price_rounds")
+            logger.info(f"Price round {price_round}: {len(contested)} roles contested")
+            self.prices[contested] += charges[contested]
+            charges[contested] *= 2
+            for k, cols in enumerate(columns):
+                held = cols[[col for _, col in claims[k]]]
+                if not np.any(claimed[held] > 1):
+                    continue
+                np.subtract.at(claimed, held, 1)
+                claims[k] = self._solve_flow(flows[k], self.prices[cols])
+                np.add.at(claimed, cols[[col for _, col in claims[k]]], 1)
+        taken = np.zeros(len(self._all_roles), dtype=bool)
+        for flow, pairs, cols in zip(flows, claims, columns):
+            np.subtract.at(claimed, cols[[col for _, col in pairs]], 1)
+            kept = np.flatnonzero(~taken[cols] & (claimed[cols] != 1))
+            flow = dataclasses.replace(
+                flow,
+                roles=[flow.roles[j] for j in kept],
+                edges=flow.edges.take(np.arange(len(flow.candidates)), kept),
+            )
+            cols = cols[kept]
+            pairs = self._solve_flow(flow)
+            if self._record_flow(flow, pairs):
+                logger.info(f"Successfully matched cohort {flow.cohort.name}")
+            else:
+                logger.info(f"Cohort {flow.cohort.name} could not be perfectly matched")
+            for pair in self.pairings[flow.cohort]:
+                logger.info(f"{','.join(map(str, pair))}")
+            taken[[cols[col] for _, col in pairs]] = True
+        self.print_bids()
+
+
+@dataclasses.dataclass
+class CohortFlow:
+    """
+    A cohort's part of a flow: its unfilled bids, its unpaired candidates, the roles it can take, and the allowed
+    pairings between them
+    """
+
+    cohort: Cohort
+    cohort_bids: dict[str, int]
+    candidates: list[CandidateRecord]
+    roles: list[RoleRecord]
+    edges: EdgeGrid
+
+
+ENGINES: dict[str, Type[Process]] = {
+    "rounds": Process,
+    "flow": FlowProcess,
+    "joint": JointProcess,
+}
 
 
 class Matching:
     def __init__(
         self,
-        candidates: MutableSequence[Candidate],
-        roles: MutableSequence[Role],
+        candidates: MutableSequence[CandidateRecord],
+        roles: MutableSequence[RoleRecord],
         pair_type: Type[P],
+        vectorised: bool = True,
+        solver: Optional[Solver] = None,
+        rng: Union[random.Random, int, None] = None,
+        cache: Optional[ScoreCache] = None,
+        metrics: Metrics = NULL_METRICS,
     ):
+        """
+        Shuffle the candidates and roles, then score every pairing. With a `ScoreCache`, the grid is sliced from the
+        cache. Otherwise, where `pair_type` has a `ColumnarScorer`, the grid is scored in one go; if it hasn't, or if
+        `vectorised` is False, each pairing is scored by its own `Pair`. Only the allowed pairings are kept, in
+        `self.edges`
+
+        :param candidates: the candidates to be matched
+        :param roles: the roles to match them to
+        :param pair_type: the class of `Pair` that defines the scoring rules
+        :param vectorised: whether to use the columnar scoring engine where one is available
+        :param solver: the assignment solver to use. Defaults to `MunkresSolver`
+        :param rng: a random number generator, or a seed for one, used to shuffle the candidates and roles
+        :param cache: scores for every candidate against every role, from which to take this grid
+        :param metrics: where to record the time spent scoring, rejecting and solving, and the grid's size
+        """
         self.candidates = candidates
         self.roles = roles
-        random.shuffle(self.candidates)
-        random.shuffle(self.roles)
-        self.pairs = [
-            self.score_or_disqualify(pair_type(c, r)) for c in candidates for r in roles
-        ]
-        self.score_grid = np.reshape(self.pairs, (len(candidates), len(roles)))
+        self.pair_type = pair_type
+        self.vectorised = vectorised
+        self.cache = cache
+        self.solver = solver or MunkresSolver()
+        self.rng = make_rng(rng)
+        self.rng.shuffle(self.candidates)
+        self.rng.shuffle(self.roles)
+        self.metrics = metrics
+        with metrics.time("score"):
+            self.edges = self._score(candidates, roles)
+        metrics.grid(len(candidates), len(roles), self.edges.nnz)
+        self.duals: Optional[np.ndarray] = None
+
+    def _score(
+        self, candidates: Sequence[CandidateRecord], roles: Sequence[RoleRecord]
+    ) -> EdgeGrid:
+        if self.cache is not None:
+            return self.cache.grid(candidates, roles)
+        scorer = columnar_scorer_for(self.pair_type) if self.vectorised else None
+        scores, disqualified = (
+            score_objects(candidates, roles, self.pair_type)
+            if scorer is None
+            else scorer(candidates, roles).score()
+        )
+        return EdgeGrid.from_dense(scores, ~disqualified)
+
+    def update(
+        self, candidates: Sequence[CandidateRecord], roles: Sequence[RoleRecord]
+    ) -> None:
+        """
+        Fit the grid to a new round of the same cohort without scoring it again. Rows and columns that are no longer
+        in play are dropped, and roles that are new to the round are shuffled and added as columns, so only their
+        cells are scored. Column potentials from the last solve are kept for the columns that remain.
 
-    def reject_impossible_roles(self) -> list[Optional[Role]]:
+        :param candidates: the round's candidates, who must all be in the grid already
+        :param roles: the round's roles
+        """
+        rows = {c.uid for c in candidates}
+        if not rows <= {c.uid for c in self.candidates}:
+            raise ValueError("Candidates can only be removed from a Matching")
+        cols = {r.uid for r in roles}
+        kept_rows = [i for i, c in enumerate(self.candidates) if c.uid in rows]
+        kept_cols = [j for j, r in enumerate(self.roles) if r.uid in cols]
+        self.candidates = [self.candidates[i] for i in kept_rows]
+        self.roles = [self.roles[j] for j in kept_cols]
+        present = {r.uid for r in self.roles}
+        new_roles = [r for r in roles if r.uid not in present]
+        self.rng.shuffle(new_roles)
+        with self.metrics.time("score"):
+            added = self._score(self.candidates, new_roles)
+        self.metrics.grid(len(self.candidates), len(new_roles), added.nnz)
+        self.edges = self.edges.take(
+            np.asarray(kept_rows, dtype=np.intp), np.asarray(kept_cols, dtype=np.intp)
+        ).hstack(added)
+        self.roles.extend(new_roles)
+        if self.duals is not None:
+            self.duals = np.concatenate(
+                [self.duals[kept_cols], np.zeros(len(new_roles))]
+            )
+
+    def reject_impossible_roles(self) -> list[Optional[RoleRecord]]:
         """
         Identify and reject roles that no candidate can do
 
         :return: a list of rejected roles
         """
         rejects = []
-        for i, column in enumerate(self.score_grid.T):
-            if np.all(column == DISALLOWED):
+        with self.metrics.time("reject"):
+            for i in np.flatnonzero(self.edges.column_degrees() == 0).tolist():
                 rejects.append(self.roles[i])
-                self.roles[i].no_match = True
                 logger.info(f"No candidate could be found for role {self.roles[i]}")
         return rejects
 
-    @staticmethod
-    def score_or_disqualify(p: P) -> Union[DISALLOWED, int]:
-        p.score_pair()
-        if p.disqualified:
-            return DISALLOWED
-        else:
-            return p.score
+    def typed_grid(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :return: a tuple of the integer scores and a boolean grid that is False where a pairing is DISALLOWED
+        """
+        return self.edges.to_dense()
 
-    def match(self):
-        matrix = make_cost_matrix(
-            self.score_grid, lambda x: sys.maxsize - x if type(x) is int else x
-        )
-        return Munkres().compute(matrix)
+    def match(self) -> list[tuple[int, int]]:
+        with self.metrics.time("solve"):
+            if self.solver.warm_starts:
+                pairs, self.duals = self.solver.solve_from(
+                    *self.typed_grid(), self.duals
+                )
+                return pairs
+            return self.solver.solve_edges(self.edges)
 
     def report_pairs(self) -> list[tuple[str, str]]:
         """
@@ -336,16 +855,32 @@ class Matching:
             pairs = self.match()
             return [self.convert_pair(p) for p in pairs]
         except UnsolvableMatrix:
-            log_copy = self.score_grid.copy()
-            log_copy[log_copy == DISALLOWED] = "D"
-            np.savetxt(
-                f"{datetime.datetime.utcnow()}-log.csv",
-                log_copy,
-                delimiter=",",
-                fmt="%s",
-            )
+            self.dump_edges(f"{datetime.datetime.utcnow()}-log.csv")
             raise UnsolvableMatrix
 
+    def dump_edges(self, path: str) -> None:
+        """
+        Write every allowed pairing to a CSV, one row per pairing, for debugging a grid that can't be solved
+
+        :param path: the file to write to
+        """
+        candidates = np.array([c.uid for c in self.candidates], dtype=object)
+        roles = np.array([r.uid for r in self.roles], dtype=object)
+        np.savetxt(
+            path,
+            np.column_stack(
+                (
+                    candidates[self.edges.row_indices()],
+                    roles[self.edges.cols],
+                    self.edges.scores,
+                )
+            ),
+            delimiter=",",
+            fmt="%s",
+            header="candidate,role,score",
+            comments="",
+        )
+
     def convert_pair(self, pair: tuple[int, int]) -> tuple[str, str]:
         candidate, role = pair
         return self.candidates[candidate].uid, self.roles[role].uid
@@ -359,6 +894,8 @@ class IterationOutcome:
         cohort_outcomes: dict[Cohort, list[Result]],
         iteration: int,
         success_bound: float = 0.8,
+        seed: Optional[int] = None,
+        metrics: Optional[dict] = None,
     ):
         self.bids = bids
         self.outcomes = cohort_outcomes
@@ -368,6 +905,8 @@ class IterationOutcome:
         )
         self.success_count = 0
         self.iteration = iteration
+        self.seed = seed
+        self.metrics = metrics or {}
         self.count_success()
 
     def count_success(self):
@@ -379,15 +918,384 @@ class IterationOutcome:
                 pass
 
 
-def conduct_matching(
-    bid_file: str,
-    role_file: str,
-    candidate_file: str,
-    senior_first: bool,
-    specialism: str,
-    iterations: int,
-) -> dict[int, IterationOutcome]:
+@dataclasses.dataclass
+class MatchingInputs:
+    """
+    Everything an iteration needs, parsed once and shared between iterations
+    """
+
+    candidates: Sequence[CandidateRecord]
+    roles: Sequence[RoleRecord]
+    bids: list[Bid]
+    senior_first: bool
+    pair_type: Type[BasePair]
+    solver: Solver
+    cache: Optional[ScoreCache] = None
+    incremental: bool = False
+    engine: str = "rounds"
+    cohort_workers: Optional[int] = None
+    metrics: Optional[Metrics] = None
+
+    def new_state(self) -> IterationState:
+        return IterationState.empty(
+            len(self.candidates), len(self.roles), len(self.bids)
+        )
+
+
+def new_master_seed() -> int:
+    """
+    :return: a fresh master seed, to be reported so that the run can be reproduced
+    """
+    return random.SystemRandom().randrange(2**32)
+
+
+def iteration_seed(master_seed: int, iteration: int) -> int:
+    """
+    Derive the seed for one iteration, so that each iteration's shuffles depend only on the master seed and its
+    own index
+
+    :param master_seed: the seed for the whole run
+    :param iteration: the index of the iteration
+    :return: an integer seed
+    """
+    return int(np.random.SeedSequence([master_seed, iteration]).generate_state(1)[0])
+
+
+def run_iteration(
+    inputs: MatchingInputs,
+    iteration: int,
+    seed: int,
+    state: Optional[IterationState] = None,
+) -> Optional[IterationOutcome]:
+    """
+    Run one full iteration of matching. The inputs are shared, not copied: everything the iteration changes is kept
+    in `state`, which is reset first. If the inputs have `metrics`, the iteration records its own, which are given
+    as the outcome's `metrics`
+
+    :param inputs: the parsed candidates, roles and bids, and the engine to match them with
+    :param iteration: the index of this iteration
+    :param seed: the seed for this iteration's random number generator
+    :param state: a state to reuse. Defaults to a fresh one
+    :return: the outcome, or None if the iteration could not be solved
+    """
+    return _measured_iteration(inputs, iteration, seed, state)[0]
+
+
+def _measured_iteration(
+    inputs: MatchingInputs,
+    iteration: int,
+    seed: int,
+    state: Optional[IterationState] = None,
+) -> tuple[Optional[IterationOutcome], dict]:
+    """
+    Run an iteration as `run_iteration` does
+
+    :return: a tuple of the outcome, or None, and the iteration's metrics, which are empty unless the inputs have
+        `metrics`. They are returned even if the iteration could not be solved
+    """
+    metrics = NULL_METRICS if inputs.metrics is None else Metrics()
+    metrics.count("iterations")
+    state = state or inputs.new_state()
+    with metrics.time("reset"):
+        state.reset()
+    try:
+        process_obj = ENGINES[inputs.engine](
+            inputs.candidates,
+            inputs.roles,
+            inputs.bids,
+            inputs.senior_first,
+            pair_type=inputs.pair_type,
+            solver=inputs.solver,
+            rng=seed,
+            state=state,
+            cache=inputs.cache,
+            incremental=inputs.incremental,
+            cohort_workers=inputs.cohort_workers,
+            metrics=metrics,
+        )
+        with metrics.time("iteration"):
+            process_obj.compute()
+        return (
+            IterationOutcome(
+                process_obj.counted_bids(),
+                process_obj.pairings,
+                iteration,
+                seed=seed,
+                metrics=metrics.as_dict(),
+            ),
+            metrics.as_dict(),
+        )
+    except (UnsolvableMatrix, OutOfRolesException) as error:
+        logger.warning(f"Iteration #{iteration} is unsolvable")
+        metrics.count(
+            "out_of_roles"
+            if isinstance(error, OutOfRolesException)
+            else "unsolvable_matrices"
+        )
+        return None, metrics.as_dict()
+
+
+_worker_inputs: Optional[MatchingInputs] = None
+_worker_state: Optional[IterationState] = None
+
+
+def _initialise_worker(inputs: MatchingInputs) -> None:
+    global _worker_inputs, _worker_state
+    _worker_inputs = inputs
+    _worker_state = inputs.new_state()
+
+
+def _run_worker_iteration(
+    task: tuple[int, int]
+) -> tuple[Optional[IterationOutcome], dict]:
+    return _measured_iteration(_worker_inputs, *task, state=_worker_state)
+
+
+def iterate_matching(
+    inputs: MatchingInputs,
+    iterations: Sequence[int],
+    master_seed: int,
+    workers: int = 1,
+    chunksize: Optional[int] = None,
+) -> Generator[tuple[int, Optional[IterationOutcome]], None, None]:
+    """
+    Run the iterations, in order, either in this process or across a pool of worker processes. Each worker is sent
+    the inputs once, when it starts, and is then sent only the index and seed of each iteration.
+
+    :param inputs: the parsed candidates, roles and bids
+    :param iterations: the indices of the iterations to run
+    :param master_seed: the seed from which each iteration's seed is derived
+    :param workers: the number of worker processes. 1 runs every iteration in this process
+    :param chunksize: the number of iterations to send to a worker at a time. Defaults to a quarter of each
+        worker's share. If the iterator is closed early, iterations that haven't been started are cancelled
+    :return: an iterator of (iteration, outcome) tuples, where outcome is None for unsolvable iterations. The
+        metrics of every iteration, solved or not, are merged into the inputs' `metrics`, if they have them
+    """
+    tasks = [(i, iteration_seed(master_seed, i)) for i in iterations]
+    run_metrics = inputs.metrics or NULL_METRICS
+    if workers <= 1:
+        state = inputs.new_state()
+        for task in tasks:
+            outcome, metrics = _measured_iteration(inputs, *task, state=state)
+            run_metrics.merge(metrics)
+            yield task[0], outcome
+        return
+    chunksize = chunksize or max(1, len(tasks) // (workers * 4))
+    pool = ProcessPoolExecutor(
+        workers, initializer=_initialise_worker, initargs=(inputs,)
+    )
+    try:
+        for i, (outcome, metrics) in zip(
+            iterations, pool.map(_run_worker_iteration, tasks, chunksize=chunksize)
+        ):
+            run_metrics.merge(metrics)
+            yield i, outcome
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+@dataclasses.dataclass
+class SearchBudget:
+    """
+    When an adaptive search stops: after `seconds`, once an iteration reaches `target_success`, or once `patience`
+    iterations in a row haven't beaten the best total score. It keeps the `keep` best outcomes by total score and the
+    `keep` best by success count.
+    """
+
+    seconds: Optional[float] = None
+    target_success: Optional[int] = None
+    patience: Optional[int] = None
+    keep: int = 5
+
+
+@dataclasses.dataclass
+class SearchResult:
+    outcomes: dict[int, IterationOutcome]
+    iterations_run: int
+    stopped_because: str
+
+
+class BestOutcomes:
+    """
+    The best `keep` outcomes by total score and the best `keep` by success count. Ties go to the earlier iteration
+    """
+
+    def __init__(self, keep: int):
+        self.keep = keep
+        self.by_score: list[tuple[int, int, IterationOutcome]] = []
+        self.by_success: list[tuple[int, int, IterationOutcome]] = []
+
+    def add(self, outcome: IterationOutcome) -> None:
+        for heap, key in (
+            (self.by_score, outcome.total_score),
+            (self.by_success, outcome.success_count),
+        ):
+            entry = (key, -outcome.iteration, outcome)
+            if len(heap) < self.keep:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+
+    def outcomes(self) -> dict[int, IterationOutcome]:
+        """
+        :return: the kept outcomes, by iteration index, in iteration order
+        """
+        kept = {
+            entry[2].iteration: entry[2] for entry in self.by_score + self.by_success
+        }
+        return dict(sorted(kept.items()))
+
+
+def search_matching(
+    inputs: MatchingInputs,
+    iterations: Sequence[int],
+    master_seed: int,
+    budget: SearchBudget,
+    workers: int = 1,
+) -> SearchResult:
+    """
+    Run the iterations in order until the budget says to stop, keeping only the best outcomes. Each iteration is
+    seeded as it would be by `iterate_matching`, so any kept iteration can be replayed
+
+    :param inputs: the parsed candidates, roles and bids
+    :param iterations: the indices of the iterations that may be run
+    :param master_seed: the seed from which each iteration's seed is derived
+    :param budget: when to stop, and how many outcomes to keep
+    :param workers: the number of worker processes
+    :return: the kept outcomes, the number of iterations run and why the search stopped
+    """
+    start = time.monotonic()
+    best = BestOutcomes(budget.keep)
+    best_score: Optional[int] = None
+    since_improvement = 0
+    run = 0
+    stopped_because = "ran every iteration"
+    search = iterate_matching(inputs, iterations, master_seed, workers, chunksize=1)
+    try:
+        for _, outcome in search:
+            run += 1
+            since_improvement += 1
+            if outcome is not None:
+                best.add(outcome)
+                if best_score is None or outcome.total_score > best_score:
+                    best_score, since_improvement = outcome.total_score, 0
+            if (
+                budget.target_success is not None
+                and outcome is not None
+                and outcome.success_count >= budget.target_success
+            ):
+                stopped_because = f"reached {outcome.success_count} successful bids"
+            elif budget.patience is not None and since_improvement >= budget.patience:
+                stopped_because = f"no better score in {since_improvement} iterations"
+            elif (
+                budget.seconds is not None
+                and time.monotonic() - start >= budget.seconds
+            ):
+                stopped_because = f"ran out of time after {budget.seconds} seconds"
+            else:
+                continue
+            break
+    finally:
+        search.close()
+    logger.info(f"Search stopped after {run} iterations: {stopped_because}")
+    return SearchResult(best.outcomes(), run, stopped_because)
+
+
+@dataclasses.dataclass
+class EngineSummary:
+    """
+    How well an engine did over a run: the totals across its solved iterations, and the details of its best one
+    """
+
+    engine: str
+    solved: int
+    best_total_score: int
+    mean_total_score: float
+    pairs: int
+    success_count: int
+    bids_at_minimum: int
+    bids: int
+    score_gap: int = 0
+
+
+def summarise_engine(
+    engine: str, outcomes: Sequence[IterationOutcome]
+) -> EngineSummary:
+    """
+    :param engine: the name of the engine
+    :param outcomes: the outcomes of the iterations the engine solved
+    :return: a summary of the outcomes, with details of the one with the highest total score
+    """
+    if not outcomes:
+        return EngineSummary(engine, 0, 0, 0.0, 0, 0, 0, 0)
+    best = max(outcomes, key=lambda outcome: outcome.total_score)
+    return EngineSummary(
+        engine,
+        len(outcomes),
+        best.total_score,
+        sum(outcome.total_score for outcome in outcomes) / len(outcomes),
+        sum(len(pairs) for pairs in best.outcomes.values()),
+        best.success_count,
+        sum(bid.count >= bid.min_number for bid in best.bids),
+        len(best.bids),
+    )
+
+
+def compare_engines(
+    inputs: MatchingInputs,
+    iterations: Sequence[int],
+    master_seed: int,
+    workers: int = 1,
+    engines: Iterable[str] = tuple(ENGINES),
+) -> list[EngineSummary]:
+    """
+    Run the same iterations on the same inputs with each engine. Engines that don't shuffle give the same result
+    every iteration, so they are only run for the first. Each summary's `score_gap` is its best total score less
+    that of the first engine
+
+    :param inputs: the parsed candidates, roles and bids
+    :param iterations: the indices of the iterations to run
+    :param master_seed: the seed from which each iteration's seed is derived
+    :param workers: the number of worker processes
+    :param engines: the names of the engines to compare
+    :return: a summary for each engine
+    """
+    summaries = []
+    for engine in engines:
+        engine_inputs = dataclasses.replace(inputs, engine=engine)
+        outcomes = [
+            outcome
+            for _, outcome in iterate_matching(
+                engine_inputs,
+                iterations if ENGINES[engine].shuffles else iterations[:1],
+                master_seed,
+                workers,
+            )
+            if outcome is not None
+        ]
+        summaries.append(summarise_engine(engine, outcomes))
+    for summary in summaries:
+        summary.score_gap = summary.best_total_score - summaries[0].best_total_score
+    return summaries
+
+
+def pair_type_for(specialism: Optional[str], trace: bool = False) -> Type[BasePair]:
+    """
+    :param specialism: the scheme specialism
+    :param trace: whether to return the class that records each scoring decision
+    :return: the class of `Pair` that scores its candidates against its roles
+    """
+    if trace:
+        return {"generalist": TracedGeneralistPair}.get(specialism, TracedPair)
     specialisms = {"generalist": GeneralistPair}
+    return specialisms.get(specialism, Pair)
+
+
+def read_bids(bid_file: str) -> list[Bid]:
+    """
+    :param bid_file: path to the bids CSV, with a `dept` column and a column of numbers for each cohort
+    :return: a bid for each department and cohort
+    """
     dept_bids = []
     with open(bid_file) as bids_file:
         bids_reader: Iterable[dict[str, str]] = csv.DictReader(bids_file)
@@ -398,26 +1306,177 @@ def conduct_matching(
                 dept_bids.extend(
                     [partial_bid(cohort=Cohort.factory(cohort), number=int(value))]
                 )
-    pairings = dict()
-    i = 0
-    candidates = read_candidates(candidate_file, specialism)
-    roles = read_roles(role_file, specialism)
-    while i < iterations:
-        c = deepcopy(candidates)
-        r = deepcopy(roles)
-        b = deepcopy(dept_bids)
-        try:
-            process_obj = Process(
-                c,
-                r,
-                b,
-                senior_first,
-                pair_type=specialisms.get(specialism, Pair),
-            )
-            process_obj.compute()
-            iteration = IterationOutcome(b, process_obj.pairings, i)
-            pairings[i] = iteration
-        except (UnsolvableMatrix, OutOfRolesException):
-            logger.warning(f"Iteration #{i} is unsolvable")
-        i += 1
-    return pairings
+    return dept_bids
+
+
+def prepare_inputs(
+    bid_file: str,
+    role_file: str,
+    candidate_file: str,
+    senior_first: bool,
+    specialism: str,
+    solver: str = MunkresSolver.name,
+    incremental: bool = False,
+    snapshot: Optional[str] = None,
+    trace: bool = False,
+    engine: str = "rounds",
+    cohort_workers: Optional[int] = None,
+    metrics: Optional[Metrics] = None,
+) -> MatchingInputs:
+    """
+    Read in and score everything the iterations of a run share. The parameters are those of `conduct_matching`. The
+    pair type's `check_stats` are reset first, so that they count only this run
+
+    :return: the inputs to each iteration
+    """
+    recorder = metrics or NULL_METRICS
+    with recorder.time("read"):
+        candidates, roles = load_inputs(candidate_file, role_file, specialism, snapshot)
+        bids = read_bids(bid_file)
+    pair_type = pair_type_for(specialism, trace)
+    pair_type.check_stats.reset()
+    if trace:
+        pair_type.trace_buffer.clear()
+    with recorder.time("score_cache"):
+        cache = ScoreCache(candidates, roles, pair_type)
+    recorder.count("intake_cells", len(candidates) * len(roles))
+    recorder.count("intake_allowed", cache.edges.nnz)
+    return MatchingInputs(
+        candidates,
+        roles,
+        bids,
+        senior_first,
+        pair_type,
+        get_solver(solver),
+        cache,
+        incremental,
+        engine,
+        cohort_workers,
+        metrics,
+    )
+
+
+def stream_matching(
+    bid_file: str,
+    role_file: str,
+    candidate_file: str,
+    senior_first: bool,
+    specialism: str,
+    iterations: int,
+    solver: str = MunkresSolver.name,
+    workers: int = 1,
+    seed: Optional[int] = None,
+    replay_iteration: Optional[int] = None,
+    incremental: bool = False,
+    snapshot: Optional[str] = None,
+    trace: bool = False,
+    engine: str = "rounds",
+    cohort_workers: Optional[int] = None,
+    budget: Optional[SearchBudget] = None,
+    profile: Optional[Metrics] = None,
+) -> Iterator[tuple[int, IterationOutcome]]:
+    """
+    Read in the bids, roles and candidates, and match them `iterations` times, yielding each outcome as soon as its
+    iteration finishes. Each iteration shuffles the candidates and roles differently, using a seed derived from the
+    master `seed` and the iteration's index.
+
+    :param bid_file: path to the bids CSV
+    :param role_file: path to the roles CSV
+    :param candidate_file: path to the candidates CSV
+    :param senior_first: whether to match the most senior cohort first
+    :param specialism: the scheme specialism, which decides the candidate, role and `Pair` classes
+    :param iterations: the number of iterations to run
+    :param solver: the name of the assignment solver
+    :param workers: the number of processes to run iterations in
+    :param seed: the master seed. If None, one is chosen at random and logged
+    :param replay_iteration: if given, run only this iteration of the search with this master seed
+    :param incremental: whether to carry each cohort's grid from round to round rather than rebuild it
+    :param snapshot: a directory written by `compile_snapshot`. If it holds a fresh snapshot of the candidates and
+        roles, they are loaded from it instead of from the CSVs
+    :param trace: whether to score each pair on its own with a traced `Pair` class, whose `trace_buffer` is emptied
+        and then filled with every scoring decision
+    :param engine: the name of the engine in `ENGINES` that matches each iteration
+    :param cohort_workers: if given, match cohorts that compete for none of the same roles at the same time, on
+        this many threads
+    :param budget: if given, stop early as it says and yield only the best outcomes, once the search has stopped,
+        treating `iterations` as the most to run
+    :param profile: if given, record in it the time spent reading and scoring the inputs, and merge into it the
+        metrics of every iteration, which are also given as each outcome's `metrics`
+    :return: an iterator of (iteration index, outcome) tuples in iteration order, leaving out iterations that
+        couldn't be solved
+    """
+    if seed is None:
+        if replay_iteration is not None:
+            raise ValueError("Replaying an iteration needs the master seed")
+        seed = new_master_seed()
+    logger.info(f"Master seed is {seed}")
+    indices = range(iterations) if replay_iteration is None else [replay_iteration]
+    inputs = prepare_inputs(
+        bid_file,
+        role_file,
+        candidate_file,
+        senior_first,
+        specialism,
+        solver,
+        incremental,
+        snapshot,
+        trace,
+        engine,
+        cohort_workers,
+        profile,
+    )
+    if budget is not None:
+        yield from search_matching(
+            inputs, indices, seed, budget, workers
+        ).outcomes.items()
+        return
+    for i, outcome in iterate_matching(inputs, indices, seed, workers):
+        if outcome is not None:
+            yield i, outcome
+
+
+def conduct_matching(
+    bid_file: str,
+    role_file: str,
+    candidate_file: str,
+    senior_first: bool,
+    specialism: str,
+    iterations: int,
+    solver: str = MunkresSolver.name,
+    workers: int = 1,
+    seed: Optional[int] = None,
+    replay_iteration: Optional[int] = None,
+    incremental: bool = False,
+    snapshot: Optional[str] = None,
+    trace: bool = False,
+    engine: str = "rounds",
+    cohort_workers: Optional[int] = None,
+    budget: Optional[SearchBudget] = None,
+    profile: Optional[Metrics] = None,
+) -> dict[int, IterationOutcome]:
+    """
+    Run `stream_matching`, whose parameters these are, and collect every outcome
+
+    :return: a dictionary of iteration index to outcome, leaving out iterations that couldn't be solved
+    """
+    return dict(
+        stream_matching(
+            bid_file,
+            role_file,
+            candidate_file,
+            senior_first,
+            specialism,
+            iterations,
+            solver,
+            workers,
+            seed,
+            replay_iteration,
+            incremental,
+            snapshot,
+            trace,
+            engine,
+            cohort_workers,
+            budget,
+            profile,
+        )
+    )
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import contextlib
+import time
+from collections import Counter, defaultdict
+from typing import ContextManager, Iterator
+
+
+class Metrics:
+    """
+    Where the time goes in part of a run, and how much work it did: the seconds spent in each stage and how often it
+    was entered, counts of events such as rounds and failures, and the sizes of the grids that were scored. Each
+    iteration fills its own, which ends up as `IterationOutcome.metrics`, and a run's can be built up by merging
+    them. When profiling is off, `NULL_METRICS` is used in its place, so that recording costs almost nothing.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.seconds: defaultdict[str, float] = defaultdict(float)
+        self.calls: Counter[str] = Counter()
+        self.counts: Counter[str] = Counter()
+        self.largest: Counter[str] = Counter()
+
+    @contextlib.contextmanager
+    def _timer(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - start
+            self.calls[stage] += 1
+
+    def time(self, stage: str) -> ContextManager[None]:
+        """
+        :param stage: the name of the stage
+        :return: a context manager that adds the time spent inside it to the stage
+        """
+        return self._timer(stage)
+
+    def count(self, name: str, number: int = 1) -> None:
+        self.counts[name] += number
+
+    def grid(self, rows: int, cols: int, allowed: int) -> None:
+        """
+        Note the size of a grid that has been scored
+
+        :param rows: the number of candidates
+        :param cols: the number of roles
+        :param allowed: the number of pairings that weren't disqualified
+        """
+        self.counts["grids"] += 1
+        self.counts["grid_cells"] += rows * cols
+        self.counts["grid_allowed"] += allowed
+        self.largest["grid_rows"] = max(self.largest["grid_rows"], rows)
+        self.largest["grid_cols"] = max(self.largest["grid_cols"], cols)
+
+    @property
+    def disqualified_share(self) -> float:
+        """
+        :return: the share of the cells of every grid noted that were disqualified
+        """
+        cells = self.counts["grid_cells"]
+        return 1 - self.counts["grid_allowed"] / cells if cells else 0.0
+
+    def spawn(self) -> Metrics:
+        """
+        :return: empty metrics of the same kind, for work done on another thread, to be merged back in afterwards
+        """
+        return Metrics()
+
+    def merge(self, other: dict) -> None:
+        """
+        :param other: the `as_dict` of other metrics, to add to these
+        """
+        for name, seconds in other.get("seconds", {}).items():
+            self.seconds[name] += seconds
+        self.calls.update(other.get("calls", {}))
+        self.counts.update(other.get("counts", {}))
+        for name, value in other.get("largest", {}).items():
+            self.largest[name] = max(self.largest[name], value)
+
+    def as_dict(self) -> dict:
+        return {
+            "seconds": dict(self.seconds),
+            "calls": dict(self.calls),
+            "counts": dict(self.counts),
+            "largest": dict(self.largest),
+            "disqualified_share": self.disqualified_share,
+        }
+
+    def stages(self) -> list[tuple[str, float, int]]:
+        """
+        :return: a tuple of the name, total seconds and number of calls of each stage, the slowest first
+        """
+        return sorted(
+            (
+                (name, seconds, self.calls[name])
+                for name, seconds in self.seconds.items()
+            ),
+            key=lambda row: (-row[1], row[0]),
+        )
+
+
+class NullMetrics(Metrics):
+    """
+    Records nothing, for when profiling is off
+    """
+
+    enabled = False
+    _nothing = contextlib.nullcontext()
+
+    def time(self, stage: str) -> ContextManager[None]:
+        return self._nothing
+
+    def count(self, name: str, number: int = 1) -> None:
+        pass
+
+    def grid(self, rows: int, cols: int, allowed: int) -> None:
+        pass
+
+    def spawn(self) -> Metrics:
+        return self
+
+    def merge(self, other: dict) -> None:
+        pass
+
+    def as_dict(self) -> dict:
+        return {}
+
+
+NULL_METRICS = NullMetrics()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import csv
+import sys
+from array import array
+from typing import IO, Optional
+
+import numpy as np
+
+from fast_stream_22.matching.match import IterationOutcome
+from fast_stream_22.specialism.vocabulary import Vocabulary
+
+
+class PairWriter:
+    """
+    Writes each iteration's pairs as `iteration,cohort,candidate,role,score` rows as soon as the iteration is given
+    to it, through a buffered stream, so no more than one iteration is held at a time
+    """
+
+    fields = ("iteration", "cohort", "candidate", "role", "score")
+
+    def __init__(self, stream: IO, owns_stream: bool = False):
+        """
+        :param stream: where to write the rows
+        :param owns_stream: whether to close the stream when the writer is closed, rather than just flush it
+        """
+        self.stream = stream
+        self.owns_stream = owns_stream
+        self.writer = csv.writer(stream, lineterminator="\n")
+
+    def write(self, iteration: int, outcome: IterationOutcome) -> None:
+        self.writer.writerows(
+            (iteration, cohort.name, *pair)
+            for cohort, pairs in outcome.outcomes.items()
+            for pair in pairs
+        )
+
+    def close(self) -> None:
+        if self.owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+    def __enter__(self) -> PairWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ColumnarPairWriter(PairWriter):
+    """
+    Collects each iteration's pairs in typed arrays, with uids interned, and writes them as the columns of a
+    compressed `.npz` archive when closed. Each pair takes 14 bytes until then, so even very large runs fit in memory.
+    The archive is opened straight away, so a path that can't be written to fails before any matching is done.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: where to write the archive
+        """
+        super().__init__(open(path, "wb"), owns_stream=True)
+        self.path = path
+        self.uids = Vocabulary()
+        self.iterations = array("i")
+        self.cohorts = array("b")
+        self.candidates = array("i")
+        self.roles = array("i")
+        self.scores = array("i")
+
+    def write(self, iteration: int, outcome: IterationOutcome) -> None:
+        for cohort, pairs in outcome.outcomes.items():
+            for candidate, role, score in pairs:
+                self.iterations.append(iteration)
+                self.cohorts.append(cohort.value)
+                self.candidates.append(self.uids.intern(candidate))
+                self.roles.append(self.uids.intern(role))
+                self.scores.append(score)
+
+    def close(self) -> None:
+        try:
+            np.savez_compressed(
+                self.stream,
+                iteration=np.frombuffer(self.iterations, dtype=np.int32),
+                cohort=np.frombuffer(self.cohorts, dtype=np.int8),
+                candidate=np.frombuffer(self.candidates, dtype=np.int32),
+                role=np.frombuffer(self.roles, dtype=np.int32),
+                score=np.frombuffer(self.scores, dtype=np.int32),
+                uids=np.array(list(self.uids), dtype=str),
+            )
+        finally:
+            super().close()
+
+
+def pair_writer(path: Optional[str] = None) -> PairWriter:
+    """
+    :param path: where to write the pairs: compressed NumPy columns if it ends `.npz`, otherwise CSV rows. If None,
+        CSV rows are written to standard output
+    :return: a writer, which should be closed when the run is done
+    """
+    if path is None:
+        return PairWriter(sys.stdout)
+    if path.endswith(".npz"):
+        return ColumnarPairWriter(path)
+    return PairWriter(open(path, "w", newline="", buffering=1 << 20), owns_stream=True)
+
+
+def read_pair_columns(path: str) -> dict[str, np.ndarray]:
+    """
+    :param path: an archive written by `ColumnarPairWriter`
+    :return: the `iteration`, `cohort`, `candidate`, `role` and `score` columns, with uids decoded
+    """
+    with np.load(path) as archive:
+        uids = archive["uids"]
+        return {
+            "iteration": archive["iteration"],
+            "cohort": archive["cohort"],
+            "candidate": uids[archive["candidate"]],
+            "role": uids[archive["role"]],
+            "score": archive["score"],
+        }
@@ -1,46 +1,273 @@
 from __future__ import annotations
 
 import csv
-import functools
-from typing import Type, TypeVar, Optional, MutableSequence
+import dataclasses
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Sequence, Type, TypeVar
 
+from fast_stream_22.matching.columns import SCHEMAS, CandidateRecord, RoleRecord, Table
 from fast_stream_22.specialism.SEFS.models import SefsRole, SefsCandidate
 from fast_stream_22.specialism.generalist import (
     GeneralistCandidate,
     GeneralistRole,
 )
 from fast_stream_22.specialism.models import Candidate, Role, BaseClass
+from fast_stream_22.specialism.vocabulary import VocabularyRegistry
+
+
+MatchObject = TypeVar("MatchObject", bound=BaseClass)
+T = TypeVar("T")
+
+
+def content_hash(*paths: str) -> str:
+    """
+    :param paths: the files to hash, in order
+    :return: the SHA-256 of their contents
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as file:
+            while block := file.read(1 << 20):
+                digest.update(block)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+@dataclasses.dataclass(frozen=True)
+class CacheInfo:
+    hits: int
+    misses: int
+    entries: int
+    max_entries: int
+
+
+class InputCache:
+    """
+    What was parsed from the most recently read input files, up to `max_entries` of them, the least recently used
+    being dropped first. Entries are found by the SHA-256 of the files' contents and what they were parsed into, so a
+    file that changes on disk is parsed again, and copies of one file are parsed only once. Each file's hash is
+    remembered against its path, size, inode and modification and change times, so a file that hasn't changed is
+    neither read nor hashed again. What is cached is shared, so it is made read-only: objects are frozen, and table
+    columns can't be written to. Each caller gets its own `Table`s over those columns, with its own copy of the
+    vocabularies, which grow as the tables are scored.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        if max_entries < 1:
+            raise ValueError("The cache must hold at least one entry")
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+        self._digests: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, model: Type[MatchObject]) -> tuple[MatchObject, ...]:
+        """
+        :param path: path to a CSV file
+        :param model: the class to make each row into
+        :return: a frozen object for each row, parsed now if the file's contents haven't been seen
+        """
+
+        def parse(data: bytes) -> tuple[MatchObject, ...]:
+            objects = _create_objects(io.StringIO(data.decode()), model)
+            for obj in objects:
+                obj.freeze()
+            return tuple(objects)
+
+        return self._load(("objects", model), [path], parse)
+
+    def tables(
+        self, candidate_file: str, role_file: str, specialism: Optional[str] = None
+    ) -> tuple[Table, Table]:
+        """
+        :param candidate_file: path to the candidates CSV
+        :param role_file: path to the roles CSV
+        :param specialism: the scheme specialism
+        :return: new candidate and role tables, sharing a registry, over columns parsed now if the files' contents
+            haven't been seen with this specialism
+        """
+
+        def parse(candidates: bytes, roles: bytes) -> tuple[Table, Table]:
+            schemas = SCHEMAS[specialism]
+            registry = VocabularyRegistry()
+            return _frozen(
+                (
+                    Table.parse(
+                        io.StringIO(candidates.decode(), newline=""),
+                        schemas[0],
+                        registry,
+                        name=candidate_file,
+                    ),
+                    Table.parse(
+                        io.StringIO(roles.decode(), newline=""),
+                        schemas[1],
+                        registry,
+                        name=role_file,
+                    ),
+                )
+            )
+
+        candidates, roles = self._load(
+            ("tables", specialism), [candidate_file, role_file], parse
+        )
+        registry = candidates.registry.copy()
+        return (
+            Table(candidates.schema, dict(candidates.columns), registry),
+            Table(roles.schema, dict(roles.columns), registry),
+        )
+
+    def _load(self, kind: tuple, paths: list[str], parse: Callable[..., T]) -> T:
+        """
+        :param kind: what the files are parsed into, which is part of the entry's key
+        :param paths: the files to parse
+        :param parse: makes the entry from the contents of each file, in order
+        :return: the cached entry for the files' contents, found without reading them if none has changed
+        """
+        with self._lock:
+            digests = [self._digests.get(_file_key(path)) for path in paths]
+            key = (*kind, *digests)
+            if None not in digests and key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        contents = [self._read(path) for path in paths]
+        return self._cached(
+            (*kind, *(digest for digest, _ in contents)),
+            lambda: parse(*(data for _, data in contents)),
+        )
+
+    def _read(self, path: str) -> tuple[str, bytes]:
+        """
+        :return: the SHA-256 of the file's contents and the contents, which is remembered against the file as it was
+            when it was read
+        """
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            data = file.read()
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._digests[_file_key(path, stat)] = digest
+            while len(self._digests) > 2 * self.max_entries:
+                self._digests.popitem(last=False)
+        return digest, data
+
+    def _cached(self, key: tuple, parse: Callable[[], T]) -> T:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = parse()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+            self.hits = self.misses = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, len(self._entries), self.max_entries)
+
+
+input_cache = InputCache()
 
 
-@functools.lru_cache
 def read_candidates(
     path_to_csv: str = "./candidates.csv", specialism: str = None
-) -> MutableSequence[Candidate]:
+) -> tuple[Candidate, ...]:
+    """
+    :return: the candidates, from `input_cache` if the file hasn't changed since it was last read
+    """
     specialisms = {
         None: Candidate,
         "SEFS": SefsCandidate,
         "generalist": GeneralistCandidate,
     }
-    return _read_and_create_objects(path_to_csv, specialisms[specialism])
+    return input_cache.get(path_to_csv, specialisms[specialism])
 
 
-@functools.lru_cache
 def read_roles(
     path_to_csv: str = "./roles.csv", specialism: Optional[str] = None
-) -> MutableSequence[Role]:
+) -> tuple[Role, ...]:
+    """
+    :return: the roles, from `input_cache` if the file hasn't changed since it was last read
+    """
     specialisms = {"SEFS": SefsRole, None: Role, "generalist": GeneralistRole}
-    return _read_and_create_objects(path_to_csv, specialisms[specialism])
+    return input_cache.get(path_to_csv, specialisms[specialism])
 
 
-MatchObject = TypeVar("MatchObject", bound=BaseClass)
+def read_tables(
+    candidate_file: str, role_file: str, specialism: Optional[str] = None
+) -> tuple[Table, Table]:
+    """
+    Stream the candidates and roles into columnar tables that share one vocabulary registry
+
+    :param candidate_file: path to the candidates CSV
+    :param role_file: path to the roles CSV
+    :param specialism: the scheme specialism. SEFS has no columnar layout
+    :return: a tuple of the candidate table and the role table, from `input_cache` if the files' contents have been
+        read before
+    """
+    return input_cache.tables(candidate_file, role_file, specialism)
+
+
+def read_rows(
+    candidate_file: str, role_file: str, specialism: Optional[str] = None
+) -> tuple[Sequence[CandidateRecord], Sequence[RoleRecord]]:
+    """
+    Read the candidates and roles as lightweight row views where the specialism has a columnar layout, and as full
+    objects where it hasn't
+
+    :return: a tuple of the candidates and the roles
+    """
+    if specialism not in SCHEMAS:
+        return (
+            read_candidates(candidate_file, specialism),
+            read_roles(role_file, specialism),
+        )
+    candidates, roles = read_tables(candidate_file, role_file, specialism)
+    return candidates.rows(), roles.rows()
+
+
+def _file_key(path: str, stat: Optional[os.stat_result] = None) -> tuple:
+    """
+    :return: what identifies a version of the file without reading it: its path, size, inode, and modification and
+        change times. The change time moves whenever the file is written, even if the modification time is put back
+    """
+    stat = stat or os.stat(path)
+    return (
+        os.path.abspath(path),
+        stat.st_size,
+        stat.st_ino,
+        stat.st_mtime_ns,
+        stat.st_ctime_ns,
+    )
+
+
+def _frozen(tables: tuple[Table, Table]) -> tuple[Table, Table]:
+    for table in tables:
+        for column in table.columns.values():
+            column.flags.writeable = False
+    return tables
 
 
-def _read_and_create_objects(
-    filepath: str, model: Type[MatchObject]
+def _create_objects(
+    lines: Iterable[str], model: Type[MatchObject]
 ) -> list[MatchObject]:
     objs = []
-    with open(filepath) as file:
-        for line in csv.DictReader(file):
-            line = {k: v.strip() for k, v in line.items()}
-            objs.append(model(**line))
+    for line in csv.DictReader(lines):
+        line = {k: v.strip() for k, v in line.items()}
+        objs.append(model(**line))
     return objs
@@ -0,0 +1,720 @@
+from __future__ import annotations
+
+import dataclasses
+from typing import Sequence, Type, Optional, Hashable, Iterable
+
+import numpy as np
+
+from fast_stream_22.matching.columns import (
+    CandidateRecord,
+    RoleRecord,
+    Table,
+    bitset_members,
+    contains,
+    has_member,
+    popcount,
+    rows_of,
+    subsets,
+    to_bitsets,
+    widen,
+)
+from fast_stream_22.matching.edges import EdgeGrid
+from fast_stream_22.specialism.generalist import (
+    GeneralistPair,
+    GeneralistCandidate,
+    GeneralistRole,
+)
+from fast_stream_22.specialism.pair import Pair, BasePair, P
+from fast_stream_22.specialism.vocabulary import VocabularyRegistry
+
+BoolGrid = np.ndarray
+IntGrid = np.ndarray
+
+
+@dataclasses.dataclass
+class _SetColumn:
+    """
+    A set-valued field, held as bitsets that are widened once every object has been encoded and the size of its
+    vocabulary is known
+    """
+
+    vocabulary: str
+    bits: np.ndarray
+
+
+class ColumnarScorer:
+    """
+    Score every candidate/role combination in one go. Candidate and role attributes are encoded once into NumPy
+    columns, and each `_check_*` and `_score_*` method of the `Pair` is mirrored by a method of the same name that
+    works on the whole grid. Checks return a boolean grid that is `True` where the pair is disqualified; scores
+    return an integer grid of the points that method awards.
+
+    Strings are interned into a `VocabularyRegistry`, and set-valued fields are held as bitsets of their IDs, so
+    membership and subset checks are bitwise operations on whole columns. Candidates and roles read into `Table`s that
+    share a registry are scored in that registry's IDs, without any translation.
+    """
+
+    pair_type: Type[BasePair] = Pair
+
+    def __init__(
+        self, candidates: Sequence[CandidateRecord], roles: Sequence[RoleRecord]
+    ):
+        self.shape = (len(candidates), len(roles))
+        self.registry = self._shared_registry(candidates, roles)
+        candidate_columns = self.encode_candidates(candidates)
+        role_columns = self.encode_roles(roles)
+        self.candidates = self._finalise(candidate_columns)
+        self.roles = self._finalise(role_columns)
+
+    @classmethod
+    def supports(cls, pair_type: Type[BasePair]) -> bool:
+        """
+        A scorer can only stand in for the exact `Pair` class it mirrors, or one made from it by `reweighted`, since
+        a subclass may override any of the scoring methods, and only when that class isn't tracing, since tracing
+        needs each pair scored on its own
+
+        :param pair_type: the class of `Pair` to be scored
+        :return: whether this scorer produces the same grid as `pair_type`
+        """
+        original = pair_type.__dict__.get("reweights", pair_type)
+        return original is cls.pair_type and not pair_type.tracing
+
+    @staticmethod
+    def _shared_registry(
+        candidates: Sequence[CandidateRecord], roles: Sequence[RoleRecord]
+    ) -> VocabularyRegistry:
+        """
+        :return: the registry of the tables the candidates and roles are rows of, if they share one, or else a new one
+        """
+        tables = [found[0] for found in (rows_of(candidates), rows_of(roles)) if found]
+        registries = {id(table.registry): table.registry for table in tables}
+        if len(registries) == 1:
+            return registries.popitem()[1]
+        return VocabularyRegistry()
+
+    def encode_candidates(self, candidates: Sequence[CandidateRecord]) -> dict:
+        if found := rows_of(candidates):
+            return self.encode_candidate_table(*found)
+        first_locations = [c.first_preference_location for c in candidates]
+        second_locations = [c.second_preference_location for c in candidates]
+        return {
+            "clearance": self._array([c.clearance for c in candidates]),
+            "nationality": self._array([c.british_national for c in candidates]),
+            "has_passport": self._flags([c.has_passport for c in candidates]),
+            "cohort": self._array([c.year_group for c in candidates]),
+            "can_relocate": self._flags([c.can_relocate for c in candidates]),
+            "has_relocated": self._flags([c.has_relocated for c in candidates]),
+            "first_location": self._intern("location", first_locations),
+            "second_location": self._intern("location", second_locations),
+            "first_location_any": self._flags(
+                [loc == "Any" for loc in first_locations]
+            ),
+            "second_location_any": self._flags(
+                [loc == "Any" for loc in second_locations]
+            ),
+            "prior_departments": self._intern_sets(
+                "department", [c.prior_departments for c in candidates]
+            ),
+            "no_defence": self._flags([c.no_defence for c in candidates]),
+            "no_immigration": self._flags([c.no_immigration for c in candidates]),
+            "wants_private_office": self._flags(
+                [c.wants_private_office for c in candidates]
+            ),
+            "wants_line_management": self._flags(
+                [c.wants_line_management for c in candidates]
+            ),
+            "primary_skill": self._intern(
+                "skill", [c.primary_skill for c in candidates]
+            ),
+            "secondary_skill": self._intern(
+                "skill", [c.secondary_skill for c in candidates]
+            ),
+            "last_secondary_skill": self._intern(
+                "skill", [c.last_role_secondary_skill for c in candidates]
+            ),
+        }
+
+    def encode_candidate_table(self, table: Table, index: np.ndarray) -> dict:
+        """
+        Take the columns straight from a `Table` of candidates, rather than reading each row's attributes
+
+        :param table: the table the candidates are rows of
+        :param index: the candidates' rows in the table
+        """
+        c = {name: column[index] for name, column in table.columns.items()}
+        first_locations = self._translate(
+            table, "location", c["first_preference_location"]
+        )
+        second_locations = self._translate(
+            table, "location", c["second_preference_location"]
+        )
+        any_location = self.registry["location"].ids.get("Any", -1)
+        return {
+            "clearance": c["clearance"].astype(np.int64),
+            "nationality": c["british_national"].astype(np.int64),
+            "has_passport": c["has_passport"],
+            "cohort": c["year_group"].astype(np.int64),
+            "can_relocate": c["can_relocate"],
+            "has_relocated": c["has_relocated"],
+            "first_location": first_locations,
+            "second_location": second_locations,
+            "first_location_any": first_locations == any_location,
+            "second_location_any": second_locations == any_location,
+            "prior_departments": self._translate_set(
+                table, "department", c["prior_departments"]
+            ),
+            "no_defence": c["no_defence"],
+            "no_immigration": c["no_immigration"],
+            "wants_private_office": c["wants_private_office"],
+            "wants_line_management": c["wants_line_management"],
+            "primary_skill": self._translate(table, "skill", c["primary_skill"]),
+            "secondary_skill": self._translate(table, "skill", c["secondary_skill"]),
+            "last_secondary_skill": self._translate(
+                table, "skill", c["last_role_secondary_skill"]
+            ),
+        }
+
+    def encode_roles(self, roles: Sequence[RoleRecord]) -> dict:
+        if found := rows_of(roles):
+            return self.encode_role_table(*found)
+        return {
+            "clearance": self._array([r.clearance for r in roles]),
+            "nationality_requirement": self._array(
+                [r.nationality_requirement for r in roles]
+            ),
+            "passport_requirement": self._flags(
+                [r.passport_requirement for r in roles]
+            ),
+            "cohorts": self._array(
+                [sum(1 << year for year in r.suitable_year_groups) for r in roles]
+            ),
+            "cohort_count": self._array([len(r.suitable_year_groups) for r in roles]),
+            "locations": self._intern_sets("location", [r.locations for r in roles]),
+            "from_anywhere": self._flags([r.from_anywhere() for r in roles]),
+            "department": self._intern("department", [r.department for r in roles]),
+            "private_office_role": self._flags([r.private_office_role for r in roles]),
+            "line_management_role": self._flags(
+                [r.line_management_role for r in roles]
+            ),
+            "defence_role": self._flags([r.defence_role for r in roles]),
+            "immigration_role": self._flags([r.immigration_role for r in roles]),
+            "skill_focus": self._intern("skill", [r.skill_focus for r in roles]),
+            "secondary_focus": self._intern(
+                "skill", [r.secondary_focus for r in roles]
+            ),
+        }
+
+    def encode_role_table(self, table: Table, index: np.ndarray) -> dict:
+        """
+        Take the columns straight from a `Table` of roles, rather than reading each row's attributes
+
+        :param table: the table the roles are rows of
+        :param index: the roles' rows in the table
+        """
+        r = {name: column[index] for name, column in table.columns.items()}
+        return {
+            "clearance": r["clearance"].astype(np.int64),
+            "nationality_requirement": r["nationality_requirement"].astype(np.int64),
+            "passport_requirement": r["passport_requirement"],
+            "cohorts": r["suitable_year_groups"],
+            "cohort_count": popcount(r["suitable_year_groups"]),
+            "locations": self._translate_set(table, "location", r["locations"]),
+            "from_anywhere": r["from_anywhere"],
+            "department": self._translate(table, "department", r["department"]),
+            "private_office_role": r["private_office_role"],
+            "line_management_role": r["line_management_role"],
+            "defence_role": r["defence_role"],
+            "immigration_role": r["immigration_role"],
+            "skill_focus": self._translate(table, "skill", r["skill_focus"]),
+            "secondary_focus": self._translate(table, "skill", r["secondary_focus"]),
+        }
+
+    def score(self) -> tuple[IntGrid, BoolGrid]:
+        """
+        Run every scoring method registered on `pair_type` across the whole grid
+
+        :return: a tuple of the integer score grid and a boolean grid marking disqualified pairs
+        """
+        disqualified = np.zeros(self.shape, dtype=bool)
+        scores = np.zeros(self.shape, dtype=np.int64)
+        self.contributions: dict[str, IntGrid] = {}
+        checks: dict[str, BoolGrid] = {}
+        for name in sorted(self.pair_type.scoring_method_names):
+            result = getattr(self, name)()
+            if result.dtype == bool:
+                disqualified |= result
+                checks[name] = result
+            else:
+                scores += result
+                self.contributions[name] = result
+        self._record_checks(checks)
+        disqualified |= self._check_score(scores)
+        return scores, disqualified
+
+    def _record_checks(self, checks: dict[str, BoolGrid]) -> None:
+        """
+        Add to the pair type's `check_stats` what scoring each pair on its own would have counted: following its
+        `scoring_plan`, each method runs on the pairs no earlier check has disqualified
+
+        :param checks: the grid of each check
+        """
+        stats = self.pair_type.check_stats
+        remaining = np.ones(self.shape, dtype=bool)
+        calls, rejections = {}, {}
+        for name in self.pair_type.scoring_plan():
+            calls[name] = int(remaining.sum())
+            if name in checks:
+                rejected = checks[name] & remaining
+                rejections[name] = int(rejected.sum())
+                remaining &= ~rejected
+        stats.record(remaining.size, calls, rejections)
+
+    @property
+    def weights(self) -> dict[str, int]:
+        return self.pair_type.scoring_weights
+
+    def _check_score(self, scores: IntGrid) -> BoolGrid:
+        min_score = self.pair_type.min_score
+        thresholds = np.array(
+            [min_score.get(year, 0) for year in self.candidates["cohort"].tolist()],
+            dtype=np.int64,
+        )
+        return scores < thresholds[:, np.newaxis]
+
+    def _check_location(self) -> BoolGrid:
+        c, r = self.candidates, self.roles
+        in_first = contains(r["locations"], c["first_location"]).T
+        in_second = contains(r["locations"], c["second_location"]).T
+        acceptable = r["from_anywhere"][np.newaxis, :] | in_first | in_second
+        return ~c["can_relocate"][:, np.newaxis] & ~acceptable
+
+    def _score_location(self) -> IntGrid:
+        c, r = self.candidates, self.roles
+        relocated = np.where(c["has_relocated"], self.weights["has_relocated"], 0)
+        first = (self.weights["first_location"] + relocated)[:, np.newaxis]
+        second = (self.weights["second_location"] + relocated)[:, np.newaxis]
+        is_first = (
+            r["from_anywhere"][np.newaxis, :]
+            | contains(r["locations"], c["first_location"]).T
+            | c["first_location_any"][:, np.newaxis]
+        )
+        is_second = (
+            contains(r["locations"], c["second_location"]).T
+            | c["second_location_any"][:, np.newaxis]
+        )
+        return np.where(is_first, first, np.where(is_second, second, 0))
+
+    def _check_clearance(self) -> BoolGrid:
+        return self._outer_less(self.candidates["clearance"], self.roles["clearance"])
+
+    def _check_nationality(self) -> BoolGrid:
+        return self._outer_less(
+            self.candidates["nationality"], self.roles["nationality_requirement"]
+        )
+
+    def _check_passport(self) -> BoolGrid:
+        return np.outer(
+            ~self.candidates["has_passport"], self.roles["passport_requirement"]
+        )
+
+    def _check_year_group(self) -> BoolGrid:
+        return ~self._suitable_year_group()
+
+    def _check_ethics(self) -> BoolGrid:
+        c, r = self.candidates, self.roles
+        return np.outer(c["no_immigration"], r["immigration_role"]) | np.outer(
+            c["no_defence"], r["defence_role"]
+        )
+
+    def _check_stretch(self) -> BoolGrid:
+        c, r = self.candidates, self.roles
+        return np.outer(
+            ~c["wants_private_office"], r["private_office_role"]
+        ) | np.outer(~c["wants_line_management"], r["line_management_role"])
+
+    def _score_stretch(self) -> IntGrid:
+        c, r = self.candidates, self.roles
+        matches = np.outer(c["wants_private_office"], r["private_office_role"]).astype(
+            np.int64
+        ) + np.outer(c["wants_line_management"], r["line_management_role"])
+        return matches * self.weights["stretch"]
+
+    def _score_year_only(self) -> IntGrid:
+        only_year = self.roles["cohort_count"] == 1
+        return (self._suitable_year_group() & only_year[np.newaxis, :]) * self.weights[
+            "year_appropriate"
+        ]
+
+    def _score_department(self) -> IntGrid:
+        return ~self._prior_department() * self.weights["department"]
+
+    def _score_skill(self) -> IntGrid:
+        c, r = self.candidates, self.roles
+        scores = self._outer_equal(c["last_secondary_skill"], r["secondary_focus"]) * -5
+        bonus = self.weights["skill"]
+        for skill in ("primary_skill", "secondary_skill"):
+            for focus in ("skill_focus", "secondary_focus"):
+                scores += self._outer_equal(c[skill], r[focus]) * bonus
+                bonus -= 5
+        return scores
+
+    def _suitable_year_group(self) -> BoolGrid:
+        candidate_bits = np.left_shift(1, self.candidates["cohort"])
+        return (
+            candidate_bits[:, np.newaxis] & self.roles["cohorts"][np.newaxis, :]
+        ) != 0
+
+    def _prior_department(self) -> BoolGrid:
+        return contains(self.candidates["prior_departments"], self.roles["department"])
+
+    @staticmethod
+    def _outer_less(candidate_values: np.ndarray, role_values: np.ndarray) -> BoolGrid:
+        return candidate_values[:, np.newaxis] < role_values[np.newaxis, :]
+
+    @staticmethod
+    def _outer_equal(candidate_values: np.ndarray, role_values: np.ndarray) -> BoolGrid:
+        return candidate_values[:, np.newaxis] == role_values[np.newaxis, :]
+
+    @staticmethod
+    def _array(values: Iterable[int]) -> np.ndarray:
+        return np.array([int(v) for v in values], dtype=np.int64)
+
+    @staticmethod
+    def _flags(values: Iterable[bool]) -> np.ndarray:
+        return np.array([bool(v) for v in values], dtype=bool)
+
+    def _intern(self, vocabulary: str, values: Iterable[Hashable]) -> np.ndarray:
+        intern = self.registry[vocabulary].intern
+        return np.array([intern(v) for v in values], dtype=np.int64)
+
+    def _intern_sets(
+        self, vocabulary: str, values: Sequence[Iterable[Hashable]]
+    ) -> _SetColumn:
+        lookup = self.registry[vocabulary]
+        rows, ids = [], []
+        for row, value in enumerate(values):
+            for v in value:
+                rows.append(row)
+                ids.append(lookup.intern(v))
+        return _SetColumn(vocabulary, to_bitsets(rows, ids, len(values), len(lookup)))
+
+    def _translation(self, table: Table, vocabulary: str) -> np.ndarray:
+        """
+        :return: an array mapping the IDs of one of the table's vocabularies to this scorer's IDs
+        """
+        intern = self.registry[vocabulary].intern
+        return np.array([intern(w) for w in table.registry[vocabulary]], dtype=np.int64)
+
+    def _translate(self, table: Table, vocabulary: str, ids: np.ndarray) -> np.ndarray:
+        if table.registry is self.registry:
+            return ids.astype(np.int64)
+        return self._translation(table, vocabulary)[ids]
+
+    def _translate_set(
+        self, table: Table, vocabulary: str, bits: np.ndarray
+    ) -> _SetColumn:
+        if table.registry is self.registry:
+            return _SetColumn(vocabulary, bits)
+        rows, ids = bitset_members(bits)
+        translated = self._translation(table, vocabulary)[ids]
+        return _SetColumn(
+            vocabulary,
+            to_bitsets(rows, translated, len(bits), len(self.registry[vocabulary])),
+        )
+
+    def _table_has(
+        self, table: Table, vocabulary: str, bits: np.ndarray, word: Hashable
+    ) -> np.ndarray:
+        """
+        :return: for each bitset, whether `word` is a member
+        """
+        return has_member(bits, table.registry[vocabulary].ids.get(word))
+
+    def _finalise(self, columns: dict) -> dict[str, np.ndarray]:
+        """
+        Widen set-valued columns to a bit for every word, now the size of each vocabulary is fixed
+
+        :param columns: the encoded columns
+        :return: the columns, with every value a NumPy array
+        """
+        for name, column in columns.items():
+            if isinstance(column, _SetColumn):
+                columns[name] = widen(
+                    column.bits, len(self.registry[column.vocabulary])
+                )
+        return columns
+
+
+class GeneralistColumnarScorer(ColumnarScorer):
+    pair_type = GeneralistPair
+
+    preferences = {
+        "Anchor": "_score_anchor",
+        "Location": "_score_location",
+        "Department": "_score_department",
+        "Skill": "_score_skill",
+    }
+
+    def encode_candidates(self, candidates: Sequence[GeneralistCandidate]) -> dict:  # type: ignore
+        columns = super().encode_candidates(candidates)
+        if rows_of(candidates):
+            return columns
+        columns.update(
+            {
+                "travel": self._array([c.travel_requirements for c in candidates]),
+                "dept_prefs": self._intern_sets(
+                    "department", [c.dept_prefs for c in candidates]
+                ),
+                "working_patterns": self._intern_sets(
+                    "working_pattern", [c.working_patterns for c in candidates]
+                ),
+                "accessibility": self._intern_sets(
+                    "accessibility", [c.accessibility_needs for c in candidates]
+                ),
+                "primary_anchor": self._intern(
+                    "anchor", [c.primary_anchor for c in candidates]
+                ),
+                "secondary_anchor": self._intern(
+                    "anchor", [c.secondary_anchor for c in candidates]
+                ),
+            }
+        )
+        for preference in self.preferences:
+            columns[f"prefers_{preference}"] = self._flags(
+                [preference in c.match_preferences for c in candidates]
+            )
+        return columns
+
+    def encode_candidate_table(self, table: Table, index: np.ndarray) -> dict:
+        columns = super().encode_candidate_table(table, index)
+        c = {name: column[index] for name, column in table.columns.items()}
+        columns.update(
+            {
+                "travel": c["travel_requirements"].astype(np.int64),
+                "dept_prefs": self._translate_set(table, "department", c["dept_prefs"]),
+                "working_patterns": self._translate_set(
+                    table, "working_pattern", c["working_patterns"]
+                ),
+                "accessibility": self._translate_set(
+                    table, "accessibility", c["accessibility"]
+                ),
+                "primary_anchor": self._translate(table, "anchor", c["primary_anchor"]),
+                "secondary_anchor": self._translate(
+                    table, "anchor", c["secondary_anchor"]
+                ),
+            }
+        )
+        for preference in self.preferences:
+            columns[f"prefers_{preference}"] = self._table_has(
+                table, "preference", c["match_preferences"], preference
+            )
+        return columns
+
+    def encode_roles(self, roles: Sequence[GeneralistRole]) -> dict:  # type: ignore
+        columns = super().encode_roles(roles)
+        if rows_of(roles):
+            return columns
+        columns.update(
+            {
+                "travel": self._array([r.travel_requirements for r in roles]),
+                "working_patterns": self._intern_sets(
+                    "working_pattern", [r.working_patterns for r in roles]
+                ),
+                "accessibility": self._intern_sets(
+                    "accessibility", [r.accessibility_adjustment for r in roles]
+                ),
+                "anchor": self._intern("anchor", [r.anchor for r in roles]),
+            }
+        )
+        return columns
+
+    def encode_role_table(self, table: Table, index: np.ndarray) -> dict:
+        columns = super().encode_role_table(table, index)
+        r = {name: column[index] for name, column in table.columns.items()}
+        columns.update(
+            {
+                "travel": r["travel_requirements"].astype(np.int64),
+                "working_patterns": self._translate_set(
+                    table, "working_pattern", r["working_patterns"]
+                ),
+                "accessibility": self._translate_set(
+                    table, "accessibility", r["accessibility"]
+                ),
+                "anchor": self._translate(table, "anchor", r["anchor"]),
+            }
+        )
+        return columns
+
+    def score(self) -> tuple[IntGrid, BoolGrid]:
+        """
+        As with `GeneralistPair.score_pair`, the preference bonus is added after the minimum score has been checked
+
+        :return: a tuple of the integer score grid and a boolean grid marking disqualified pairs
+        """
+        scores, disqualified = super().score()
+        return scores + self._score_preferences(), disqualified
+
+    def _score_preferences(self) -> IntGrid:
+        """
+        Candidates earn a bonus for each of their match preferences whose scoring method awarded points
+
+        :return: an integer grid
+        """
+        bonus = np.zeros(self.shape, dtype=np.int64)
+        for preference, method_name in self.preferences.items():
+            scored = self.contributions[method_name] > 0
+            prefers = self.candidates[f"prefers_{preference}"][:, np.newaxis]
+            bonus += (scored & prefers) * self.weights["preference"]
+        return bonus
+
+    def _check_accessibility(self) -> BoolGrid:
+        return ~subsets(self.candidates["accessibility"], self.roles["accessibility"])
+
+    def _check_travel(self) -> BoolGrid:
+        return self._outer_less(self.candidates["travel"], self.roles["travel"])
+
+    def _check_prior_departments(self) -> BoolGrid:
+        return self._prior_department()
+
+    def _check_working_pattern(self) -> BoolGrid:
+        return ~subsets(
+            self.candidates["working_patterns"], self.roles["working_patterns"]
+        )
+
+    def _score_department(self) -> IntGrid:
+        preferred = contains(self.candidates["dept_prefs"], self.roles["department"])
+        return preferred * self.weights["department"]
+
+    def _score_anchor(self) -> IntGrid:
+        c, r = self.candidates, self.roles
+        matches = self._outer_equal(
+            c["primary_anchor"], r["anchor"]
+        ) | self._outer_equal(c["secondary_anchor"], r["anchor"])
+        return matches * self.weights["anchor"]
+
+
+SCORERS: tuple[Type[ColumnarScorer], ...] = (ColumnarScorer, GeneralistColumnarScorer)
+
+
+def columnar_scorer_for(pair_type: Type[P]) -> Optional[Type[ColumnarScorer]]:
+    """
+    Find the columnar scorer that mirrors `pair_type`, if there is one
+
+    :param pair_type: the class of `Pair` used to score candidates against roles
+    :return: a `ColumnarScorer` class, or None if `pair_type` can only be scored pair by pair
+    """
+    for scorer in SCORERS:
+        if scorer.supports(pair_type):
+            return (
+                scorer
+                if pair_type is scorer.pair_type
+                else _rescorer(scorer, pair_type)
+            )
+    return None
+
+
+_RESCORERS: dict[tuple[type, type], Type[ColumnarScorer]] = {}
+
+
+def _rescorer(
+    scorer: Type[ColumnarScorer], pair_type: Type[BasePair]
+) -> Type[ColumnarScorer]:
+    """
+    :return: a subclass of `scorer` that takes its weights from, and records its counts in, a reweighted `pair_type`.
+        The same subclass is returned each time for the same scorer and pair type
+    """
+    key = (scorer, pair_type)
+    if key not in _RESCORERS:
+        _RESCORERS.setdefault(
+            key, type(scorer.__name__, (scorer,), {"pair_type": pair_type})
+        )
+    return _RESCORERS[key]
+
+
+class ScoreCache:
+    """
+    The score of every allowed pairing of candidate and role, worked out once for a set of inputs. Scores and
+    disqualifications depend only on the candidates' and roles' own attributes, so every round, cohort and iteration
+    can take its grid from here rather than scoring it again. Candidates are scored in chunks and only the allowed
+    pairings are kept, so memory grows with the number of feasible pairings.
+    """
+
+    chunk_size = 1024
+
+    def __init__(
+        self,
+        candidates: Sequence[CandidateRecord],
+        roles: Sequence[RoleRecord],
+        pair_type: Type[P],
+    ):
+        """
+        :param candidates: every candidate in the intake
+        :param roles: every role in the intake
+        :param pair_type: the class of `Pair` that defines the scoring rules
+        """
+        self.pair_type = pair_type
+        self.candidate_index = {c.uid: i for i, c in enumerate(candidates)}
+        self.role_index = {r.uid: i for i, r in enumerate(roles)}
+        scorer = columnar_scorer_for(pair_type)
+        chunks = []
+        for start in range(0, len(candidates), self.chunk_size):
+            chunk = candidates[start : start + self.chunk_size]
+            if scorer is None:
+                scores, disqualified = score_objects(chunk, roles, pair_type)
+            else:
+                scores, disqualified = scorer(chunk, roles).score()
+            chunks.append(EdgeGrid.from_dense(scores, ~disqualified))
+        self.edges = EdgeGrid.stack(chunks, len(roles))
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.edges.shape
+
+    def rows(self, candidates: Sequence[CandidateRecord]) -> np.ndarray:
+        return np.array(
+            [self.candidate_index[c.uid] for c in candidates], dtype=np.intp
+        )
+
+    def columns(self, roles: Sequence[RoleRecord]) -> np.ndarray:
+        return np.array([self.role_index[r.uid] for r in roles], dtype=np.intp)
+
+    def grid(
+        self, candidates: Sequence[CandidateRecord], roles: Sequence[RoleRecord]
+    ) -> EdgeGrid:
+        """
+        Slice out the grid for a round of matching
+
+        :param candidates: the round's candidates, in the order of the grid's rows
+        :param roles: the round's roles, in the order of the grid's columns
+        """
+        return self.edges.take(self.rows(candidates), self.columns(roles))
+
+    def score(self, candidate_uid: str, role_uid: str) -> int:
+        """
+        :raises KeyError: if the candidate is disqualified from the role
+        """
+        return self.edges.score(
+            self.candidate_index[candidate_uid], self.role_index[role_uid]
+        )
+
+
+def score_objects(
+    candidates: Sequence[CandidateRecord],
+    roles: Sequence[RoleRecord],
+    pair_type: Type[P],
+) -> tuple[IntGrid, BoolGrid]:
+    """
+    Score each pairing with its own `Pair` object, for pair types that have no `ColumnarScorer`. The grid is one
+    `CheckStats.batch`, so scoring a pair takes no lock
+
+    :return: a tuple of the integer score grid and a boolean grid marking disqualified pairs
+    """
+    scores = np.zeros((len(candidates), len(roles)), dtype=np.int32)
+    disqualified = np.zeros(scores.shape, dtype=bool)
+    with pair_type.check_stats.batch(pair_type.replan_every):
+        for i, candidate in enumerate(candidates):
+            for j, role in enumerate(roles):
+                pair = pair_type(candidate, role)
+                scores[i, j] = pair.score_pair()
+                disqualified[i, j] = pair.disqualified
+    return scores, disqualified
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Optional, Sequence
+
+import numpy as np
+
+from fast_stream_22.matching.columns import (
+    SCHEMAS,
+    CandidateRecord,
+    RoleRecord,
+    Schema,
+    Table,
+)
+from fast_stream_22.matching.read_in import content_hash, read_rows, read_tables
+from fast_stream_22.specialism.vocabulary import VocabularyRegistry
+
+SNAPSHOT_VERSION = 1
+MANIFEST = "manifest.json"
+TABLES = ("candidates", "roles")
+
+logger = logging.getLogger(__name__)
+
+
+def _layout(schema: Schema) -> list[list[str]]:
+    return [[field.name, field.kind] for field in schema.fields]
+
+
+def compile_snapshot(
+    candidate_file: str,
+    role_file: str,
+    specialism: Optional[str],
+    directory: str,
+) -> str:
+    """
+    Parse the candidates and roles once and save their columns as `.npy` files, with a manifest recording the
+    snapshot version, the layout of the columns, the vocabularies and a hash of the CSVs they came from. The manifest
+    is written last, so a snapshot that wasn't finished is never loaded.
+
+    :param candidate_file: path to the candidates CSV
+    :param role_file: path to the roles CSV
+    :param specialism: the scheme specialism. SEFS has no columnar layout, so can't be compiled
+    :param directory: where to write the snapshot
+    :return: the path to the manifest
+    """
+    if specialism not in SCHEMAS:
+        raise ValueError(f"Inputs for {specialism} can't be compiled")
+    tables = read_tables(candidate_file, role_file, specialism)
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    columns = {}
+    for name, table in zip(TABLES, tables):
+        columns[name] = list(table.columns)
+        for column, values in table.columns.items():
+            np.save(os.path.join(directory, f"{name}.{column}.npy"), values)
+    registry = tables[0].registry
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "specialism": specialism,
+        "hash": content_hash(candidate_file, role_file),
+        "layout": [_layout(schema) for schema in SCHEMAS[specialism]],
+        "columns": columns,
+        "vocabularies": {kind: registry[kind].words for kind in registry.kinds()},
+    }
+    with open(manifest_path, "w") as file:
+        json.dump(manifest, file)
+    return manifest_path
+
+
+def load_snapshot(
+    directory: str,
+    candidate_file: str,
+    role_file: str,
+    specialism: Optional[str],
+) -> Optional[tuple[Table, Table]]:
+    """
+    Load a snapshot made by `compile_snapshot`, if it is fresh. The columns are memory-mapped, so nothing is copied or
+    parsed until it is read.
+
+    :param directory: where the snapshot was written
+    :param candidate_file: path to the candidates CSV the snapshot should have been compiled from
+    :param role_file: path to the roles CSV
+    :param specialism: the scheme specialism
+    :return: a tuple of the candidate table and the role table, or None if there is no snapshot, or it was made by a
+        different version, for a different specialism or from different CSVs
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST)) as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        return None
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        logger.info(
+            f"Snapshot in {directory} is from version {manifest.get('version')}"
+        )
+        return None
+    if specialism not in SCHEMAS or manifest["specialism"] != specialism:
+        logger.info(f"Snapshot in {directory} is for {manifest['specialism']}")
+        return None
+    schemas = SCHEMAS[specialism]
+    if manifest["layout"] != [_layout(schema) for schema in schemas]:
+        logger.info(f"Snapshot in {directory} has a different layout")
+        return None
+    if manifest["hash"] != content_hash(candidate_file, role_file):
+        logger.info(f"Snapshot in {directory} is stale")
+        return None
+    registry = VocabularyRegistry()
+    for kind, words in manifest["vocabularies"].items():
+        for word in words:
+            registry[kind].intern(word)
+    candidates, roles = (
+        Table(
+            schema,
+            {
+                column: np.load(
+                    os.path.join(directory, f"{name}.{column}.npy"), mmap_mode="r"
+                )
+                for column in manifest["columns"][name]
+            },
+            registry,
+        )
+        for name, schema in zip(TABLES, schemas)
+    )
+    return candidates, roles
+
+
+def load_inputs(
+    candidate_file: str,
+    role_file: str,
+    specialism: Optional[str],
+    snapshot: Optional[str] = None,
+) -> tuple[Sequence[CandidateRecord], Sequence[RoleRecord]]:
+    """
+    Read the candidates and roles from a snapshot, if it is given and fresh, and otherwise from the CSVs
+
+    :param candidate_file: path to the candidates CSV
+    :param role_file: path to the roles CSV
+    :param specialism: the scheme specialism
+    :param snapshot: a directory written by `compile_snapshot`
+    :return: a tuple of the candidates and the roles
+    """
+    tables = (
+        load_snapshot(snapshot, candidate_file, role_file, specialism)
+        if snapshot
+        else None
+    )
+    if tables is None:
+        return read_rows(candidate_file, role_file, specialism)
+    candidates, roles = tables
+    return candidates.rows(), roles.rows()
@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import sys
+from typing import Optional, Type
+
+import numpy as np
+from munkres import DISALLOWED, Munkres, UnsolvableMatrix
+
+from fast_stream_22.matching.edges import EdgeGrid
+
+Assignment = list[tuple[int, int]]
+
+logger = logging.getLogger(__name__)
+
+
+class Solver:
+    """
+    Solve the assignment problem for a grid of scores. Every solver finds the pairing with the highest total score
+    in which every row is paired (or, if there are more rows than columns, every column is paired), and raises
+    `UnsolvableMatrix` if the allowed cells make that impossible. Solvers that spend most of their time in NumPy,
+    which releases the GIL, set `releases_gil`, so that groups of cohorts can be matched on threads.
+    """
+
+    name: str = ""
+    warm_starts: bool = False
+    releases_gil: bool = False
+
+    def solve(self, scores: np.ndarray, allowed: np.ndarray) -> Assignment:
+        """
+        :param scores: an integer grid of scores, with candidates as rows and roles as columns
+        :param allowed: a boolean grid of the same shape, which is False where a pairing is disqualified
+        :return: a list of (row, column) tuples
+        """
+        raise NotImplementedError
+
+    def solve_edges(self, edges: EdgeGrid) -> Assignment:
+        """
+        Solve for the allowed pairings in an `EdgeGrid`. Solvers that work on dense grids expand it first.
+        """
+        return self.solve(*edges.to_dense())
+
+    def solve_from(
+        self, scores: np.ndarray, allowed: np.ndarray, duals: Optional[np.ndarray]
+    ) -> tuple[Assignment, Optional[np.ndarray]]:
+        """
+        Solve, starting from the column potentials of an earlier, similar grid. Solvers that can't warm start ignore
+        `duals` and return None in their place.
+
+        :param scores: an integer grid of scores
+        :param allowed: a boolean grid of the same shape, which is False where a pairing is disqualified
+        :param duals: a potential for each column, or None to solve from cold
+        :return: a tuple of the assignment and the column potentials to start the next solve from
+        """
+        return self.solve(scores, allowed), None
+
+
+def _pairs(col4row: np.ndarray, transposed: bool) -> Assignment:
+    if transposed:
+        return sorted((int(col), row) for row, col in enumerate(col4row))
+    return [(row, int(col)) for row, col in enumerate(col4row)]
+
+
+class MunkresSolver(Solver):
+    """
+    The original solver, using the pure-Python Munkres algorithm. It is O(n³) in Python, so it is best kept for
+    small cohorts and for checking the other solvers.
+    """
+
+    name = "munkres"
+
+    def solve(self, scores: np.ndarray, allowed: np.ndarray) -> Assignment:
+        """
+        Grids with more rows than columns are transposed first. `Munkres` refuses any grid where two rows have the
+        same single allowed cell, which is only a true dead end when every row must be paired.
+        """
+        if 0 in scores.shape:
+            return []
+        if scores.shape[0] > scores.shape[1]:
+            return sorted((row, col) for col, row in self.solve(scores.T, allowed.T))
+        costs = np.where(allowed, sys.maxsize - scores.astype(object), DISALLOWED)
+        return Munkres().compute(costs.tolist())
+
+
+class _ShortestAugmentingPath(Solver):
+    """
+    Shared machinery for solvers that add one row at a time along the shortest augmenting path, keeping row and
+    column potentials so that reduced costs are never negative. Rows are always the shorter side; a grid with more
+    rows than columns is transposed first.
+    """
+
+    def solve(self, scores: np.ndarray, allowed: np.ndarray) -> Assignment:
+        transposed = scores.shape[0] > scores.shape[1]
+        if transposed:
+            scores, allowed = scores.T, allowed.T
+        if 0 in scores.shape:
+            return []
+        if not allowed.any(axis=1).all():
+            raise UnsolvableMatrix("A row is entirely DISALLOWED.")
+        costs = np.where(allowed, scores[allowed].max() - scores, 0).astype(np.float64)
+        return _pairs(self._assign(costs, allowed), transposed)
+
+    def _assign(self, costs: np.ndarray, allowed: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class JonkerVolgenantSolver(_ShortestAugmentingPath):
+    """
+    A NumPy implementation of the Jonker-Volgenant shortest augmenting path algorithm. Each step of the search
+    relaxes a whole row of the grid at once, so the work done in Python grows with the length of the augmenting
+    paths rather than with the number of cells.
+    """
+
+    name = "jv"
+    warm_starts = True
+    releases_gil = True
+
+    def solve_from(
+        self, scores: np.ndarray, allowed: np.ndarray, duals: Optional[np.ndarray]
+    ) -> tuple[Assignment, Optional[np.ndarray]]:
+        """
+        Row potentials are rebuilt from `duals` so that no reduced cost is negative. Potentials that are all zero
+        are no help, so the grid is solved from cold. A warm start can still finish
+        with potentials that don't prove the assignment optimal, in which case the grid is solved again from cold.
+        Grids with more rows than columns are always solved from cold.
+        """
+        if 0 in scores.shape or scores.shape[0] > scores.shape[1]:
+            return self.solve(scores, allowed), None
+        if not allowed.any(axis=1).all():
+            raise UnsolvableMatrix("A row is entirely DISALLOWED.")
+        costs = np.where(allowed, scores[allowed].max() - scores, np.inf)
+        if duals is not None and duals.any():
+            col4row, u, v = self._augment(costs, duals)
+            if self._is_optimal(costs, col4row, u, v):
+                return _pairs(col4row, False), v
+            logger.info("Warm start did not reach an optimal assignment")
+        col4row, _, v = self._augment(costs)
+        return _pairs(col4row, False), v
+
+    def _assign(self, costs: np.ndarray, allowed: np.ndarray) -> np.ndarray:
+        return self._augment(np.where(allowed, costs, np.inf))[0]
+
+    @staticmethod
+    def _augment(
+        costs: np.ndarray, duals: Optional[np.ndarray] = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :param costs: the cost of each cell, which is infinite where a pairing is disallowed
+        :param duals: starting column potentials. Defaults to zeroes
+        :return: a tuple of the column assigned to each row, and the row and column potentials
+        """
+        n_rows, n_cols = costs.shape
+        if duals is None:
+            u = np.zeros(n_rows)
+            v = np.zeros(n_cols)
+        else:
+            v = duals.astype(np.float64)
+            u = (costs - v).min(axis=1)
+        col4row = np.full(n_rows, -1)
+        row4col = np.full(n_cols, -1)
+        for current_row in range(n_rows):
+            shortest = np.full(n_cols, np.inf)
+            path = np.full(n_cols, -1)
+            remaining = np.ones(n_cols, dtype=bool)
+            min_value = 0.0
+            row = current_row
+            while True:
+                reduced = min_value + costs[row] - u[row] - v
+                better = remaining & (reduced < shortest)
+                path[better] = row
+                shortest[better] = reduced[better]
+                candidates = np.where(remaining, shortest, np.inf)
+                col = int(np.argmin(candidates))
+                min_value = candidates[col]
+                if min_value == np.inf:
+                    raise UnsolvableMatrix("Matrix cannot be solved!")
+                free = (candidates == min_value) & (row4col == -1)
+                if free.any():
+                    col = int(np.argmax(free))
+                remaining[col] = False
+                if row4col[col] == -1:
+                    sink = col
+                    break
+                row = row4col[col]
+            scanned = ~remaining
+            scanned[sink] = False
+            u[current_row] += min_value
+            u[row4col[scanned]] += min_value - shortest[scanned]
+            v[scanned] -= min_value - shortest[scanned]
+            col = sink
+            while True:
+                row = path[col]
+                row4col[col] = row
+                col4row[row], col = col, col4row[row]
+                if row == current_row:
+                    break
+        return col4row, u, v
+
+    @staticmethod
+    def _is_optimal(
+        costs: np.ndarray,
+        col4row: np.ndarray,
+        u: np.ndarray,
+        v: np.ndarray,
+        tolerance: float = 1e-6,
+    ) -> bool:
+        """
+        Check the potentials prove the assignment has the lowest cost. No reduced cost may be negative, every
+        assigned cell must have a reduced cost of zero, and, as not every column is assigned, no column may have a
+        higher potential than the unassigned ones.
+        """
+        reduced = costs - u[:, np.newaxis] - v
+        if (reduced < -tolerance).any():
+            return False
+        if np.abs(reduced[np.arange(len(col4row)), col4row]).max() > tolerance:
+            return False
+        unassigned = np.ones(len(v), dtype=bool)
+        unassigned[col4row] = False
+        if not unassigned.any():
+            return True
+        return (
+            np.ptp(v[unassigned]) <= tolerance
+            and v.max() <= v[unassigned].min() + tolerance
+        )
+
+
+class SparseSolver(Solver):
+    """
+    A shortest augmenting path solver that only ever looks at allowed cells. Each row's allowed columns are held as
+    an adjacency list and searched with Dijkstra's algorithm, so the work grows with the number of feasible
+    pairings rather than with candidates × roles.
+    """
+
+    name = "sparse"
+
+    def solve(self, scores: np.ndarray, allowed: np.ndarray) -> Assignment:
+        return self.solve_edges(EdgeGrid.from_dense(scores, allowed))
+
+    def solve_edges(self, edges: EdgeGrid) -> Assignment:
+        """
+        Works on the edges directly, so the grid is never expanded. Grids with more rows than columns are transposed
+        first.
+        """
+        transposed = edges.shape[0] > edges.shape[1]
+        if transposed:
+            edges = edges.transpose()
+        if 0 in edges.shape:
+            return []
+        if not edges.row_degrees().all():
+            raise UnsolvableMatrix("A row is entirely DISALLOWED.")
+        costs = (edges.scores.max() - edges.scores).astype(np.float64)
+        col4row = self.assign_edges(edges.shape, edges.starts, edges.cols, costs)
+        return _pairs(col4row, transposed)
+
+    @staticmethod
+    def assign_edges(
+        shape: tuple[int, int],
+        starts: np.ndarray,
+        cols: np.ndarray,
+        costs: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Assign every row to a column, given the allowed cells as compressed rows
+
+        :param shape: the number of rows and columns
+        :param starts: for each row, the offset of its first edge; the last value is the number of edges
+        :param cols: the column of each edge
+        :param costs: the non-negative cost of each edge
+        :return: the column assigned to each row
+        """
+        n_rows, n_cols = shape
+        adjacency = [
+            list(zip(cols[start:end].tolist(), costs[start:end].tolist()))
+            for start, end in zip(starts[:-1].tolist(), starts[1:].tolist())
+        ]
+        u = [0.0] * n_rows
+        v = [0.0] * n_cols
+        col4row = [-1] * n_rows
+        row4col = [-1] * n_cols
+        for current_row in range(n_rows):
+            shortest: dict[int, float] = {}
+            path: dict[int, int] = {}
+            scanned: list[int] = []
+            done: set[int] = set()
+            heap: list[tuple[float, int]] = []
+            row, min_value, sink = current_row, 0.0, -1
+            while sink == -1:
+                for col, cost in adjacency[row]:
+                    if col in done:
+                        continue
+                    reduced = min_value + cost - u[row] - v[col]
+                    if reduced < shortest.get(col, np.inf):
+                        shortest[col] = reduced
+                        path[col] = row
+                        heapq.heappush(heap, (reduced, col))
+                while heap:
+                    min_value, col = heapq.heappop(heap)
+                    if col not in done and min_value == shortest[col]:
+                        break
+                else:
+                    raise UnsolvableMatrix("Matrix cannot be solved!")
+                done.add(col)
+                if row4col[col] == -1:
+                    sink = col
+                else:
+                    scanned.append(col)
+                    row = row4col[col]
+            u[current_row] += min_value
+            for col in scanned:
+                u[row4col[col]] += min_value - shortest[col]
+                v[col] -= min_value - shortest[col]
+            col = sink
+            while True:
+                row = path[col]
+                row4col[col] = row
+                col4row[row], col = col, col4row[row]
+                if row == current_row:
+                    break
+        return np.array(col4row)
+
+
+SOLVERS: dict[str, Type[Solver]] = {
+    solver.name: solver
+    for solver in (MunkresSolver, JonkerVolgenantSolver, SparseSolver)
+}
+
+
+def get_solver(name: str) -> Solver:
+    """
+    :param name: the name of a solver, as given to `pairing_script --solver`
+    :return: an instance of that solver
+    """
+    try:
+        return SOLVERS[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown solver {name}. Choose from {', '.join(SOLVERS)}"
+        ) from None
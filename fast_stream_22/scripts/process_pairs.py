@@ -1,10 +1,32 @@
+import signal
+import threading
+from functools import partial
+from typing import Iterator, Optional
+
 import click
 
-from fast_stream_22.matching.match import conduct_matching
+from fast_stream_22.matching.explain import explain_pair
+from fast_stream_22.matching.jobs import MatchingJob
+from fast_stream_22.matching.match import (
+    ENGINES,
+    IterationOutcome,
+    SearchBudget,
+    compare_engines,
+    new_master_seed,
+    pair_type_for,
+    prepare_inputs,
+    search_matching,
+    stream_matching,
+)
+from fast_stream_22.matching.metrics import Metrics, NULL_METRICS
+from fast_stream_22.matching.output import pair_writer
+from fast_stream_22.matching.snapshot import compile_snapshot
+from fast_stream_22.matching.solvers import SOLVERS, MunkresSolver
 import time
 
 
-@click.command
+@click.group(invoke_without_command=True)
+@click.pass_context
 @click.option(
     "--iterations", help="The number of iterations to go through", default=10, type=int
 )
@@ -17,33 +39,503 @@ import time
 @click.option(
     "--bids", help="Path to file containing bids", default="./bids.csv", type=str
 )
+@click.option(
+    "--solver",
+    help="The assignment solver to use",
+    default=MunkresSolver.name,
+    type=click.Choice(list(SOLVERS)),
+)
+@click.option(
+    "--workers",
+    help="The number of processes to run iterations in",
+    default=1,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--seed",
+    help="The master seed. If not given, one is chosen and printed",
+    default=None,
+    type=int,
+)
+@click.option(
+    "--replay-iteration",
+    help="Re-run only this iteration of the search with the given --seed",
+    default=None,
+    type=int,
+)
+@click.option(
+    "--incremental",
+    help="Update each cohort's grid between rounds instead of rebuilding it",
+    is_flag=True,
+)
+@click.option(
+    "--snapshot",
+    help=(
+        "A directory written by `compile`. Used in place of the CSVs if they haven't"
+        " changed"
+    ),
+    default="./snapshot",
+    type=str,
+)
+@click.option(
+    "--check-stats",
+    help="Print how many pairs each check ran on and disqualified",
+    is_flag=True,
+)
+@click.option(
+    "--trace",
+    help=(
+        "Write every scoring decision to this file: a CSV if it ends .csv, otherwise"
+        " compressed NumPy columns"
+    ),
+    default=None,
+    type=str,
+)
+@click.option(
+    "--engine",
+    help=(
+        "Match each cohort in rounds (rounds), each cohort in one min-cost flow with"
+        " the bids as quotas (flow), or every cohort at once, pricing the roles more"
+        " than one cohort wants (joint)"
+    ),
+    default="rounds",
+    type=click.Choice(sorted(ENGINES)),
+)
+@click.option(
+    "--cohort-workers",
+    help=(
+        "Match cohorts that compete for none of the same roles at the same time, on"
+        " this many threads, where the solver releases the GIL (jv). Otherwise they"
+        " are matched in turn"
+    ),
+    default=None,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--time-budget",
+    help="Stop starting iterations after this many seconds",
+    default=None,
+    type=click.FloatRange(min=0),
+)
+@click.option(
+    "--target-success",
+    help="Stop once an iteration has this many departments scoring above criteria",
+    default=None,
+    type=int,
+)
+@click.option(
+    "--patience",
+    help="Stop once this many iterations in a row haven't beaten the best score",
+    default=None,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--keep",
+    help=(
+        "With an adaptive stop, the number of best iterations by each measure to keep"
+        " and print"
+    ),
+    default=5,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--output",
+    help=(
+        "Write the pairs to this file instead of printing them: compressed NumPy"
+        " columns if it ends .npz, otherwise CSV"
+    ),
+    default=None,
+    type=str,
+)
+@click.option(
+    "--profile",
+    help=(
+        "Print the time spent in each stage, the number of rounds and failures, and the"
+        " sizes of the grids"
+    ),
+    is_flag=True,
+)
+@click.option(
+    "--progress",
+    help=(
+        "Show a live progress line, and stop after the current iteration on Ctrl-C,"
+        " keeping the iterations run"
+    ),
+    is_flag=True,
+)
 def process_matches(
+    ctx: click.Context,
     bids: str,
     roles: str,
     candidates: str,
     senior_first: bool,
     specialism: str,
     iterations: int,
+    solver: str,
+    workers: int,
+    seed: Optional[int],
+    replay_iteration: Optional[int],
+    incremental: bool,
+    snapshot: str,
+    check_stats: bool,
+    trace: Optional[str],
+    engine: str,
+    cohort_workers: Optional[int],
+    time_budget: Optional[float],
+    target_success: Optional[int],
+    patience: Optional[int],
+    keep: int,
+    output: Optional[str],
+    profile: bool,
+    progress: bool,
 ):
+    if ctx.invoked_subcommand is not None:
+        return
+    budget = None
+    if (time_budget, target_success, patience) != (None, None, None):
+        if replay_iteration is not None:
+            raise click.UsageError(
+                "--replay-iteration can't be combined with an adaptive stop"
+            )
+        if progress:
+            raise click.UsageError("--progress can't be combined with an adaptive stop")
+        budget = SearchBudget(time_budget, target_success, patience, keep)
+    if replay_iteration is not None and seed is None:
+        raise click.UsageError(
+            "--replay-iteration needs the --seed of the original run"
+        )
+    if seed is None:
+        seed = new_master_seed()
     start = time.time()
-    cohort_pairings = conduct_matching(
-        bids, roles, candidates, senior_first, specialism, iterations
-    )
+    metrics = Metrics() if profile else None
+    search = None
+    if progress:
+        job = MatchingJob(
+            partial(
+                prepare_inputs,
+                bids,
+                roles,
+                candidates,
+                senior_first,
+                specialism,
+                solver,
+                incremental,
+                snapshot,
+                trace is not None,
+                engine,
+                cohort_workers,
+                metrics,
+            ),
+            range(iterations) if replay_iteration is None else [replay_iteration],
+            seed,
+            workers,
+        )
+        outcomes = follow_job(job)
+    elif budget is None:
+        outcomes = stream_matching(
+            bids,
+            roles,
+            candidates,
+            senior_first,
+            specialism,
+            iterations,
+            solver,
+            workers=workers,
+            seed=seed,
+            replay_iteration=replay_iteration,
+            incremental=incremental,
+            snapshot=snapshot,
+            trace=trace is not None,
+            engine=engine,
+            cohort_workers=cohort_workers,
+            profile=metrics,
+        )
+    else:
+        inputs = prepare_inputs(
+            bids,
+            roles,
+            candidates,
+            senior_first,
+            specialism,
+            solver,
+            incremental,
+            snapshot,
+            trace is not None,
+            engine,
+            cohort_workers,
+            metrics,
+        )
+        search = search_matching(inputs, range(iterations), seed, budget, workers)
+        outcomes = iter(search.outcomes.items())
+    best_iteration_by_score = best_iteration_by_success_bound = None
+    recorder = metrics or NULL_METRICS
+    with pair_writer(output) as writer:
+        for iteration, outcome in outcomes:
+            with recorder.time("write"):
+                writer.write(iteration, outcome)
+            if (
+                best_iteration_by_score is None
+                or outcome.total_score > best_iteration_by_score.total_score
+            ):
+                best_iteration_by_score = outcome
+            if (
+                best_iteration_by_success_bound is None
+                or outcome.success_count > best_iteration_by_success_bound.success_count
+            ):
+                best_iteration_by_success_bound = outcome
     end = time.time()
-    for iteration, outcome in cohort_pairings.items():
-        for cohort_name, cohort in outcome.outcomes.items():
-            for pair in cohort:
-                click.echo(f"{iteration},{cohort_name.name},{','.join(map(str, pair))}")
-    best_iteration_by_score = max(
-        cohort_pairings.values(), key=lambda outcome: outcome.total_score
-    )
-    best_iteration_by_success_bound = max(
-        cohort_pairings.values(), key=lambda outcome: outcome.success_count
-    )
+    if best_iteration_by_score is None:
+        raise click.ClickException("No iteration could be solved")
+    if check_stats:
+        stats = pair_type_for(specialism, trace=trace is not None).check_stats
+        click.echo("method,calls,rejections,rejection_rate")
+        for name, calls, rejections, rate in stats.report():
+            click.echo(f"{name},{calls},{rejections},{rate:.3f}")
+        click.echo(f"Methods run per pair: {stats.calls_per_pair():.2f}")
+    if trace is not None:
+        buffer = pair_type_for(specialism, trace=True).trace_buffer
+        if trace.endswith(".csv"):
+            buffer.to_csv(trace)
+        else:
+            buffer.save_columns(trace)
+        click.echo(f"{len(buffer)} scoring decisions written to {trace}")
+    if metrics is not None:
+        print_profile(metrics)
+    if search is not None:
+        click.echo(
+            f"Stopped after {search.iterations_run} iterations:"
+            f" {search.stopped_because}"
+        )
     click.echo(f"Task completed in {(end-start)} seconds")
+    click.echo(f"Master seed: {seed}")
     click.echo(f"Best iteration by score: {best_iteration_by_score.iteration}")
     click.echo(
         "Best iteration by departments scoring above criteria"
         f" ({best_iteration_by_success_bound.success_count}):"
         f" {best_iteration_by_success_bound.iteration}"
     )
+
+
+def follow_job(job: MatchingJob) -> Iterator[tuple[int, IterationOutcome]]:
+    """
+    Run the job in the background, showing its progress on one line of stderr. While it runs, Ctrl-C cancels it,
+    and a second Ctrl-C stops at once
+
+    :return: an iterator of (iteration index, outcome) tuples in iteration order, leaving out iterations that
+        couldn't be solved
+    """
+
+    def cancel(signum, frame):
+        if job.cancelled:
+            raise KeyboardInterrupt
+        job.cancel()
+
+    handles_signals = threading.current_thread() is threading.main_thread()
+    if handles_signals:
+        previous = signal.signal(signal.SIGINT, cancel)
+    width = 0
+    try:
+        events = job.events()
+        job.start()
+        for event in events:
+            line = event.progress.describe()
+            click.echo(f"\r{line.ljust(width)}", err=True, nl=False)
+            width = len(line)
+            if event.outcome is not None:
+                yield event.iteration, event.outcome
+    finally:
+        if handles_signals:
+            signal.signal(signal.SIGINT, previous)
+        click.echo(err=True)
+    if job.status == "failed":
+        raise click.ClickException(f"Matching failed: {job.error}")
+    if job.status == "cancelled":
+        click.echo(
+            (
+                f"Cancelled after {job.iterations_done} of"
+                f" {len(job.iterations)} iterations"
+            ),
+            err=True,
+        )
+
+
+def print_profile(metrics: Metrics) -> None:
+    """
+    Print where a run spent its time, what it counted and the sizes of the grids it scored
+    """
+    click.echo("stage,seconds,calls")
+    for stage, seconds, calls in metrics.stages():
+        click.echo(f"{stage},{seconds:.4f},{calls}")
+    click.echo("counter,value")
+    for name, value in sorted(metrics.counts.items()):
+        click.echo(f"{name},{value}")
+    click.echo(
+        f"Largest grid: {metrics.largest['grid_rows']} candidates by"
+        f" {metrics.largest['grid_cols']} roles."
+        f" {metrics.disqualified_share:.1%} of the cells scored were disqualified"
+    )
+
+
+@process_matches.command("compile")
+@click.option("--specialism", help="The scheme specialism", default=None, type=str)
+@click.option(
+    "--candidates", help="Path to candidates file", default="./candidates.csv", type=str
+)
+@click.option("--roles", help="Path to roles file", default="./roles.csv", type=str)
+@click.option(
+    "--output",
+    help="The directory to write the snapshot to",
+    default="./snapshot",
+    type=str,
+)
+def compile_inputs(specialism: str, candidates: str, roles: str, output: str):
+    """
+    Parse the candidates and roles once into a snapshot that later runs load instead of the CSVs
+    """
+    start = time.time()
+    try:
+        manifest = compile_snapshot(candidates, roles, specialism, output)
+    except ValueError as error:
+        raise click.UsageError(str(error))
+    click.echo(f"Snapshot written to {manifest} in {time.time() - start} seconds")
+
+
+@process_matches.command("explain")
+@click.option("--candidate", help="The candidate's uid", required=True, type=str)
+@click.option("--role", help="The role's uid", required=True, type=str)
+@click.option(
+    "--iteration",
+    help="Also say who the candidate was paired with in this iteration of --results",
+    default=None,
+    type=int,
+)
+@click.option(
+    "--results",
+    help="A file holding the output of an earlier run",
+    default=None,
+    type=str,
+)
+@click.option(
+    "--top", help="The number of alternative roles to list", default=5, type=int
+)
+@click.option("--specialism", help="The scheme specialism", default=None, type=str)
+@click.option(
+    "--candidates", help="Path to candidates file", default="./candidates.csv", type=str
+)
+@click.option("--roles", help="Path to roles file", default="./roles.csv", type=str)
+@click.option(
+    "--snapshot",
+    help=(
+        "A directory written by `compile`. Used in place of the CSVs if they haven't"
+        " changed"
+    ),
+    default="./snapshot",
+    type=str,
+)
+def explain_match(
+    candidate: str,
+    role: str,
+    iteration: Optional[int],
+    results: Optional[str],
+    top: int,
+    specialism: str,
+    candidates: str,
+    roles: str,
+    snapshot: str,
+):
+    """
+    Explain why a candidate could or couldn't be paired with a role
+    """
+    if iteration is not None and results is None:
+        raise click.UsageError("--iteration needs the --results of the run")
+    try:
+        explanation = explain_pair(
+            candidates,
+            roles,
+            candidate,
+            role,
+            specialism,
+            top,
+            iteration,
+            results,
+            snapshot,
+        )
+    except KeyError as error:
+        raise click.UsageError(f"Unknown candidate, role or iteration {error}")
+    for line in explanation.describe():
+        click.echo(line)
+
+
+@process_matches.command("compare-engines")
+@click.option(
+    "--iterations", help="The number of iterations to go through", default=10, type=int
+)
+@click.option("--specialism", help="The scheme specialism", default=None, type=str)
+@click.option("--senior_first", help="Match seniors first", default=True, type=bool)
+@click.option(
+    "--candidates", help="Path to candidates file", default="./candidates.csv", type=str
+)
+@click.option("--roles", help="Path to roles file", default="./roles.csv", type=str)
+@click.option(
+    "--bids", help="Path to file containing bids", default="./bids.csv", type=str
+)
+@click.option(
+    "--solver",
+    help="The assignment solver to use",
+    default=MunkresSolver.name,
+    type=click.Choice(list(SOLVERS)),
+)
+@click.option(
+    "--workers",
+    help="The number of processes to run iterations in",
+    default=1,
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--seed",
+    help="The master seed. If not given, one is chosen and printed",
+    default=None,
+    type=int,
+)
+@click.option(
+    "--snapshot",
+    help=(
+        "A directory written by `compile`. Used in place of the CSVs if they haven't"
+        " changed"
+    ),
+    default="./snapshot",
+    type=str,
+)
+def compare_matching_engines(
+    iterations: int,
+    specialism: str,
+    senior_first: bool,
+    candidates: str,
+    roles: str,
+    bids: str,
+    solver: str,
+    workers: int,
+    seed: Optional[int],
+    snapshot: str,
+):
+    """
+    Run the same iterations with each engine and compare their total scores and how many bids they satisfied. The
+    score gap is each engine's best total score less that of the round-based engine
+    """
+    if seed is None:
+        seed = new_master_seed()
+    inputs = prepare_inputs(
+        bids, roles, candidates, senior_first, specialism, solver, snapshot=snapshot
+    )
+    summaries = compare_engines(inputs, range(iterations), seed, workers)
+    click.echo(
+        "engine,solved,best_total_score,mean_total_score,pairs,success_count,"
+        "bids_at_minimum,bids,score_gap"
+    )
+    for summary in summaries:
+        click.echo(
+            f"{summary.engine},{summary.solved},{summary.best_total_score},"
+            f"{summary.mean_total_score:.1f},{summary.pairs},{summary.success_count},"
+            f"{summary.bids_at_minimum},{summary.bids},{summary.score_gap}"
+        )
+    click.echo(f"Master seed: {seed}")
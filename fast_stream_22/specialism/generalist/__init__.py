@@ -1,3 +1,13 @@
-from .models import GeneralistPair, GeneralistRole, GeneralistCandidate
+from .models import (
+    GeneralistPair,
+    GeneralistRole,
+    GeneralistCandidate,
+    TracedGeneralistPair,
+)
 
-__all__ = ["GeneralistPair", "GeneralistCandidate", "GeneralistRole"]
+__all__ = [
+    "GeneralistPair",
+    "GeneralistCandidate",
+    "GeneralistRole",
+    "TracedGeneralistPair",
+]
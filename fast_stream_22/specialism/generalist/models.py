@@ -1,7 +1,6 @@
 from __future__ import annotations
 
-from functools import wraps
-from typing import Callable, Optional
+from typing import Optional
 from fast_stream_22.specialism.pair import BasePair
 from fast_stream_22.specialism.models import Travel, Clearance, Cohort, Candidate, Role
 from fast_stream_22.specialism.pair import register_scoring_method, C, R
@@ -97,20 +96,6 @@ class GeneralistRole(WorkingPatternsInterface, AccessibilityInterface, Role):
         return self._accessibility
 
 
-def register_method_called(
-    func: Callable[["GeneralistPair"], None]
-) -> Callable[["GeneralistPair"], None]:
-    @wraps(func)
-    def _inner(instance: GeneralistPair) -> None:
-        before_score = instance.score
-        func(instance)
-        if instance.score > before_score:
-            instance.methods_called.add(func.__name__)
-        return None
-
-    return _inner
-
-
 class GeneralistPair(BasePair):
     scoring_weights = {
         **BasePair.scoring_weights,
@@ -123,6 +108,8 @@ class GeneralistPair(BasePair):
         Cohort.SixMonth: BasePair.min_score[Cohort.Two],
     }
 
+    traced_method_names = BasePair.traced_method_names + ("_score_preferences",)
+
     def __init__(self, candidate: C, role: R):
         super().__init__(candidate, role)
         self.methods_called: set[Optional[str]] = set()
@@ -173,36 +160,40 @@ class GeneralistPair(BasePair):
         )
 
     @register_scoring_method
-    @register_method_called
     def _score_department(self) -> None:
         if self.role.department in self.candidate.dept_prefs:
             self._score += self.scoring_weights["department"]
+            self.methods_called.add("_score_department")
 
     @register_scoring_method
-    @register_method_called
     def _score_anchor(self) -> None:
         if self.role.anchor in {
             self.candidate.primary_anchor,
             self.candidate.secondary_anchor,
         }:
             self._score += self.scoring_weights["anchor"]
+            self.methods_called.add("_score_anchor")
 
-    @register_method_called
     @register_scoring_method
     def _score_skill(self) -> None:
-        return super()._score_skill()
+        before_score = self.score
+        super()._score_skill()
+        if self.score > before_score:
+            self.methods_called.add("_score_skill")
 
-    @register_method_called
     @register_scoring_method
     def _score_location(self) -> None:
-        return super()._score_location()
+        before_score = self.score
+        super()._score_location()
+        if self.score > before_score:
+            self.methods_called.add("_score_location")
 
     def _score_preferences(self):
         preferences = {
-            "Anchor": self._score_anchor.__name__,
-            "Location": self._score_location.__name__,
-            "Department": self._score_department.__name__,
-            "Skill": self._score_skill.__name__,
+            "Anchor": "_score_anchor",
+            "Location": "_score_location",
+            "Department": "_score_department",
+            "Skill": "_score_skill",
         }
         for preference in self.candidate.match_preferences:
             if preferences.get(preference) in self.methods_called:
@@ -212,3 +203,7 @@ class GeneralistPair(BasePair):
         super().score_pair()
         self._score_preferences()
         return self.score
+
+
+class TracedGeneralistPair(GeneralistPair, trace=True):
+    pass
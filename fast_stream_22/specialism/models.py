@@ -35,19 +35,15 @@ class NationalityRequirement(IntEnum):
 
 
 class BaseClass:
-    departments: set[str] = set()
-
     def __init__(self, uid: str, clearance: str, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.uid = uid
         self._clearance = Clearance[clearance]
         self.paired = False
 
-    @classmethod
-    def _stringify_department(cls, dept: str) -> str:
-        dept = dept.lower().strip()
-        cls.departments.add(dept)
-        return dept
+    @staticmethod
+    def _stringify_department(dept: str) -> str:
+        return dept.lower().strip()
 
     @classmethod
     def _boolify(cls, string: str):
@@ -66,13 +62,26 @@ class BaseClass:
     def mark_paired(self):
         self.paired = True
 
+    def freeze(self) -> None:
+        """
+        Make this object read-only, so that it can be shared: the sets it holds become frozensets, and setting an
+        attribute raises AttributeError
+        """
+        for name, value in vars(self).items():
+            if isinstance(value, set):
+                object.__setattr__(self, name, frozenset(value))
+        object.__setattr__(self, "_frozen", True)
+
+    def __setattr__(self, name: str, value) -> None:
+        if self.__dict__.get("_frozen"):
+            raise AttributeError(f"{self.uid} is read-only")
+        super().__setattr__(name, value)
+
     def __repr__(self):
         return self.uid
 
 
 class Candidate(BaseClass):
-    departments: set[str] = set()
-
     def __init__(
         self,
         uuid: str,
@@ -118,8 +127,6 @@ class Candidate(BaseClass):
 
 
 class Role(BaseClass):
-    departments: set[str] = set()
-
     def __init__(
         self,
         uuid: str,
@@ -1,9 +1,14 @@
+import contextlib
+import dataclasses
 import logging
 import os
+import threading
+from collections import Counter
 from functools import wraps
-from typing import Callable, TypeVar, Generic
+from typing import Callable, Iterator, TypeVar, Generic, Optional, Type, cast
 
 from fast_stream_22.specialism.models import Candidate, Role, Cohort
+from fast_stream_22.specialism.trace import TraceBuffer
 
 P = TypeVar("P", bound="BasePair")
 C = TypeVar("C", bound=Candidate)
@@ -11,33 +16,218 @@ R = TypeVar("R", bound=Role)
 
 logger = logging.getLogger(__name__)
 
+TRACE_BY_DEFAULT = os.environ.get("DEBUG") == "true"
+
 
 def register_scoring_method(func: Callable[[P], None]) -> Callable[[P], None]:
+    """
+    Mark a method to be run by `BasePair.score_pair`. The method itself is left as it is; classes created with
+    `trace=True` wrap it when the class is created.
+    """
     func._is_scoring_method = True  # type: ignore
+    return func
+
+
+def _traced(func: Callable[[P], None]) -> Callable[[P], None]:
+    """
+    Wrap a scoring method so that, whenever it disqualifies a pair or changes its score, the decision is added to
+    the class's `trace_buffer` and logged
+    """
 
     @wraps(func)
     def inner(instance: P) -> None:
         before = instance.disqualified
         score_before = instance.score
         func(instance)
-        if os.environ.get("DEBUG") == "true":
-            if instance.disqualified is True and before is False:
+        rejected = instance.disqualified and not before
+        if rejected or instance.score != score_before:
+            instance.trace_buffer.add(
+                instance.candidate.uid,
+                instance.role.uid,
+                func.__name__,
+                rejected,
+                instance.score - score_before,
+            )
+            if rejected:
                 logger.debug(
                     f"{instance.candidate} dq'd from {instance.role} because of"
                     f" {func.__name__}"
                 )
-            elif score_before < instance.score:
+            else:
                 logger.debug(
                     f"{instance.candidate} scored with {instance.role} thanks to"
                     f" {func.__name__}"
                 )
         return None
 
+    inner._untraced = func  # type: ignore
     return inner
 
 
+def is_check(name: str) -> bool:
+    """
+    :param name: the name of a scoring method
+    :return: whether it is a hard filter, which can disqualify a pair, rather than a scorer
+    """
+    return name.startswith("_check_")
+
+
+@dataclasses.dataclass
+class CheckStats:
+    """
+    How often each scoring method of a `Pair` class has run and how often it disqualified the pair, which decides
+    the order the checks are run in. Scoring a pair only notes where in its `plan` it stopped; the counts for each
+    method are worked out from those when the plan changes or the counts are read. Pairs can be scored on several
+    threads at once, so the counts are only changed while holding `lock`. Within a `batch`, each thread notes the
+    pairs it scores in a tally of its own, without the lock, and adds them to the counts every so often.
+    """
+
+    pairs: int = 0
+    calls: Counter[str] = dataclasses.field(default_factory=Counter)
+    rejections: Counter[str] = dataclasses.field(default_factory=Counter)
+    plan: Optional[list[str]] = None
+    exits: Counter[int] = dataclasses.field(default_factory=Counter)
+    unflushed: int = 0
+    lock: threading.RLock = dataclasses.field(
+        default_factory=threading.RLock, repr=False, compare=False
+    )
+    local: threading.local = dataclasses.field(
+        default_factory=threading.local, repr=False, compare=False
+    )
+
+    def exit(self, stop: int, plan: Optional[list[str]] = None) -> None:
+        """
+        Note that a pair stopped at a step of the plan
+
+        :param stop: the index of the check that disqualified it, or the length of the plan if none did
+        :param plan: the plan the pair was scored by. Defaults to the current one
+        """
+        local = self.local
+        if getattr(local, "tally", None) is None:
+            with self.lock:
+                if plan is None or plan is self.plan:
+                    self.exits[stop] += 1
+                    self.unflushed += 1
+                else:
+                    self._count(plan, {stop: 1})
+            return
+        if plan is not local.plan:
+            self._merge_tally()
+            local.plan = plan
+        local.tally[stop] += 1
+        local.pairs += 1
+        if local.pairs >= local.merge_every:
+            self._merge_tally()
+
+    @contextlib.contextmanager
+    def batch(self, merge_every: int) -> Iterator[None]:
+        """
+        Note the pairs this thread scores within the block in a tally of its own, so scoring a pair takes no lock.
+        The tally is added to the counts, and the plan worked out again, every `merge_every` pairs and at the end
+
+        :param merge_every: the number of pairs to tally between additions to the counts
+        """
+        local = self.local
+        if getattr(local, "tally", None) is not None:
+            yield
+            return
+        local.tally, local.plan, local.pairs = Counter(), None, 0
+        local.merge_every = merge_every
+        try:
+            yield
+        finally:
+            self._merge_tally()
+            local.tally = None
+
+    def _merge_tally(self) -> None:
+        local = self.local
+        if not local.pairs:
+            return
+        with self.lock:
+            self._count(local.plan or self.plan or [], local.tally)
+            self.plan = None
+        local.tally.clear()
+        local.pairs = 0
+
+    def flush(self) -> None:
+        """
+        Add the pairs noted by `exit` to the counts for each method
+        """
+        with self.lock:
+            self._count(self.plan or [], self.exits)
+            self.exits.clear()
+            self.unflushed = 0
+
+    def _count(self, plan: list[str], exits: dict[int, int]) -> None:
+        for stop, count in exits.items():
+            self.pairs += count
+            for name in plan[: stop + 1]:
+                self.calls[name] += count
+            if stop < len(plan):
+                self.rejections[plan[stop]] += count
+
+    def record(self, pairs: int, calls: dict[str, int], rejections: dict[str, int]):
+        """
+        Add the counts from scoring many pairs at once. The plan is worked out again before it is next used
+
+        :param pairs: the number of pairs scored
+        :param calls: the number of pairs each method was run on
+        :param rejections: the number of pairs each check disqualified
+        """
+        with self.lock:
+            self.flush()
+            self.pairs += pairs
+            self.calls.update(calls)
+            self.rejections.update(rejections)
+            self.plan = None
+
+    def rejection_rate(self, name: str) -> float:
+        """
+        The share of the pairs a check has seen that it disqualified, smoothed so that a check that hasn't run yet
+        starts at one half
+
+        :param name: the name of a check
+        :return: a number between 0 and 1
+        """
+        return (self.rejections[name] + 1) / (self.calls[name] + 2)
+
+    def calls_per_pair(self) -> float:
+        with self.lock:
+            self.flush()
+            return sum(self.calls.values()) / self.pairs if self.pairs else 0.0
+
+    def report(self) -> list[tuple[str, int, int, float]]:
+        """
+        :return: a tuple of the name, calls, rejections and smoothed rejection rate of each method that has run, the
+            methods that removed the most pairs first
+        """
+        with self.lock:
+            self.flush()
+            return sorted(
+                (
+                    (name, calls, self.rejections[name], self.rejection_rate(name))
+                    for name, calls in self.calls.items()
+                ),
+                key=lambda row: (-row[2], row[0]),
+            )
+
+    def reset(self) -> None:
+        with self.lock:
+            self.pairs = 0
+            self.calls.clear()
+            self.rejections.clear()
+            self.plan = None
+            self.exits.clear()
+            self.unflushed = 0
+
+
 class BasePair(Generic[C, R]):
     scoring_method_names: set[str] = set()
+    check_stats: CheckStats = CheckStats()
+    replan_every: int = 1024
+    tracing: bool = False
+    trace_buffer: Optional[TraceBuffer] = None
+    traced_method_names: tuple[str, ...] = ("_check_score",)
 
     scoring_weights: dict[str, int] = {
         "first_location": 10,
@@ -50,12 +240,26 @@ class BasePair(Generic[C, R]):
     }
     min_score: dict[int, int] = {Cohort.One: 15, Cohort.Two: 20, Cohort.Three: 25}
 
-    def __init_subclass__(cls, **kwargs):
+    def __init_subclass__(cls, trace: Optional[bool] = None, **kwargs):
+        """
+        :param trace: whether to record every decision made while scoring this class's pairs in its `trace_buffer`.
+            Fixed when the class is created; defaults to whether the `DEBUG` environment variable was "true" when
+            this module was imported. Untraced classes run their scoring methods unwrapped.
+        """
         cls.scoring_method_names = set()
         for name in dir(cls):
             if getattr(getattr(cls, name), "_is_scoring_method", False):
                 cls.scoring_method_names.add(name)
-        super().__init_subclass__()
+        cls.check_stats = CheckStats()
+        cls.tracing = TRACE_BY_DEFAULT if trace is None else trace
+        cls.trace_buffer = TraceBuffer() if cls.tracing else None
+        for name in cls.scoring_method_names | set(cls.traced_method_names):
+            method = getattr(cls, name)
+            untraced = getattr(method, "_untraced", method)
+            wanted = _traced(untraced) if cls.tracing else untraced
+            if wanted is not method:
+                setattr(cls, name, wanted)
+        super().__init_subclass__(**kwargs)
 
     def __init__(self, candidate: C, role: R):
         self.candidate = candidate
@@ -63,25 +267,52 @@ class BasePair(Generic[C, R]):
         self._score: int = 0
         self._disqualified = False
 
+    @classmethod
+    def scoring_plan(cls) -> list[str]:
+        """
+        The order to run the scoring methods in: the checks first, those that have disqualified the largest share of
+        pairs leading, and then the scorers. The order is worked out again every `replan_every` pairs, as the
+        rejection counts in `check_stats` grow.
+
+        :return: a list of method names
+        """
+        stats = cls.check_stats
+        plan = stats.plan
+        if plan is not None and stats.unflushed < cls.replan_every:
+            return plan
+        with stats.lock:
+            if stats.plan is None or stats.unflushed >= cls.replan_every:
+                stats.flush()
+                names = sorted(cls.scoring_method_names)
+                checks = sorted(
+                    filter(is_check, names),
+                    key=lambda name: -stats.rejection_rate(name),
+                )
+                stats.plan = checks + [name for name in names if not is_check(name)]
+            return stats.plan
+
     @property
-    def scoring_methods(self) -> set[Callable[[], None]]:
+    def scoring_methods(self) -> list[Callable[[], None]]:
         """
         Collect the methods marked for scoring for this class
 
-        :return: a set of callable methods
+        :return: a list of callable methods, in the order of `scoring_plan`
         """
-        return {getattr(self, name) for name in self.scoring_method_names}
+        return [getattr(self, name) for name in self.scoring_plan()]
 
     def score_pair(self) -> int:
         """
-        Run through the scoring methods for this class
+        Run through the scoring methods for this class, stopping at the first check that disqualifies the pair
 
         :return: an int representing the final score for this Pair
         """
-        for method in self.scoring_methods:
-            method()
+        plan = self.scoring_plan()
+        for stop, name in enumerate(plan):
+            getattr(self, name)()
             if self.disqualified:
+                self.check_stats.exit(stop, plan)
                 return self.score
+        self.check_stats.exit(len(plan), plan)
         self._check_score()
         return self.score
 
@@ -96,26 +327,24 @@ class BasePair(Generic[C, R]):
 
     @register_scoring_method
     def _score_location(self) -> None:
+        first_location = self.scoring_weights["first_location"]
+        second_location = self.scoring_weights["second_location"]
         if self.candidate.has_relocated:
-            self.scoring_weights["first_location"] += self.scoring_weights[
-                "has_relocated"
-            ]
-            self.scoring_weights["second_location"] += self.scoring_weights[
-                "has_relocated"
-            ]
+            first_location += self.scoring_weights["has_relocated"]
+            second_location += self.scoring_weights["has_relocated"]
 
         if self.role.from_anywhere():
-            self._score += self.scoring_weights["first_location"]
+            self._score += first_location
         elif (
             self.candidate.first_preference_location in self.role.locations
             or self.candidate.first_preference_location == "Any"
         ):
-            self._score += self.scoring_weights["first_location"]
+            self._score += first_location
         elif (
             self.candidate.second_preference_location in self.role.locations
             or self.candidate.second_preference_location == "Any"
         ):
-            self._score += self.scoring_weights["second_location"]
+            self._score += second_location
 
     @register_scoring_method
     def _check_clearance(self) -> None:
@@ -220,3 +449,33 @@ class BasePair(Generic[C, R]):
 
 class Pair(BasePair):
     pass
+
+
+class TracedPair(Pair, trace=True):
+    pass
+
+
+def reweighted(pair_type: Type[P], weights: dict[str, int]) -> Type[P]:
+    """
+    Make a class that scores as `pair_type` does, but with some of its `scoring_weights` changed. The class records
+    the one it was made from in `reweights`, so that a columnar scorer for that class can stand in for it
+
+    :param pair_type: the class of `Pair` to reweight
+    :param weights: the new weights, by name
+    :return: a subclass of `pair_type`
+    :raises KeyError: if a weight isn't one of `pair_type`'s
+    """
+    unknown = set(weights) - set(pair_type.scoring_weights)
+    if unknown:
+        raise KeyError(f"Unknown scoring weights: {', '.join(sorted(unknown))}")
+    original = pair_type.__dict__.get("reweights", pair_type)
+    subclass = type(
+        f"Reweighted{original.__name__}",
+        (pair_type,),
+        {
+            "scoring_weights": {**pair_type.scoring_weights, **weights},
+            "reweights": original,
+        },
+        trace=pair_type.tracing,
+    )
+    return cast(Type[P], subclass)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import csv
+from array import array
+
+import numpy as np
+
+from fast_stream_22.specialism.vocabulary import Vocabulary
+
+
+class TraceBuffer:
+    """
+    The decisions made while scoring pairs with a traced `Pair` class: for each scoring method that disqualified a
+    pair or changed its score, the candidate, the role, the method and the change. Uids and method names are interned,
+    so each decision takes a few bytes in typed arrays.
+    """
+
+    fields = ("candidate", "role", "method", "disqualified", "score_change")
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self.uids = Vocabulary()
+        self.methods = Vocabulary()
+        self.candidates = array("i")
+        self.roles = array("i")
+        self.method_ids = array("h")
+        self.disqualified = array("b")
+        self.score_changes = array("i")
+
+    def add(
+        self,
+        candidate_uid: str,
+        role_uid: str,
+        method: str,
+        disqualified: bool,
+        score_change: int,
+    ) -> None:
+        """
+        :param candidate_uid: the uid of the pair's candidate
+        :param role_uid: the uid of the pair's role
+        :param method: the name of the scoring method
+        :param disqualified: whether the method disqualified the pair
+        :param score_change: the points the method added to the pair's score, which may be negative
+        """
+        self.candidates.append(self.uids.intern(candidate_uid))
+        self.roles.append(self.uids.intern(role_uid))
+        self.method_ids.append(self.methods.intern(method))
+        self.disqualified.append(disqualified)
+        self.score_changes.append(score_change)
+
+    def __len__(self) -> int:
+        return len(self.method_ids)
+
+    def columns(self) -> dict[str, np.ndarray]:
+        """
+        :return: a NumPy array for each field, with uids and method names decoded
+        """
+        uids = np.array(list(self.uids), dtype=str)
+        methods = np.array(list(self.methods), dtype=str)
+        return {
+            "candidate": uids[np.frombuffer(self.candidates, dtype=np.int32)],
+            "role": uids[np.frombuffer(self.roles, dtype=np.int32)],
+            "method": methods[np.frombuffer(self.method_ids, dtype=np.int16)],
+            "disqualified": np.frombuffer(self.disqualified, dtype=np.int8).astype(
+                bool
+            ),
+            "score_change": np.frombuffer(self.score_changes, dtype=np.int32),
+        }
+
+    def save_columns(self, path: str) -> None:
+        """
+        Write each field as a column of a compressed `.npz` archive
+
+        :param path: where to write the archive
+        """
+        np.savez_compressed(path, allow_pickle=False, **self.columns())
+
+    def to_csv(self, path: str) -> None:
+        """
+        Write one row per decision
+
+        :param path: where to write the CSV
+        """
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(self.fields)
+            for candidate, role, method, disqualified, change in zip(
+                self.candidates,
+                self.roles,
+                self.method_ids,
+                self.disqualified,
+                self.score_changes,
+            ):
+                writer.writerow(
+                    [
+                        self.uids[candidate],
+                        self.uids[role],
+                        self.methods[method],
+                        bool(disqualified),
+                        change,
+                    ]
+                )
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Hashable, Iterable, Iterator
+
+
+class Vocabulary:
+    """
+    Assigns each distinct value of one kind, such as locations or departments, an integer ID, in the order the
+    values are first seen
+    """
+
+    __slots__ = ("ids", "words")
+
+    def __init__(self, words: Iterable[Hashable] = ()):
+        self.ids: dict[Hashable, int] = {}
+        self.words: list[Hashable] = []
+        for word in words:
+            self.intern(word)
+
+    def intern(self, word: Hashable) -> int:
+        """
+        :param word: the value to look up
+        :return: its ID, which is assigned now if it hasn't been seen before
+        """
+        try:
+            return self.ids[word]
+        except KeyError:
+            self.ids[word] = len(self.words)
+            self.words.append(word)
+            return self.ids[word]
+
+    def __getitem__(self, word_id: int) -> Hashable:
+        return self.words[word_id]
+
+    def __contains__(self, word: Hashable) -> bool:
+        return word in self.ids
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self.words)
+
+
+class VocabularyRegistry:
+    """
+    One `Vocabulary` for each kind of value, shared by everything loaded from the same set of inputs so that their
+    IDs can be compared
+    """
+
+    def __init__(self):
+        self._vocabularies: dict[str, Vocabulary] = {}
+
+    def __getitem__(self, kind: str) -> Vocabulary:
+        return self._vocabularies.setdefault(kind, Vocabulary())
+
+    def __contains__(self, kind: str) -> bool:
+        return kind in self._vocabularies
+
+    def kinds(self) -> list[str]:
+        return list(self._vocabularies)
+
+    def copy(self) -> VocabularyRegistry:
+        """
+        :return: a registry with the same IDs, which words can be added to without changing this one
+        """
+        registry = VocabularyRegistry()
+        for kind, vocabulary in self._vocabularies.items():
+            registry._vocabularies[kind] = Vocabulary(vocabulary.words)
+        return registry
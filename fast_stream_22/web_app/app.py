@@ -1,12 +1,182 @@
-from flask import Flask
+import json
+from typing import Optional
 
-app = Flask(__name__)
+from flask import (
+    Flask,
+    Response,
+    abort,
+    jsonify,
+    request,
+    stream_with_context,
+    url_for,
+)
 
+from fast_stream_22.web_app.service import FILES, JobParameters, MatchingService
 
-@app.route("/")
-def hello_world():  # put application's code here
-    return "Hello World!"
+
+def create_app(service: Optional[MatchingService] = None) -> Flask:
+    """
+    Make the matching service's web app. Datasets are uploaded once, then matched as often as needed without being
+    read or scored again
+
+    :param service: the service holding the datasets and jobs. Defaults to a new one
+    """
+    app = Flask(__name__)
+    app.config["EVENTS_HEARTBEAT"] = 15.0
+    service = service or MatchingService()
+    app.extensions["matching"] = service
+
+    def dataset_or_404(uid: str):
+        try:
+            return service.dataset(uid)
+        except KeyError:
+            abort(404, f"No dataset {uid}")
+
+    def job_or_404(uid: str):
+        try:
+            return service.job(uid)
+        except KeyError:
+            abort(404, f"No job {uid}")
+
+    @app.errorhandler(400)
+    @app.errorhandler(404)
+    @app.errorhandler(409)
+    def error_as_json(error):
+        return jsonify(error=error.description), error.code
+
+    @app.post("/datasets")
+    def upload_dataset():
+        """
+        Upload `candidates`, `roles` and `bids` CSV files, and optionally a `specialism`, as a multipart form
+        """
+        try:
+            dataset = service.add_dataset(
+                {name: request.files[name] for name in FILES if name in request.files},
+                request.form.get("specialism") or None,
+            )
+        except ValueError as error:
+            abort(400, str(error))
+        return jsonify(dataset.describe()), 201
+
+    @app.get("/datasets/<uid>")
+    def get_dataset(uid: str):
+        return jsonify(dataset_or_404(uid).describe())
+
+    @app.delete("/datasets/<uid>")
+    def delete_dataset(uid: str):
+        """
+        Forget the dataset and remove its files. Jobs already running on it carry on
+        """
+        try:
+            service.delete_dataset(uid)
+        except KeyError:
+            abort(404, f"No dataset {uid}")
+        return "", 204
+
+    @app.post("/datasets/<uid>/matches")
+    def start_match(uid: str):
+        """
+        Start matching the dataset, with parameters such as `senior_first`, `iterations`, `seed`, `solver`, `engine`
+        and `weights` given as JSON
+        """
+        dataset_or_404(uid)
+        try:
+            parameters = JobParameters.from_json(request.get_json(silent=True) or {})
+            job = service.start(uid, parameters)
+        except (TypeError, ValueError) as error:
+            abort(400, str(error))
+        response = jsonify(job.describe())
+        response.headers["Location"] = url_for("get_match", uid=job.uid)
+        return response, 202
+
+    @app.get("/matches/<uid>")
+    def get_match(uid: str):
+        return jsonify(job_or_404(uid).describe())
+
+    @app.delete("/matches/<uid>")
+    def delete_match(uid: str):
+        """
+        Cancel the job, if it is still running, and forget it and its results
+        """
+        try:
+            service.delete_job(uid)
+        except KeyError:
+            abort(404, f"No job {uid}")
+        return "", 204
+
+    @app.post("/matches/<uid>/cancel")
+    def cancel_match(uid: str):
+        """
+        Stop the job after the iteration it is running. The results of the iterations it has run can still be had
+        """
+        job = job_or_404(uid)
+        if job.progress().finished:
+            abort(409, f"Job {uid} is {job.status}")
+        return jsonify(service.cancel(uid).describe()), 202
+
+    @app.get("/matches/<uid>/events")
+    def match_events(uid: str):
+        """
+        Follow the job as server-sent events: one named for its status when followed and whenever that changes, and
+        an `iteration` event as each iteration finishes. Each carries the job's progress as JSON. The stream ends when
+        the job does
+        """
+        job = job_or_404(uid)
+
+        def stream():
+            for event in job.events(heartbeat=app.config["EVENTS_HEARTBEAT"]):
+                if event is None:
+                    yield ": still running\n\n"
+                else:
+                    yield (
+                        f"event: {event.name}\ndata: {json.dumps(event.as_dict())}\n\n"
+                    )
+
+        return Response(
+            stream_with_context(stream()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.get("/matches/<uid>/results")
+    def get_results(uid: str):
+        """
+        The pairs from one iteration, `?iteration=N`, or from the iteration with the best total score, once the job
+        is done or has been cancelled
+        """
+        job = job_or_404(uid)
+        if job.status not in ("done", "cancelled"):
+            abort(409, f"Job {uid} is {job.status}")
+        iteration = request.args.get("iteration", type=int)
+        if iteration is None:
+            outcome = job.best_by_score
+        else:
+            outcome = job.outcomes.get(iteration)
+        if outcome is None:
+            abort(404, "No solved iteration to show")
+        return jsonify(
+            iteration=outcome.iteration,
+            seed=outcome.seed,
+            total_score=outcome.total_score,
+            success_count=outcome.success_count,
+            bids=[
+                {
+                    "department": bid.department,
+                    "cohort": bid.cohort.name,
+                    "number": bid.number,
+                    "count": bid.count,
+                }
+                for bid in outcome.bids
+            ],
+            pairs=[
+                {"cohort": cohort.name, "candidate": c, "role": r, "score": s}
+                for cohort, pairs in outcome.outcomes.items()
+                for c, r, s in pairs
+            ],
+        )
+
+    return app
 
 
 if __name__ == "__main__":
-    app.run()
+    create_app().run()
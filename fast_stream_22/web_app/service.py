@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Protocol, Type
+
+from fast_stream_22.matching.match import (
+    ENGINES,
+    Bid,
+    MatchingInputs,
+    new_master_seed,
+    pair_type_for,
+    read_bids,
+)
+from fast_stream_22.matching.jobs import MatchingJob
+from fast_stream_22.matching.scoring import ScoreCache
+from fast_stream_22.matching.snapshot import load_inputs
+from fast_stream_22.matching.solvers import SOLVERS, MunkresSolver, get_solver
+from fast_stream_22.specialism.pair import BasePair, reweighted
+
+logger = logging.getLogger(__name__)
+
+FILES = ("candidates", "roles", "bids")
+
+
+class Upload(Protocol):
+    def save(self, dst: str) -> None:
+        ...
+
+
+class Dataset:
+    """
+    An uploaded intake, parsed once and kept in memory with the scores of every pairing. Scores are kept for the last
+    `max_weightings` sets of scoring weights asked for, so repeat runs with the same weights go straight to matching.
+    """
+
+    max_weightings = 4
+
+    def __init__(self, uid: str, directory: str, specialism: Optional[str] = None):
+        """
+        :param uid: the dataset's id
+        :param directory: where its `candidates.csv`, `roles.csv` and `bids.csv` are
+        :param specialism: the scheme specialism
+        :raises ValueError: if the files can't be parsed
+        """
+        self.uid = uid
+        self.directory = directory
+        self.specialism = specialism
+        try:
+            self.candidates, self.roles = load_inputs(
+                self.path("candidates"), self.path("roles"), specialism
+            )
+            self.bids: list[Bid] = read_bids(self.path("bids"))
+            self.pair_type = pair_type_for(specialism)
+        except (KeyError, TypeError, ValueError) as error:
+            raise ValueError(f"The files couldn't be read: {error!r}") from error
+        self._scores: OrderedDict[
+            tuple[tuple[str, int], ...], tuple[Type[BasePair], ScoreCache]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+        self.scores({})
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.csv")
+
+    def scores(self, weights: dict[str, int]) -> tuple[Type[BasePair], ScoreCache]:
+        """
+        :param weights: scoring weights to change from the specialism's own
+        :return: the class of `Pair` that scores with the weights, and the scores of every pairing. They are worked
+            out the first time the weights are asked for, and kept
+        :raises KeyError: if a weight isn't one of the specialism's
+        """
+        key = tuple(sorted(weights.items()))
+        with self._lock:
+            if key not in self._scores:
+                pair_type = (
+                    reweighted(self.pair_type, weights) if weights else self.pair_type
+                )
+                self._scores[key] = (
+                    pair_type,
+                    ScoreCache(self.candidates, self.roles, pair_type),
+                )
+                while len(self._scores) > self.max_weightings:
+                    self._scores.popitem(last=False)
+            self._scores.move_to_end(key)
+            return self._scores[key]
+
+    def inputs(self, parameters: JobParameters) -> MatchingInputs:
+        """
+        :return: the inputs to each iteration of a run with these parameters
+        """
+        pair_type, cache = self.scores(parameters.weights)
+        return MatchingInputs(
+            self.candidates,
+            self.roles,
+            self.bids,
+            parameters.senior_first,
+            pair_type,
+            get_solver(parameters.solver),
+            cache,
+            parameters.incremental,
+            parameters.engine,
+        )
+
+    def describe(self) -> dict:
+        return {
+            "id": self.uid,
+            "specialism": self.specialism,
+            "candidates": len(self.candidates),
+            "roles": len(self.roles),
+            "bids": len(self.bids),
+            "scoring_weights": self.pair_type.scoring_weights,
+        }
+
+
+@dataclasses.dataclass(frozen=True)
+class JobParameters:
+    senior_first: bool = True
+    iterations: int = 10
+    seed: Optional[int] = None
+    solver: str = MunkresSolver.name
+    engine: str = "rounds"
+    incremental: bool = False
+    weights: dict[str, int] = dataclasses.field(default_factory=dict)
+
+    @classmethod
+    def from_json(cls, data: dict) -> JobParameters:
+        """
+        :param data: the parameters, by name. Any left out take their defaults
+        :raises ValueError: if a parameter is unknown or has the wrong type or value
+        """
+        fields = {field.name: field for field in dataclasses.fields(cls)}
+        if unknown := set(data) - set(fields):
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        parameters = cls(**data)
+        checks = {
+            "senior_first": isinstance(parameters.senior_first, bool),
+            "iterations": type(parameters.iterations) is int
+            and parameters.iterations >= 1,
+            "seed": parameters.seed is None or type(parameters.seed) is int,
+            "solver": parameters.solver in SOLVERS,
+            "engine": parameters.engine in ENGINES,
+            "incremental": isinstance(parameters.incremental, bool),
+            "weights": isinstance(parameters.weights, dict)
+            and all(type(value) is int for value in parameters.weights.values()),
+        }
+        if bad := [name for name, ok in checks.items() if not ok]:
+            raise ValueError(f"Invalid parameters: {', '.join(bad)}")
+        return parameters
+
+
+class Job(MatchingJob):
+    """
+    A run of matching on a dataset, on one of the service's threads. It keeps every solved iteration's outcome, so
+    that the results of any of them can be asked for
+    """
+
+    def __init__(
+        self, uid: str, dataset: Dataset, parameters: JobParameters, master_seed: int
+    ):
+        super().__init__(
+            partial(dataset.inputs, parameters),
+            range(parameters.iterations),
+            master_seed,
+            keep_outcomes=True,
+        )
+        self.uid = uid
+        self.dataset = dataset.uid
+        self.parameters = parameters
+        self.created = datetime.datetime.now(datetime.timezone.utc)
+
+    def describe(self) -> dict:
+        return {
+            "id": self.uid,
+            "dataset": self.dataset,
+            "parameters": dataclasses.asdict(self.parameters),
+            "master_seed": self.master_seed,
+            **self.progress().as_dict(),
+            "error": self.error,
+            "created": self.created.isoformat(),
+            "finished": self.finished.isoformat() if self.finished else None,
+        }
+
+
+class MatchingService:
+    """
+    Keeps uploaded datasets parsed and scored, and runs matching jobs on them on a pool of background threads. It
+    holds at most `max_datasets` datasets, dropping the least recently used along with its files, and forgets
+    finished jobs `job_ttl` seconds after they finish or once more than `max_finished_jobs` have finished, the oldest
+    first. A job that is still running keeps its dataset in memory until it stops, even if the dataset is dropped.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        root: Optional[str] = None,
+        max_datasets: int = 8,
+        max_finished_jobs: int = 100,
+        job_ttl: float = 3600.0,
+    ):
+        """
+        :param workers: the number of jobs to run at once
+        :param root: where to keep uploaded files. Defaults to a new temporary directory
+        :param max_datasets: the most datasets to hold
+        :param max_finished_jobs: the most finished jobs to remember
+        :param job_ttl: how many seconds to remember a job for once it has finished
+        """
+        self.root = root
+        self.max_datasets = max_datasets
+        self.max_finished_jobs = max_finished_jobs
+        self.job_ttl = job_ttl
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="matching")
+        self.datasets: OrderedDict[str, Dataset] = OrderedDict()
+        self.jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def dataset(self, uid: str) -> Dataset:
+        """
+        :raises KeyError: if there is no such dataset
+        """
+        with self._lock:
+            self.datasets.move_to_end(uid)
+            return self.datasets[uid]
+
+    def job(self, uid: str) -> Job:
+        """
+        :raises KeyError: if there is no such job, or it has been forgotten
+        """
+        with self._lock:
+            self._forget_finished_jobs()
+            return self.jobs[uid]
+
+    def add_dataset(
+        self, files: dict[str, Upload], specialism: Optional[str] = None
+    ) -> Dataset:
+        """
+        :param files: the uploaded candidates, roles and bids files
+        :param specialism: the scheme specialism
+        :return: the parsed and scored dataset
+        :raises ValueError: if a file is missing or can't be parsed
+        """
+        if missing := [name for name in FILES if name not in files]:
+            raise ValueError(f"Missing files: {', '.join(missing)}")
+        if specialism is not None and specialism not in ("SEFS", "generalist"):
+            raise ValueError(f"Unknown specialism {specialism}")
+        if self.root is None:
+            self.root = tempfile.mkdtemp(prefix="fast-stream-")
+        uid = uuid.uuid4().hex
+        directory = os.path.join(self.root, uid)
+        os.makedirs(directory)
+        try:
+            for name in FILES:
+                files[name].save(os.path.join(directory, f"{name}.csv"))
+            dataset = Dataset(uid, directory, specialism)
+        except Exception:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        with self._lock:
+            self.datasets[uid] = dataset
+            while len(self.datasets) > self.max_datasets:
+                self._drop_dataset(next(iter(self.datasets)))
+        logger.info(f"Dataset {uid} loaded")
+        return dataset
+
+    def delete_dataset(self, uid: str) -> None:
+        """
+        Forget a dataset and remove its files. Jobs already running on it carry on
+
+        :raises KeyError: if there is no such dataset
+        """
+        with self._lock:
+            self._drop_dataset(uid)
+
+    def start(self, dataset_uid: str, parameters: JobParameters) -> Job:
+        """
+        Queue a run of matching on a dataset
+
+        :raises KeyError: if there is no such dataset
+        :raises ValueError: if a weight isn't one of the dataset's specialism's
+        """
+        dataset = self.dataset(dataset_uid)
+        if unknown := set(parameters.weights) - set(dataset.pair_type.scoring_weights):
+            raise ValueError(f"Unknown scoring weights: {', '.join(sorted(unknown))}")
+        seed = new_master_seed() if parameters.seed is None else parameters.seed
+        job = Job(uuid.uuid4().hex, dataset, parameters, seed)
+        with self._lock:
+            self._forget_finished_jobs()
+            self.jobs[job.uid] = job
+        self.pool.submit(job.run)
+        return job
+
+    def cancel(self, job_uid: str) -> Job:
+        """
+        Stop a job after the iteration it is running. The outcomes of the iterations it has run are kept
+
+        :raises KeyError: if there is no such job
+        """
+        job = self.job(job_uid)
+        job.cancel()
+        return job
+
+    def delete_job(self, job_uid: str) -> None:
+        """
+        Cancel a job, if it is still running, and forget it
+
+        :raises KeyError: if there is no such job
+        """
+        with self._lock:
+            job = self.jobs.pop(job_uid)
+        job.cancel()
+
+    def shutdown(self) -> None:
+        """
+        Cancel every job that hasn't finished, and wait for the ones that are running to stop
+        """
+        for job in list(self.jobs.values()):
+            job.cancel()
+        self.pool.shutdown(wait=True)
+
+    def _drop_dataset(self, uid: str) -> None:
+        dataset = self.datasets.pop(uid)
+        shutil.rmtree(dataset.directory, ignore_errors=True)
+        logger.info(f"Dataset {uid} dropped")
+
+    def _forget_finished_jobs(self) -> None:
+        finished = sorted(
+            (job.finished, uid) for uid, job in self.jobs.items() if job.finished
+        )
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+            seconds=self.job_ttl
+        )
+        excess = len(finished) - self.max_finished_jobs
+        for i, (when, uid) in enumerate(finished):
+            if i < excess or when < cutoff:
+                del self.jobs[uid]
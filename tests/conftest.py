@@ -1,6 +1,7 @@
+import csv
 import random
 import uuid
-from typing import Literal, TypeVar
+from typing import Literal, Optional, TypeVar
 
 import pytest
 
@@ -36,14 +37,15 @@ def random_candidates(random_candidate_dict):
 
 @pytest.fixture
 def random_candidate_dict():
-    def _random_candidate():
+    def _random_candidate(rng: Optional[random.Random] = None):
+        rng = rng or random.Random()
         candidate = {
             "uuid": f"C-{uuid.uuid4()}",
-            "clearance_held": random.choice(["SC", "DV"]),
-            "year_group": random.choice([i for i in range(1, 4)]),
+            "clearance_held": rng.choice(["SC", "DV"]),
+            "year_group": rng.choice([i for i in range(1, 4)]),
             "can_relocate": True,
-            "first_location_preference": random.choice(locations),
-            "second_location_preference": random.choice([*locations, None]),
+            "first_location_preference": rng.choice(locations),
+            "second_location_preference": rng.choice([*locations, None]),
             "wants_line_management": True,
             "wants_private_office": True,
             "no_defence": False,
@@ -57,7 +59,7 @@ def random_candidate_dict():
             "last_role_secondary_skill": "Corporate",
         }
         candidate["prior_departments"] = ",".join(
-            random.sample(departments, k=candidate["year_group"] - 1)
+            rng.sample(departments, k=candidate["year_group"] - 1)
         )
         c = {key: str(value) for key, value in candidate.items()}
         return c
@@ -67,19 +69,18 @@ def random_candidate_dict():
 
 @pytest.fixture
 def random_role_dict():
-    def _random_role():
+    def _random_role(rng: Optional[random.Random] = None):
+        rng = rng or random.Random()
         role = {
             "uuid": f"R-{uuid.uuid4()}",
             "clearance_required": "SC",
             "nationality_requirement": "British National",
-            "passport_requirement": bool(random.getrandbits(1)),
-            "location": random.choice(locations),
-            "department": random.choice(departments),
-            "priority_role": random.choice(["High", "Medium", "Low"]),
+            "passport_requirement": bool(rng.getrandbits(1)),
+            "location": rng.choice(locations),
+            "department": rng.choice(departments),
+            "priority_role": rng.choice(["High", "Medium", "Low"]),
             "suitable_for_year_group": ",".join(
-                map(
-                    str, random.sample([i for i in range(1, 4)], k=random.randint(1, 3))
-                )
+                map(str, rng.sample([i for i in range(1, 4)], k=rng.randint(1, 3)))
             ),
             "private_office_role": False,
             "line_management_role": False,
@@ -87,8 +88,8 @@ def random_role_dict():
             "travel_requirements": "Outside Region",
             "defence_role": False,
             "immigration_role": False,
-            "skill_focus": random.choice(skills),
-            "secondary_focus": random.choice(skills),
+            "skill_focus": rng.choice(skills),
+            "secondary_focus": rng.choice(skills),
         }
         return {key: str(value) for key, value in role.items()}
 
@@ -100,6 +101,31 @@ def random_roles(random_role_dict):
     return [Role(**random_role_dict()) for i in range(75)]
 
 
+@pytest.fixture
+def csv_inputs(tmp_path, random_candidate_dict, random_role_dict):
+    """
+    Write a small intake to CSV files, returning the paths to the bids, roles and candidates files
+    """
+    rng = random.Random(0)
+    candidates = [random_candidate_dict(rng) for _ in range(30)]
+    roles = [random_role_dict(rng) for _ in range(90)]
+    for row in roles:
+        row.update(
+            passport_requirement="False", location="Remote", skill_focus="Digital"
+        )
+    paths = {name: tmp_path / f"{name}.csv" for name in ("bids", "roles", "candidates")}
+    for name, rows in (("candidates", candidates), ("roles", roles)):
+        with open(paths[name], "w", newline="") as file:
+            writer = csv.DictWriter(file, rows[0].keys())
+            writer.writeheader()
+            writer.writerows(rows)
+    with open(paths["bids"], "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["dept", "1", "2", "3"])
+        writer.writerows([[dept, 3, 3, 3] for dept in departments])
+    return tuple(str(paths[name]) for name in ("bids", "roles", "candidates"))
+
+
 departments = ["DWP", "HO", "MOJ", "MOD", "HMRC", "CO", "BEIS"]
 locations = [
     "London",
@@ -112,3 +138,118 @@ locations = [
     "Glasgow",
 ]
 skills = ["Operations", "Finance", "Policy", "Digital"]
+anchors = ["Policy", "Delivery", "Corporate"]
+travel = ["I can travel nationally", "I can travel locally, within the same region"]
+patterns = ["Office", "Hybrid", "Remote"]
+adjustments = ["", "Step free", "Screen reader"]
+preferences = ["Anchor", "Location", "Department", "Skill", ""]
+
+
+def booleans(rng: random.Random, *names):
+    return {name: rng.choice(["true", "false"]) for name in names}
+
+
+@pytest.fixture
+def varied_candidate_dicts(random_candidate_dict):
+    rng = random.Random(1)
+    return [
+        {
+            **random_candidate_dict(rng),
+            **booleans(
+                rng,
+                "can_relocate",
+                "wants_line_management",
+                "wants_private_office",
+                "no_defence",
+                "no_immigration",
+                "has_passport",
+                "previous_relocation",
+            ),
+            "clearance_held": rng.choice(["BPSS", "CTC", "SC", "DV"]),
+            "british_national": rng.choice(
+                ["British National", "Dual National", "Rest of World"]
+            ),
+            "first_location_preference": rng.choice([*locations, "Any"]),
+            "primary_skills_seeking": rng.choice(skills),
+            "secondary_skills_seeking": rng.choice(skills),
+            "last_role_secondary_skill": rng.choice(skills),
+        }
+        for _ in range(60)
+    ]
+
+
+@pytest.fixture
+def varied_role_dicts(random_role_dict):
+    rng = random.Random(2)
+    return [
+        {
+            **random_role_dict(rng),
+            **booleans(
+                rng,
+                "passport_requirement",
+                "private_office_role",
+                "line_management_role",
+                "defence_role",
+                "immigration_role",
+            ),
+            "clearance_required": rng.choice(["BPSS", "CTC", "SC", "DV"]),
+            "nationality_requirement": rng.choice(
+                ["British National", "Dual National", "No Restriction"]
+            ),
+            "location": ",".join(
+                rng.sample([*locations, "Remote"], k=rng.randint(1, 3))
+            ),
+        }
+        for _ in range(80)
+    ]
+
+
+@pytest.fixture
+def generalist_candidate_dicts(random_candidate_dict):
+    rng = random.Random(3)
+    candidates = []
+    for _ in range(60):
+        data = random_candidate_dict(rng)
+        data["prior_departments"] = data["prior_departments"].replace(",", " ")
+        candidates.append(
+            {
+                **data,
+                **booleans(
+                    rng,
+                    "can_relocate",
+                    "wants_line_management",
+                    "wants_private_office",
+                    "previous_relocation",
+                ),
+                "year_group": rng.choice(["1", "2", "3", "6m"]),
+                "clearance_held": rng.choice(["SC", "DV"]),
+                "preferred_office_attendance": rng.choice(patterns),
+                "accessibility": rng.choice(adjustments),
+                "primary_skills_seeking": rng.choice(skills),
+                "secondary_skills_seeking": rng.choice(skills),
+                "primary_anchor_seeking": rng.choice(anchors),
+                "secondary_anchor_seeking": rng.choice(anchors),
+                **{f"dept_pref_{i}": rng.choice(departments) for i in range(1, 6)},
+                "travel_requirements": rng.choice(travel),
+                "match_pref_1": rng.choice(preferences),
+                "match_pref_2": rng.choice(preferences),
+            }
+        )
+    return candidates
+
+
+@pytest.fixture
+def generalist_role_dicts(random_role_dict):
+    rng = random.Random(4)
+    return [
+        {
+            **random_role_dict(rng),
+            **booleans(rng, "private_office_role", "line_management_role"),
+            "location": ",".join(rng.sample(locations, k=rng.randint(1, 3))),
+            "office_arrangement": ",".join(rng.sample(patterns, k=rng.randint(1, 3))),
+            "accessibility": ",".join(rng.sample(adjustments, k=rng.randint(1, 3))),
+            "travel_requirements": rng.choice(["Within Region", "None"]),
+            "anchor": rng.choice(anchors),
+        }
+        for _ in range(80)
+    ]
@@ -0,0 +1,239 @@
+import csv
+
+import numpy as np
+import pytest
+
+from fast_stream_22.matching.columns import (
+    CANDIDATE_SCHEMA,
+    GENERALIST_CANDIDATE_SCHEMA,
+    GENERALIST_ROLE_SCHEMA,
+    ROLE_SCHEMA,
+    Row,
+    Table,
+    bitset_members,
+    contains,
+    subsets,
+    to_bitsets,
+    widen,
+)
+from fast_stream_22.matching.scoring import ColumnarScorer, GeneralistColumnarScorer
+from fast_stream_22.specialism.generalist import GeneralistCandidate, GeneralistRole
+from fast_stream_22.specialism.models import BaseClass, Candidate, Role
+from fast_stream_22.specialism.vocabulary import VocabularyRegistry
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, rows[0].keys())
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def attributes(schema, aliases):
+    return [f.name for f in schema.fields if f.name != "accessibility"] + aliases
+
+
+def assert_rows_match_objects(table, objects, names):
+    rows = table.rows()
+    assert len(rows) == len(objects)
+    for row, obj in zip(rows, objects):
+        for name in names:
+            assert getattr(row, name) == getattr(obj, name), name
+
+
+@pytest.mark.parametrize("chunk_size", [7, 4096])
+def test_candidates(tmp_path, varied_candidate_dicts, chunk_size):
+    path = write_csv(tmp_path / "candidates.csv", varied_candidate_dicts)
+    table = Table.read(path, CANDIDATE_SCHEMA, chunk_size=chunk_size)
+    assert_rows_match_objects(
+        table,
+        [Candidate(**data) for data in varied_candidate_dicts],
+        attributes(CANDIDATE_SCHEMA, []),
+    )
+
+
+def test_roles(tmp_path, varied_role_dicts):
+    path = write_csv(tmp_path / "roles.csv", varied_role_dicts)
+    table = Table.read(path, ROLE_SCHEMA, chunk_size=7)
+    roles = [Role(**data) for data in varied_role_dicts]
+    assert_rows_match_objects(
+        table, roles, attributes(ROLE_SCHEMA, ["clearance_required"])
+    )
+    assert [r.from_anywhere() for r in table.rows()] == [
+        r.from_anywhere() for r in roles
+    ]
+
+
+def test_generalist_candidates(tmp_path, generalist_candidate_dicts):
+    generalist_candidate_dicts[0].update(
+        prior_departments="WG MOD", can_relocate="false"
+    )
+    path = write_csv(tmp_path / "candidates.csv", generalist_candidate_dicts)
+    table = Table.read(path, GENERALIST_CANDIDATE_SCHEMA, chunk_size=7)
+    assert_rows_match_objects(
+        table,
+        [GeneralistCandidate(**data) for data in generalist_candidate_dicts],
+        attributes(GENERALIST_CANDIDATE_SCHEMA, ["accessibility_needs"]),
+    )
+
+
+def test_generalist_roles(tmp_path, generalist_role_dicts):
+    path = write_csv(tmp_path / "roles.csv", generalist_role_dicts)
+    table = Table.read(path, GENERALIST_ROLE_SCHEMA, chunk_size=7)
+    assert_rows_match_objects(
+        table,
+        [GeneralistRole(**data) for data in generalist_role_dicts],
+        attributes(GENERALIST_ROLE_SCHEMA, ["accessibility_adjustment"]),
+    )
+
+
+def test_tables_share_a_registry(tmp_path, varied_candidate_dicts, varied_role_dicts):
+    registry = VocabularyRegistry()
+    candidates = Table.read(
+        write_csv(tmp_path / "candidates.csv", varied_candidate_dicts),
+        CANDIDATE_SCHEMA,
+        registry,
+    )
+    roles = Table.read(
+        write_csv(tmp_path / "roles.csv", varied_role_dicts), ROLE_SCHEMA, registry
+    )
+    assert candidates.registry is roles.registry
+    location = candidates.rows()[0].first_preference_location
+    assert registry["location"].words[
+        candidates.columns["first_preference_location"][0]
+    ] == (location)
+
+
+def test_missing_column(tmp_path, varied_role_dicts):
+    for data in varied_role_dicts:
+        del data["department"]
+    with pytest.raises(ValueError):
+        Table.read(write_csv(tmp_path / "roles.csv", varied_role_dicts), ROLE_SCHEMA)
+
+
+def test_rows_are_slotted(tmp_path, varied_role_dicts):
+    table = Table.read(
+        write_csv(tmp_path / "roles.csv", varied_role_dicts), ROLE_SCHEMA
+    )
+    row = table.rows()[0]
+    assert isinstance(row, Row)
+    assert not hasattr(row, "__dict__")
+    with pytest.raises(AttributeError):
+        row.not_a_column
+
+
+@pytest.mark.parametrize(
+    "candidate_type, role_type, scorer, fixtures",
+    [
+        (
+            Candidate,
+            Role,
+            ColumnarScorer,
+            ("varied_candidate_dicts", "varied_role_dicts"),
+        ),
+        (
+            GeneralistCandidate,
+            GeneralistRole,
+            GeneralistColumnarScorer,
+            ("generalist_candidate_dicts", "generalist_role_dicts"),
+        ),
+    ],
+)
+def test_scoring_rows_matches_objects(
+    tmp_path, request, candidate_type, role_type, scorer, fixtures
+):
+    candidate_dicts, role_dicts = (request.getfixturevalue(f) for f in fixtures)
+    schemas = {
+        Candidate: (CANDIDATE_SCHEMA, ROLE_SCHEMA),
+        GeneralistCandidate: (GENERALIST_CANDIDATE_SCHEMA, GENERALIST_ROLE_SCHEMA),
+    }[candidate_type]
+    registry = VocabularyRegistry()
+    candidates = Table.read(
+        write_csv(tmp_path / "candidates.csv", candidate_dicts), schemas[0], registry
+    )
+    roles = Table.read(
+        write_csv(tmp_path / "roles.csv", role_dicts), schemas[1], registry
+    )
+    from_rows = scorer(candidates.rows(), roles.rows()).score()
+    from_objects = scorer(
+        [candidate_type(**data) for data in candidate_dicts],
+        [role_type(**data) for data in role_dicts],
+    ).score()
+    for rows, objects in zip(from_rows, from_objects):
+        assert np.array_equal(rows, objects)
+
+
+def test_bitsets_round_trip():
+    rows, ids = np.array([0, 0, 2, 1]), np.array([3, 70, 64, 0])
+    bits = to_bitsets(rows, ids, 3, 71)
+    assert bits.shape == (3, 2)
+    members = sorted(zip(*(a.tolist() for a in bitset_members(bits))))
+    assert members == sorted(zip(rows.tolist(), ids.tolist()))
+
+
+def test_contains():
+    bits = to_bitsets(np.array([0, 0, 1]), np.array([1, 65, 2]), 2, 66)
+    assert contains(bits, np.array([1, 2, 65])).tolist() == [
+        [True, False, True],
+        [False, True, False],
+    ]
+
+
+def test_subsets():
+    bits = to_bitsets(np.array([0, 1, 1]), np.array([3, 3, 70]), 3, 71)
+    supersets = to_bitsets(np.array([0, 0, 1]), np.array([3, 70, 3]), 2, 71)
+    assert subsets(bits, supersets).tolist() == [
+        [True, True],
+        [True, False],
+        [True, True],
+    ]
+
+
+def test_widen():
+    bits = to_bitsets(np.array([0]), np.array([5]), 1, 6)
+    widened = widen(bits, 130)
+    assert widened.shape == (1, 3)
+    assert contains(widened, np.array([5, 129])).tolist() == [[True, False]]
+
+
+def test_scorer_shares_the_tables_registry(
+    tmp_path, varied_candidate_dicts, varied_role_dicts
+):
+    registry = VocabularyRegistry()
+    candidates = Table.read(
+        write_csv(tmp_path / "candidates.csv", varied_candidate_dicts),
+        CANDIDATE_SCHEMA,
+        registry,
+    )
+    roles = Table.read(
+        write_csv(tmp_path / "roles.csv", varied_role_dicts), ROLE_SCHEMA, registry
+    )
+    scorer = ColumnarScorer(candidates.rows(), roles.rows())
+    assert scorer.registry is registry
+    assert scorer.roles["locations"].dtype == np.uint64
+
+
+def test_scoring_rows_from_separate_registries(
+    tmp_path, varied_candidate_dicts, varied_role_dicts
+):
+    candidates = Table.read(
+        write_csv(tmp_path / "candidates.csv", varied_candidate_dicts),
+        CANDIDATE_SCHEMA,
+    )
+    roles = Table.read(
+        write_csv(tmp_path / "roles.csv", varied_role_dicts), ROLE_SCHEMA
+    )
+    from_rows = ColumnarScorer(candidates.rows(), roles.rows()).score()
+    from_objects = ColumnarScorer(
+        [Candidate(**data) for data in varied_candidate_dicts],
+        [Role(**data) for data in varied_role_dicts],
+    ).score()
+    for rows, objects in zip(from_rows, from_objects):
+        assert np.array_equal(rows, objects)
+
+
+def test_models_keep_no_global_vocabulary(varied_candidate_dicts):
+    [Candidate(**data) for data in varied_candidate_dicts]
+    assert not hasattr(BaseClass, "departments")
+    assert not hasattr(Candidate, "departments")
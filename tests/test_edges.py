@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from fast_stream_22.matching.edges import EdgeGrid
+from fast_stream_22.matching.solvers import SOLVERS, get_solver
+from tests.test_solvers import random_grid, total
+
+
+@pytest.fixture
+def grid():
+    return random_grid(12, 9, disallowed_rate=0.6, seed=3)
+
+
+def assert_dense(edges, scores, allowed):
+    dense_scores, dense_allowed = edges.to_dense()
+    assert (dense_allowed == allowed).all()
+    assert (dense_scores[allowed] == scores[allowed]).all()
+
+
+def test_round_trip(grid):
+    scores, allowed = grid
+    edges = EdgeGrid.from_dense(scores, allowed)
+    assert edges.nnz == allowed.sum()
+    assert edges.scores.dtype == np.int32
+    assert_dense(edges, scores, allowed)
+
+
+def test_degrees(grid):
+    scores, allowed = grid
+    edges = EdgeGrid.from_dense(scores, allowed)
+    assert (edges.row_degrees() == allowed.sum(axis=1)).all()
+    assert (edges.column_degrees() == allowed.sum(axis=0)).all()
+
+
+def test_transpose(grid):
+    scores, allowed = grid
+    assert_dense(EdgeGrid.from_dense(scores, allowed).transpose(), scores.T, allowed.T)
+
+
+def test_take(grid):
+    scores, allowed = grid
+    rows, cols = np.array([5, 0, 11, 3]), np.array([8, 2, 4])
+    index = np.ix_(rows, cols)
+    assert_dense(
+        EdgeGrid.from_dense(scores, allowed).take(rows, cols),
+        scores[index],
+        allowed[index],
+    )
+
+
+def test_stack(grid):
+    scores, allowed = grid
+    edges = EdgeGrid.stack(
+        [
+            EdgeGrid.from_dense(scores[:5], allowed[:5]),
+            EdgeGrid.from_dense(scores[5:5], allowed[5:5]),
+            EdgeGrid.from_dense(scores[5:], allowed[5:]),
+        ],
+        scores.shape[1],
+    )
+    assert_dense(edges, scores, allowed)
+    assert EdgeGrid.stack([], 4).shape == (0, 4)
+
+
+def test_score(grid):
+    scores, allowed = grid
+    edges = EdgeGrid.from_dense(scores, allowed)
+    row, col = np.argwhere(allowed)[0]
+    assert edges.score(row, col) == scores[row, col]
+    row, col = np.argwhere(~allowed)[0]
+    with pytest.raises(KeyError):
+        edges.score(row, col)
+
+
+@pytest.mark.parametrize("name", sorted(SOLVERS))
+@pytest.mark.parametrize("shape", [(10, 14), (14, 10)])
+def test_solvers_accept_edges(name, shape):
+    scores, allowed = random_grid(*shape, disallowed_rate=0.6, seed=4)
+    solver = get_solver(name)
+    pairs = solver.solve_edges(EdgeGrid.from_dense(scores, allowed))
+    assert total(scores, allowed, pairs) == total(
+        scores, allowed, solver.solve(scores, allowed)
+    )
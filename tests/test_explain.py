@@ -0,0 +1,117 @@
+import pytest
+from click.testing import CliRunner
+
+from fast_stream_22.matching.explain import DecisionIndex, explain_pair, read_results
+from fast_stream_22.matching.read_in import read_rows
+from fast_stream_22.matching.scoring import ScoreCache
+from fast_stream_22.scripts.process_pairs import process_matches
+from fast_stream_22.specialism.generalist import (
+    GeneralistCandidate,
+    GeneralistPair,
+    GeneralistRole,
+)
+from fast_stream_22.specialism.models import Candidate, Role
+from fast_stream_22.specialism.pair import Pair
+
+
+@pytest.mark.parametrize(
+    "candidate_type, role_type, pair_type, fixtures",
+    [
+        (Candidate, Role, Pair, ("varied_candidate_dicts", "varied_role_dicts")),
+        (
+            GeneralistCandidate,
+            GeneralistRole,
+            GeneralistPair,
+            ("generalist_candidate_dicts", "generalist_role_dicts"),
+        ),
+    ],
+)
+def test_breakdown_agrees_with_the_cache(
+    request, candidate_type, role_type, pair_type, fixtures
+):
+    candidate_dicts, role_dicts = (request.getfixturevalue(f) for f in fixtures)
+    candidates = [candidate_type(**data) for data in candidate_dicts[:10]]
+    roles = [role_type(**data) for data in role_dicts]
+    cache = ScoreCache(candidates, roles, pair_type)
+    index = DecisionIndex(candidates, roles, pair_type)
+    for candidate in candidates:
+        for role in roles:
+            disqualified_by, contributions, score = index.breakdown(
+                candidate.uid, role.uid
+            )
+            assert sum(contributions.values()) == score
+            try:
+                assert score == cache.score(candidate.uid, role.uid)
+                assert not disqualified_by
+            except KeyError:
+                assert disqualified_by
+
+
+def test_alternatives(random_candidates, random_roles):
+    index = DecisionIndex(random_candidates, random_roles, Pair)
+    candidate = random_candidates[0].uid
+    alternatives = index.alternatives(candidate, top=3)
+    assert len(alternatives) <= 3
+    assert [score for _, score in alternatives] == sorted(
+        (score for _, score in alternatives), reverse=True
+    )
+    for role, score in alternatives:
+        assert index.breakdown(candidate, role)[2] == score
+    cached = DecisionIndex(
+        random_candidates,
+        random_roles,
+        Pair,
+        ScoreCache(random_candidates, random_roles, Pair),
+    )
+    assert cached.alternatives(candidate, top=3) == alternatives
+
+
+def test_read_results(tmp_path):
+    path = tmp_path / "results.txt"
+    path.write_text(
+        "bids/count\n0,One,c1,r1,40\n0,One,c2,r2,35\n1,One,c1,r2,30\nMaster seed: 1\n"
+    )
+    assert read_results(path) == {0: {"c1": "r1", "c2": "r2"}, 1: {"c1": "r2"}}
+
+
+def test_explain_pair(tmp_path, csv_inputs):
+    _, roles, candidates = csv_inputs
+    index = DecisionIndex(*read_rows(candidates, roles), Pair)
+    candidate = next(iter(index.candidates))
+    role = index.roles[0].uid
+    results = tmp_path / "results.txt"
+    results.write_text(f"2,One,{candidate},R-elsewhere,40\n")
+    explanation = explain_pair(
+        candidates, roles, candidate, role, iteration=2, results_file=str(results)
+    )
+    assert explanation.candidate == candidate
+    assert explanation.paired_with == "R-elsewhere"
+    assert explanation.alternatives == index.alternatives(candidate)
+    assert explanation.describe()[0].startswith(candidate)
+
+
+def test_explain_command(csv_inputs):
+    _, roles, candidates = csv_inputs
+    candidate, role = (rows[0].uid for rows in read_rows(candidates, roles))
+    result = CliRunner().invoke(
+        process_matches,
+        [
+            "explain",
+            "--candidate",
+            candidate,
+            "--role",
+            role,
+            "--candidates",
+            candidates,
+            "--roles",
+            roles,
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert result.output.startswith(candidate)
+    unknown = CliRunner().invoke(
+        process_matches,
+        ["explain", "--candidate", "nobody", "--role", role]
+        + ["--candidates", candidates, "--roles", roles],
+    )
+    assert unknown.exit_code != 0
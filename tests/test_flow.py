@@ -0,0 +1,250 @@
+import itertools
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from fast_stream_22.matching.edges import EdgeGrid
+from fast_stream_22.matching.flow import assign_with_quotas, min_cost_flow
+from fast_stream_22.matching.match import (
+    Bid,
+    FlowProcess,
+    JointProcess,
+    compare_engines,
+    conduct_matching,
+    prepare_inputs,
+)
+from fast_stream_22.scripts.process_pairs import process_matches
+from fast_stream_22.specialism.models import Candidate, Cohort, Role
+
+
+def test_min_cost_flow_takes_the_cheaper_route():
+    # 0 -> 1 -> 3 costs 2 per unit, 0 -> 2 -> 3 costs 5, and each route carries 1
+    flow = min_cost_flow(
+        4, [0, 0, 1, 2], [1, 2, 3, 3], [1, 1, 1, 1], [-3, -1, 1, -4], 0, 3
+    )
+    assert flow.tolist() == [1, 1, 1, 1]
+    flow = min_cost_flow(
+        4, [0, 0, 1, 2], [1, 2, 3, 3], [1, 1, 1, 1], [1, 1, 1, 1], 0, 3
+    )
+    assert flow.tolist() == [0, 0, 0, 0]
+
+
+def test_min_cost_flow_needs_numbered_edges():
+    with pytest.raises(ValueError):
+        min_cost_flow(2, [1], [0], [1], [-1], 1, 0)
+
+
+def best_by_brute_force(scores, allowed, departments, lower, upper):
+    n_rows, n_cols = scores.shape
+    best = None
+    for choice in itertools.product(range(-1, n_cols), repeat=n_rows):
+        cols = [c for c in choice if c >= 0]
+        if len(set(cols)) != len(cols):
+            continue
+        if any(not allowed[r, c] for r, c in enumerate(choice) if c >= 0):
+            continue
+        counts = np.bincount(departments[cols], minlength=len(upper))
+        if np.any(counts > upper):
+            continue
+        key = (
+            int(np.minimum(counts, lower).sum()),
+            len(cols),
+            sum(int(scores[r, c]) for r, c in enumerate(choice) if c >= 0),
+        )
+        best = key if best is None else max(best, key)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_assign_with_quotas_is_optimal(seed):
+    generator = np.random.default_rng(seed)
+    scores = generator.integers(-5, 20, size=(4, 5))
+    allowed = generator.random((4, 5)) < 0.6
+    departments = generator.integers(0, 2, size=5)
+    upper = generator.integers(0, 4, size=2)
+    lower = np.minimum(generator.integers(0, 3, size=2), upper)
+    pairs = assign_with_quotas(
+        EdgeGrid.from_dense(scores, allowed), departments, lower, upper
+    )
+    rows, cols = zip(*pairs) if pairs else ((), ())
+    assert len(set(rows)) == len(rows) and len(set(cols)) == len(cols)
+    assert all(allowed[r, c] for r, c in pairs)
+    counts = np.bincount(departments[list(cols)], minlength=2)
+    assert np.all(counts <= upper)
+    found = (
+        int(np.minimum(counts, lower).sum()),
+        len(pairs),
+        sum(int(scores[r, c]) for r, c in pairs),
+    )
+    assert found == best_by_brute_force(scores, allowed, departments, lower, upper)
+
+
+def test_lower_bounds_come_before_scores():
+    scores = np.array([[100, 1]])
+    pairs = assign_with_quotas(
+        EdgeGrid.from_dense(scores, np.ones_like(scores, dtype=bool)),
+        np.array([0, 1]),
+        [0, 1],
+        [1, 1],
+    )
+    assert pairs == [(0, 1)]
+
+
+def test_flow_process_keeps_to_the_bids(random_candidates, random_roles):
+    bids = [
+        Bid(Cohort.factory(str(cohort)), department, number=3)
+        for cohort in range(1, 4)
+        for department in {role.department for role in random_roles}
+    ]
+    process = FlowProcess(random_candidates, random_roles, bids, True)
+    process.compute()
+    counted = process.counted_bids()
+    assert all(bid.count <= bid.number for bid in counted)
+    assert sum(bid.count for bid in counted) == sum(
+        len(pairs) for pairs in process.pairings.values()
+    )
+    roles = [role for pairs in process.pairings.values() for _, role, _ in pairs]
+    assert len(set(roles)) == len(roles)
+
+
+class FixedScores:
+    """
+    Stands in for a `ScoreCache`, with the score of each allowed pairing given by uid
+    """
+
+    def __init__(self, scores):
+        self.scores = scores
+
+    def grid(self, candidates, roles):
+        keys = [[(c.uid, r.uid) for r in roles] for c in candidates]
+        return EdgeGrid.from_dense(
+            np.array([[self.scores.get(key, 0) for key in row] for row in keys]),
+            np.array([[key in self.scores for key in row] for row in keys]),
+        )
+
+    def score(self, candidate_uid, role_uid):
+        return self.scores[(candidate_uid, role_uid)]
+
+
+def shared_role_intake():
+    """
+    Role A suits both cohorts and role B only the first, so matching the first cohort on its own gives it A
+    """
+    first, second = Cohort(1), Cohort(2)
+    candidates = [
+        MagicMock(spec=Candidate, uid="x", year_group=first),
+        MagicMock(spec=Candidate, uid="y", year_group=second),
+    ]
+    roles = [
+        MagicMock(
+            spec=Role,
+            uid="A",
+            department="co",
+            priority_role=1,
+            suitable_year_groups=[first, second],
+        ),
+        MagicMock(
+            spec=Role,
+            uid="B",
+            department="co",
+            priority_role=1,
+            suitable_year_groups=[first],
+        ),
+    ]
+    bids = [Bid(first, "CO", 1), Bid(second, "CO", 1)]
+    cache = FixedScores({("x", "A"): 10, ("x", "B"): 9, ("y", "A"): 10})
+    return candidates, roles, bids, cache
+
+
+@pytest.mark.parametrize(
+    "engine, pairs, total", [(FlowProcess, 1, 10), (JointProcess, 2, 19)]
+)
+def test_joint_process_shares_roles_between_cohorts(engine, pairs, total):
+    candidates, roles, bids, cache = shared_role_intake()
+    process = engine(candidates, roles, bids, False, cache=cache)
+    process.compute()
+    results = [pair for cohort in process.pairings.values() for pair in cohort]
+    assert len(results) == pairs
+    assert sum(score for _, _, score in results) == total
+
+
+def test_joint_process_prices_a_role_contested_across_cohorts():
+    candidates, roles, bids, _ = shared_role_intake()
+    roles.append(
+        MagicMock(
+            spec=Role,
+            uid="C",
+            department="co",
+            priority_role=1,
+            suitable_year_groups=[roles[0].suitable_year_groups[1]],
+        )
+    )
+    cache = FixedScores({("x", "A"): 10, ("x", "B"): 8, ("y", "A"): 10, ("y", "C"): 8})
+    process = JointProcess(candidates, roles, bids, False, cache=cache)
+    process.compute()
+    # A costs 1 and then 3, at which the first cohort moves to B, leaving A to the second cohort alone
+    assert process.prices.tolist() == [3, 0, 0]
+    assert [pairs for pairs in process.pairings.values()] == [
+        [("x", "B", 8)],
+        [("y", "A", 10)],
+    ]
+
+
+def test_joint_process_keeps_to_the_bids(random_candidates, random_roles):
+    bids = [
+        Bid(Cohort.factory(str(cohort)), department, number=3)
+        for cohort in range(1, 4)
+        for department in {role.department for role in random_roles}
+    ]
+    process = JointProcess(random_candidates, random_roles, bids, True)
+    process.compute()
+    assert all(bid.count <= bid.number for bid in process.counted_bids())
+    roles = {role.uid: role for role in random_roles}
+    paired = [
+        (cohort, roles[role])
+        for cohort, pairs in process.pairings.items()
+        for _, role, _ in pairs
+    ]
+    assert len({role.uid for _, role in paired}) == len(paired)
+    assert all(cohort in role.suitable_year_groups for cohort, role in paired)
+
+
+def test_flow_engine_is_deterministic(csv_inputs):
+    outcomes = conduct_matching(*csv_inputs, True, None, 3, "jv", seed=1, engine="flow")
+    assert len({outcome.total_score for outcome in outcomes.values()}) == 1
+
+
+def test_compare_engines(csv_inputs):
+    inputs = prepare_inputs(*csv_inputs, True, None, "jv")
+    summaries = compare_engines(inputs, range(2), 5)
+    assert [summary.engine for summary in summaries] == ["rounds", "flow", "joint"]
+    rounds = conduct_matching(*csv_inputs, True, None, 2, "jv", seed=5)
+    assert summaries[0].best_total_score == max(o.total_score for o in rounds.values())
+    flow = summaries[1]
+    assert flow.solved == 1
+    assert flow.bids_at_minimum <= flow.bids
+    for summary in summaries:
+        assert summary.score_gap == summary.best_total_score - max(
+            o.total_score for o in rounds.values()
+        )
+
+
+def test_compare_engines_command(csv_inputs):
+    bids, roles, candidates = csv_inputs
+    result = CliRunner().invoke(
+        process_matches,
+        ["compare-engines", "--bids", bids, "--roles", roles]
+        + ["--candidates", candidates, "--iterations", "2", "--seed", "4"],
+    )
+    assert result.exit_code == 0, result.output
+    lines = result.output.splitlines()
+    header = lines.index(
+        "engine,solved,best_total_score,mean_total_score,pairs,success_count,"
+        "bids_at_minimum,bids,score_gap"
+    )
+    assert [line.split(",")[0] for line in lines[header + 1 : header + 3]] == [
+        "rounds",
+        "flow",
+    ]
@@ -0,0 +1,32 @@
+import pytest
+
+from fast_stream_22.matching.scoring import GeneralistColumnarScorer
+from fast_stream_22.specialism.generalist import (
+    GeneralistCandidate,
+    GeneralistPair,
+    GeneralistRole,
+)
+from tests.test_scoring import columnar_grid, object_grid
+
+
+@pytest.fixture
+def generalist_candidates(generalist_candidate_dicts):
+    return [GeneralistCandidate(**data) for data in generalist_candidate_dicts]
+
+
+@pytest.fixture
+def generalist_roles(generalist_role_dicts):
+    return [GeneralistRole(**data) for data in generalist_role_dicts]
+
+
+def test_grid_matches_generalist_pair_objects(generalist_candidates, generalist_roles):
+    expected = object_grid(generalist_candidates, generalist_roles, GeneralistPair)
+    assert (
+        columnar_grid(generalist_candidates, generalist_roles, GeneralistColumnarScorer)
+        == expected
+    )
+
+
+@pytest.mark.parametrize("method_name", sorted(GeneralistPair.scoring_method_names))
+def test_each_method_is_mirrored(method_name):
+    assert callable(getattr(GeneralistColumnarScorer, method_name))
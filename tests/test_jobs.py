@@ -0,0 +1,111 @@
+from functools import partial
+
+from click.testing import CliRunner
+
+from fast_stream_22.matching.jobs import MatchingJob, Progress
+from fast_stream_22.matching.match import conduct_matching, prepare_inputs
+from fast_stream_22.scripts.process_pairs import follow_job, process_matches
+
+
+def make_job(csv_inputs, iterations: int, **kwargs) -> MatchingJob:
+    return MatchingJob(
+        partial(prepare_inputs, *csv_inputs, True, None, "jv"),
+        range(iterations),
+        7,
+        **kwargs,
+    )
+
+
+def test_job_agrees_with_conduct_matching(csv_inputs):
+    job = make_job(csv_inputs, 3, keep_outcomes=True)
+    job.run()
+    expected = conduct_matching(*csv_inputs, True, None, 3, "jv", seed=7)
+    assert job.status == "done"
+    assert [o.total_score for o in job.outcomes.values()] == [
+        o.total_score for o in expected.values()
+    ]
+    progress = job.progress()
+    assert progress.iterations_done == 3
+    assert progress.best_total_score == max(o.total_score for o in expected.values())
+    assert progress.iterations_per_second > 0
+
+
+def test_job_keeps_only_the_best_outcomes(csv_inputs):
+    job = make_job(csv_inputs, 3)
+    outcomes = [event.outcome for event in job.start().events() if event.outcome]
+    assert job.outcomes == {}
+    assert job.progress().iterations_solved == len(outcomes) == 3
+    assert job.best_by_score.total_score == max(o.total_score for o in outcomes)
+    assert job.best_by_success.success_count == max(o.success_count for o in outcomes)
+
+
+def test_events_follow_the_job(csv_inputs):
+    job = make_job(csv_inputs, 3)
+    events = job.events()
+    assert next(events).progress.status == "queued"
+    job.start()
+    rest = list(events)
+    assert [event.name for event in rest] == ["running"] + ["iteration"] * 3 + ["done"]
+    assert [event.iteration for event in rest[1:4]] == [0, 1, 2]
+    assert rest[-1].progress.iterations_done == 3
+    assert [event.name for event in job.events()] == ["done"]
+
+
+def test_events_follow_the_job_from_when_they_are_asked_for(csv_inputs):
+    job = make_job(csv_inputs, 3)
+    events = job.events()
+    job.run()
+    assert [event.iteration for event in events if event.outcome] == [0, 1, 2]
+
+
+def test_follow_job_hears_about_every_iteration(csv_inputs):
+    job = make_job(csv_inputs, 3)
+    start = job.start
+
+    def start_and_finish():
+        start().wait()
+        return job
+
+    job.start = start_and_finish
+    assert [iteration for iteration, _ in follow_job(job)] == [0, 1, 2]
+
+
+def test_cancel_keeps_the_iterations_run(csv_inputs):
+    job = make_job(csv_inputs, 50, keep_outcomes=True).start()
+    for event in job.events():
+        if event.iteration is not None:
+            job.cancel()
+    assert job.status == "cancelled"
+    assert 1 <= job.iterations_done < 50
+    assert len(job.outcomes) == job.progress().iterations_solved
+
+
+def test_cancel_before_starting(csv_inputs):
+    job = make_job(csv_inputs, 3)
+    job.cancel()
+    job.run()
+    assert job.status == "cancelled" and job.iterations_done == 0
+
+
+def test_progress_line():
+    progress = Progress("running", 10, 4, 3, 2, 900, 1, 12, 2.0)
+    assert (
+        progress.describe()
+        == "4/10 iterations, 3 solved, best score 900 (iteration 2),"
+        " best success 12 (iteration 1), 2.00 iterations/s, about 3s left"
+    )
+
+
+def test_progress_option(csv_inputs):
+    bids, roles, candidates = csv_inputs
+    arguments = ["--bids", bids, "--roles", roles, "--candidates", candidates]
+    arguments += ["--iterations", "2", "--seed", "3", "--solver", "jv"]
+    plain = CliRunner().invoke(process_matches, arguments)
+    result = CliRunner().invoke(process_matches, arguments + ["--progress"])
+    assert result.exit_code == 0, result.output
+    assert "\r2/2 iterations, 2 solved" in result.stderr
+    assert without_timing(result.stdout) == without_timing(plain.stdout)
+
+
+def without_timing(output: str) -> list[str]:
+    return [line for line in output.splitlines() if not line.startswith("Task")]
@@ -1,12 +1,20 @@
+import csv
 from unittest.mock import patch
 
-from munkres import DISALLOWED
+import numpy as np
+import pytest
 
 from fast_stream_22.matching.match import Matching
+from fast_stream_22.matching.scoring import ColumnarScorer, ScoreCache
 from fast_stream_22.specialism.models import Candidate, Role
 from fast_stream_22.specialism.pair import Pair
 
 
+def disqualify_all(n_candidates, n_roles):
+    shape = (n_candidates, n_roles)
+    return np.zeros(shape, dtype=int), np.ones(shape, dtype=bool)
+
+
 class TestMatchClass:
     def test_instantiation(self, random_candidate_dict, random_role_dict):
         c = Candidate(**random_candidate_dict())
@@ -18,16 +26,67 @@ class TestMatchClass:
         m = Matching(random_candidates, random_roles, Pair)
         assert m
 
-    def test_match_process_works(self, random_candidates, random_roles):
-        with patch("fast_stream_22.specialism.pair.Pair._check_score"):
-            m = Matching(random_candidates, random_roles, Pair)
+    @pytest.mark.parametrize("vectorised", [True, False])
+    def test_match_process_works(self, random_candidates, random_roles, vectorised):
+        with patch.dict(Pair.min_score, clear=True):
+            m = Matching(random_candidates, random_roles, Pair, vectorised)
             pairs = m.match()
             assert pairs
 
     def test_reject_impossible_roles(self, random_candidates, random_roles):
         with patch(
-            "fast_stream_22.matching.match.Matching.score_or_disqualify",
-            return_value=DISALLOWED,
+            "fast_stream_22.matching.match.score_objects",
+            lambda c, r, pair_type: disqualify_all(len(c), len(r)),
+        ):
+            m = Matching(random_candidates, random_roles, Pair, vectorised=False)
+            assert m.reject_impossible_roles() == random_roles
+
+    def test_reject_impossible_roles_when_vectorised(
+        self, random_candidates, random_roles
+    ):
+        with patch.object(
+            ColumnarScorer, "score", lambda scorer: disqualify_all(*scorer.shape)
         ):
             m = Matching(random_candidates, random_roles, Pair)
             assert m.reject_impossible_roles() == random_roles
+
+    def test_grid_is_sliced_from_cache(self, random_candidates, random_roles):
+        cache = ScoreCache(random_candidates, random_roles, Pair)
+        candidates, roles = random_candidates[::2], random_roles[1::3]
+        cached = Matching(candidates[:], roles[:], Pair, rng=3, cache=cache)
+        scored = Matching(candidates[:], roles[:], Pair, rng=3)
+        for a, b in zip(cached.typed_grid(), scored.typed_grid()):
+            assert (a == b).all()
+
+    def test_dump_edges(self, random_candidates, random_roles, tmp_path):
+        m = Matching(random_candidates, random_roles, Pair)
+        m.dump_edges(tmp_path / "log.csv")
+        with open(tmp_path / "log.csv") as log:
+            rows = list(csv.DictReader(log))
+        assert len(rows) == m.edges.nnz
+        row = rows[0]
+        candidate = [c.uid for c in m.candidates].index(row["candidate"])
+        role = [r.uid for r in m.roles].index(row["role"])
+        assert m.edges.score(candidate, role) == int(row["score"])
+
+    def test_update_only_scores_new_roles(self, random_candidates, random_roles):
+        m = Matching(random_candidates[:40], random_roles[:30], Pair, rng=1)
+        candidates, roles = m.candidates[5:], [*m.roles[3:], *random_roles[30:40]]
+        with patch.object(
+            Matching, "_score", autospec=True, side_effect=Matching._score
+        ) as score:
+            m.update(candidates, roles)
+        (_, scored_candidates, scored_roles), _ = score.call_args
+        assert len(scored_candidates) == 35
+        assert {r.uid for r in scored_roles} == {r.uid for r in random_roles[30:40]}
+        assert {c.uid for c in m.candidates} == {c.uid for c in candidates}
+        assert {r.uid for r in m.roles} == {r.uid for r in roles}
+        expected = ColumnarScorer(m.candidates, m.roles).score()
+        scores, allowed = m.typed_grid()
+        assert (allowed == ~expected[1]).all()
+        assert (scores[allowed] == expected[0][allowed]).all()
+
+    def test_update_cannot_add_candidates(self, random_candidates, random_roles):
+        m = Matching(random_candidates[:40], random_roles, Pair)
+        with pytest.raises(ValueError):
+            m.update(random_candidates, random_roles)
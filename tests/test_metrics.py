@@ -0,0 +1,95 @@
+from click.testing import CliRunner
+
+from fast_stream_22.matching.match import (
+    Bid,
+    Matching,
+    Process,
+    conduct_matching,
+    iterate_matching,
+    prepare_inputs,
+)
+from fast_stream_22.matching.metrics import NULL_METRICS, Metrics
+from fast_stream_22.scripts.process_pairs import process_matches
+from fast_stream_22.specialism.models import Cohort
+from fast_stream_22.specialism.pair import Pair
+
+
+def test_metrics_merge():
+    first, second = Metrics(), Metrics()
+    with first.time("solve"):
+        pass
+    first.grid(2, 3, 3)
+    second.grid(4, 1, 2)
+    second.count("rounds", 2)
+    first.merge(second.as_dict())
+    assert first.calls == {"solve": 1}
+    assert first.counts["grids"] == 2 and first.counts["rounds"] == 2
+    assert dict(first.largest) == {"grid_rows": 4, "grid_cols": 3}
+    assert first.disqualified_share == 0.5
+
+
+def test_null_metrics_record_nothing():
+    with NULL_METRICS.time("solve"):
+        NULL_METRICS.count("rounds")
+        NULL_METRICS.grid(2, 2, 1)
+    assert NULL_METRICS.as_dict() == {}
+    assert NULL_METRICS.spawn() is NULL_METRICS
+
+
+def test_matching_records_its_stages(random_candidates, random_roles):
+    metrics = Metrics()
+    matching = Matching(random_candidates, random_roles, Pair, metrics=metrics)
+    matching.reject_impossible_roles()
+    assert set(metrics.calls) == {"score", "reject"}
+    assert metrics.counts["grid_cells"] == len(random_candidates) * len(random_roles)
+    assert metrics.counts["grid_allowed"] == matching.edges.nnz
+
+
+def test_process_counts_rounds(random_candidates, random_roles):
+    bids = [Bid(Cohort.factory(str(cohort)), "co", 1) for cohort in range(1, 4)]
+    metrics = Metrics()
+    Process(random_candidates, random_roles, bids, metrics=metrics).match_cohort(
+        Cohort.One, round_number=5
+    )
+    assert metrics.counts == {"round_limits": 1}
+
+
+def test_outcomes_carry_metrics_only_when_profiling(csv_inputs):
+    plain = conduct_matching(*csv_inputs, True, None, 2, "jv", seed=7)
+    assert all(outcome.metrics == {} for outcome in plain.values())
+    profile = Metrics()
+    profiled = conduct_matching(
+        *csv_inputs, True, None, 2, "jv", seed=7, profile=profile
+    )
+    assert [o.total_score for o in profiled.values()] == [
+        o.total_score for o in plain.values()
+    ]
+    for outcome in profiled.values():
+        assert outcome.metrics["counts"]["iterations"] == 1
+        assert outcome.metrics["counts"]["rounds"] >= 1
+        assert outcome.metrics["calls"]["solve"] >= 1
+    assert profile.counts["iterations"] == 2
+    assert profile.calls["read"] == profile.calls["score_cache"] == 1
+
+
+def test_unsolvable_iterations_are_counted(csv_inputs):
+    inputs = prepare_inputs(*csv_inputs, True, None, "jv", metrics=Metrics())
+    inputs.bids = [Bid(Cohort.One, "nowhere", 5)]
+    assert list(iterate_matching(inputs, range(2), 1)) == [(0, None), (1, None)]
+    assert inputs.metrics.counts["out_of_roles"] == 2
+
+
+def test_profile_option(csv_inputs):
+    bids, roles, candidates = csv_inputs
+    result = CliRunner().invoke(
+        process_matches,
+        ["--bids", bids, "--roles", roles, "--candidates", candidates]
+        + ["--iterations", "2", "--seed", "3", "--solver", "jv", "--profile"],
+    )
+    assert result.exit_code == 0, result.output
+    lines = result.output.splitlines()
+    stages = lines[
+        lines.index("stage,seconds,calls") + 1 : lines.index("counter,value")
+    ]
+    assert {line.split(",")[0] for line in stages} >= {"read", "score", "solve"}
+    assert "iterations,2" in lines
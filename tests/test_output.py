@@ -0,0 +1,86 @@
+import io
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from fast_stream_22.matching.explain import read_results
+from fast_stream_22.matching.match import conduct_matching, stream_matching
+from fast_stream_22.matching.output import (
+    ColumnarPairWriter,
+    PairWriter,
+    pair_writer,
+    read_pair_columns,
+)
+from fast_stream_22.scripts.process_pairs import process_matches
+
+
+def test_stream_matching_yields_in_order(csv_inputs):
+    streamed = list(stream_matching(*csv_inputs, True, None, 4, "jv", seed=7))
+    assert [i for i, _ in streamed] == sorted(i for i, _ in streamed)
+    collected = conduct_matching(*csv_inputs, True, None, 4, "jv", seed=7)
+    assert {i: o.total_score for i, o in streamed} == {
+        i: o.total_score for i, o in collected.items()
+    }
+
+
+def test_pair_writer_rows(csv_inputs):
+    outcomes = conduct_matching(*csv_inputs, True, None, 2, "jv", seed=7)
+    stream = io.StringIO()
+    with PairWriter(stream) as writer:
+        for iteration, outcome in outcomes.items():
+            writer.write(iteration, outcome)
+    expected = [
+        f"{iteration},{cohort.name},{','.join(map(str, pair))}"
+        for iteration, outcome in outcomes.items()
+        for cohort, pairs in outcome.outcomes.items()
+        for pair in pairs
+    ]
+    assert stream.getvalue().splitlines() == expected
+
+
+def test_columnar_pair_writer(tmp_path, csv_inputs):
+    outcomes = conduct_matching(*csv_inputs, True, None, 2, "jv", seed=7)
+    path = str(tmp_path / "pairs.npz")
+    writer = pair_writer(path)
+    assert isinstance(writer, ColumnarPairWriter)
+    with writer:
+        for iteration, outcome in outcomes.items():
+            writer.write(iteration, outcome)
+    columns = read_pair_columns(path)
+    rows = [
+        (iteration, cohort.value, *pair)
+        for iteration, outcome in outcomes.items()
+        for cohort, pairs in outcome.outcomes.items()
+        for pair in pairs
+    ]
+    assert (
+        list(zip(*(columns[name].tolist() for name in ColumnarPairWriter.fields)))
+        == rows
+    )
+    assert columns["score"].dtype == np.int32
+    expected = {}
+    for iteration, _, candidate, role, _ in rows:
+        expected.setdefault(iteration, {})[candidate] = role
+    assert read_results(path) == expected
+    assert writer.stream.closed
+
+
+def test_columnar_pair_writer_fails_before_matching(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        pair_writer(str(tmp_path / "missing" / "pairs.npz"))
+
+
+def test_output_option(tmp_path, csv_inputs):
+    bids, roles, candidates = csv_inputs
+    arguments = ["--bids", bids, "--roles", roles, "--candidates", candidates]
+    arguments += ["--iterations", "2", "--seed", "7"]
+    printed = CliRunner().invoke(process_matches, arguments)
+    assert printed.exit_code == 0, printed.output
+    path = tmp_path / "pairs.csv"
+    written = CliRunner().invoke(process_matches, arguments + ["--output", str(path)])
+    assert written.exit_code == 0, written.output
+    rows = path.read_text().splitlines()
+    assert rows
+    assert all(row in printed.output.splitlines() for row in rows)
+    assert not any(row in written.output.splitlines() for row in rows)
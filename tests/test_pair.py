@@ -1,6 +1,10 @@
-from unittest.mock import MagicMock
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
+from click.testing import CliRunner
 
 from fast_stream_22.specialism.models import (
     Candidate,
@@ -8,7 +12,15 @@ from fast_stream_22.specialism.models import (
     Nationality,
     NationalityRequirement,
 )
-from fast_stream_22.specialism.pair import Pair
+from fast_stream_22.matching.scoring import ColumnarScorer, score_objects
+from fast_stream_22.scripts.process_pairs import process_matches
+from fast_stream_22.specialism.pair import (
+    BasePair,
+    CheckStats,
+    Pair,
+    TracedPair,
+    is_check,
+)
 
 
 @pytest.fixture
@@ -45,3 +57,181 @@ class TestPair:
         pair.role.nationality_requirement = NationalityRequirement["BRITISH_NATIONAL"]
         pair._check_nationality()
         assert pair.disqualified
+
+
+@pytest.fixture
+def fresh_stats(monkeypatch):
+    stats = CheckStats()
+    monkeypatch.setattr(Pair, "check_stats", stats)
+    return stats
+
+
+class TestScoringPlan:
+    def test_checks_come_first(self, fresh_stats):
+        plan = Pair.scoring_plan()
+        checks = [name for name in plan if is_check(name)]
+        assert plan[: len(checks)] == checks
+        assert sorted(plan) == sorted(Pair.scoring_method_names)
+
+    def test_checks_ordered_by_rejection_rate(self, fresh_stats):
+        fresh_stats.record(
+            100,
+            dict.fromkeys(Pair.scoring_method_names, 100),
+            {"_check_stretch": 60, "_check_passport": 30},
+        )
+        assert Pair.scoring_plan()[:2] == ["_check_stretch", "_check_passport"]
+
+    def test_score_pair_stops_at_first_rejection(self, fresh_stats, pair_with_mocks):
+        first = Pair.scoring_plan()[0]
+        with patch.object(
+            Pair, first, lambda pair: setattr(pair, "disqualified", True)
+        ):
+            pair_with_mocks.score_pair()
+        assert fresh_stats.report() == [(first, 1, 1, 2 / 3)]
+        assert fresh_stats.calls_per_pair() == 1
+
+    def test_columnar_scorer_counts_like_pairs(
+        self, fresh_stats, varied_candidate_dicts, varied_role_dicts, monkeypatch
+    ):
+        monkeypatch.setattr(Pair, "replan_every", 10**9)
+        candidates = [Candidate(**data) for data in varied_candidate_dicts]
+        roles = [Role(**data) for data in varied_role_dicts]
+        plan = Pair.scoring_plan()
+        for candidate in candidates:
+            for role in roles:
+                Pair(candidate, role).score_pair()
+        by_pair = fresh_stats.report()
+        fresh_stats.reset()
+        fresh_stats.plan = plan
+        ColumnarScorer(candidates, roles).score()
+        assert fresh_stats.report() == by_pair
+        assert fresh_stats.pairs == len(candidates) * len(roles)
+
+    def test_pairs_scored_on_many_threads_are_all_counted(
+        self, fresh_stats, varied_candidate_dicts, varied_role_dicts, monkeypatch
+    ):
+        monkeypatch.setattr(Pair, "replan_every", 7)
+        candidates = [Candidate(**data) for data in varied_candidate_dicts]
+        roles = [Role(**data) for data in varied_role_dicts]
+
+        def score(candidate):
+            for role in roles:
+                Pair(candidate, role).score_pair()
+
+        for candidate in candidates:
+            score(candidate)
+        fresh_stats.flush()
+        rejected = sum(fresh_stats.rejections.values())
+        fresh_stats.reset()
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(score, candidates * 4))
+        fresh_stats.flush()
+        assert fresh_stats.pairs == 4 * len(candidates) * len(roles)
+        assert sum(fresh_stats.rejections.values()) == 4 * rejected
+
+    def test_a_batch_counts_like_pairs_without_taking_the_lock_for_each(
+        self, fresh_stats, varied_candidate_dicts, varied_role_dicts, monkeypatch
+    ):
+        monkeypatch.setattr(Pair, "replan_every", 10**9)
+        candidates = [Candidate(**data) for data in varied_candidate_dicts]
+        roles = [Role(**data) for data in varied_role_dicts]
+        plan = Pair.scoring_plan()
+        for candidate in candidates:
+            for role in roles:
+                Pair(candidate, role).score_pair()
+        by_pair = fresh_stats.report()
+        fresh_stats.reset()
+        fresh_stats.plan = plan
+        fresh_stats.lock = CountingLock()
+        score_objects(candidates, roles, Pair)
+        assert fresh_stats.lock.taken <= 2
+        assert fresh_stats.report() == by_pair
+
+    def test_batches_on_many_threads_are_all_counted(
+        self, fresh_stats, varied_candidate_dicts, varied_role_dicts, monkeypatch
+    ):
+        monkeypatch.setattr(Pair, "replan_every", 7)
+        candidates = [Candidate(**data) for data in varied_candidate_dicts]
+        roles = [Role(**data) for data in varied_role_dicts]
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda c: score_objects([c], roles, Pair), candidates * 4))
+        assert fresh_stats.calls_per_pair() > 0
+        assert fresh_stats.pairs == 4 * len(candidates) * len(roles)
+
+
+class CountingLock:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.taken = 0
+
+    def __enter__(self):
+        self.lock.acquire()
+        self.taken += 1
+
+    def __exit__(self, *exc):
+        self.lock.release()
+
+
+class TestTracing:
+    def test_untraced_methods_are_not_wrapped(self):
+        assert not Pair.tracing
+        assert Pair.trace_buffer is None
+        for name in Pair.scoring_method_names:
+            assert getattr(Pair, name) is getattr(BasePair, name)
+
+    def test_traced_pairs_record_decisions(self, random_candidates, random_roles):
+        TracedPair.trace_buffer.clear()
+        candidate, role = random_candidates[0], random_roles[0]
+        pair = TracedPair(candidate, role)
+        untraced = Pair(candidate, role)
+        assert pair.score_pair() == untraced.score_pair()
+        columns = TracedPair.trace_buffer.columns()
+        assert set(columns["candidate"]) == {candidate.uid}
+        assert set(columns["role"]) == {role.uid}
+        assert columns["disqualified"].sum() == untraced.disqualified
+        assert columns["score_change"].sum() == pair.score
+
+    def test_subclasses_choose_their_own_mode(self):
+        class Untraced(TracedPair, trace=False):
+            pass
+
+        assert not Untraced.tracing
+        assert Untraced._check_clearance is BasePair._check_clearance
+        assert TracedPair._check_clearance._untraced is BasePair._check_clearance
+
+    def test_columnar_scorer_does_not_stand_in_for_tracing(self):
+        assert ColumnarScorer.supports(Pair)
+        assert not ColumnarScorer.supports(TracedPair)
+
+    def test_export(self, tmp_path):
+        buffer = TracedPair.trace_buffer
+        buffer.clear()
+        buffer.add("c", "r", "_check_clearance", True, 0)
+        buffer.add("c", "r2", "_score_skill", False, 15)
+        buffer.to_csv(tmp_path / "trace.csv")
+        assert (tmp_path / "trace.csv").read_text().splitlines() == [
+            "candidate,role,method,disqualified,score_change",
+            "c,r,_check_clearance,True,0",
+            "c,r2,_score_skill,False,15",
+        ]
+        buffer.save_columns(tmp_path / "trace.npz")
+        with np.load(tmp_path / "trace.npz") as saved:
+            assert saved["role"].tolist() == ["r", "r2"]
+            assert saved["score_change"].tolist() == [0, 15]
+        buffer.clear()
+
+
+def test_check_stats_count_each_run_of_the_class_that_scored(csv_inputs, tmp_path):
+    bids, roles, candidates = csv_inputs
+    arguments = ["--bids", bids, "--roles", roles, "--candidates", candidates]
+    arguments += ["--iterations", "1", "--solver", "jv", "--check-stats"]
+    arguments += ["--trace", str(tmp_path / "trace.csv")]
+    for _ in range(2):
+        result = CliRunner().invoke(process_matches, arguments)
+        assert result.exit_code == 0, result.output
+        lines = result.output.splitlines()
+        start = lines.index("method,calls,rejections,rejection_rate") + 1
+        rows = [line.split(",") for line in lines[start:] if line.startswith("_")]
+        rejected = sum(int(rejections) for _, _, rejections, _ in rows)
+        scored = next(int(calls) for name, calls, _, _ in rows if not is_check(name))
+        assert rejected + scored == 30 * 90
@@ -1,7 +1,17 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock
 
-from fast_stream_22.matching.match import Process, Bid
-from fast_stream_22.specialism.models import Candidate
+from fast_stream_22.matching import match
+
+from fast_stream_22.matching.match import (
+    Process,
+    Bid,
+    IterationState,
+)
+from fast_stream_22.matching.solvers import get_solver
+from fast_stream_22.specialism.models import Candidate, Cohort, Role
+from tests.conftest import departments
 
 
 class TestProcess:
@@ -21,3 +31,129 @@ class TestProcess:
         first = all_roles[0]
         last = all_roles[-1]
         assert first.priority_role.value > last.priority_role.value
+
+
+class TestIterationState:
+    def test_reset(self):
+        state = IterationState.empty(3, 4, 2)
+        state.candidate_paired[1] = True
+        state.role_rejected[2] = True
+        state.bid_counts[0] = 5
+        state.reset()
+        assert not state.candidate_paired.any()
+        assert not state.role_rejected.any()
+        assert not state.bid_counts.any()
+
+    def test_process_does_not_change_inputs(
+        self, tmp_path, monkeypatch, random_candidate_dict, random_role_dict
+    ):
+        monkeypatch.chdir(tmp_path)
+        rng = random.Random(0)
+        random_candidates = [Candidate(**random_candidate_dict(rng)) for _ in range(30)]
+        random_roles = []
+        for _ in range(90):
+            data = random_role_dict(rng)
+            data.update(
+                passport_requirement="False", location="Remote", skill_focus="Digital"
+            )
+            random_roles.append(Role(**data))
+        bids = [
+            Bid(Cohort.factory(year), dept, 3) for year in "123" for dept in departments
+        ]
+        process = Process(
+            random_candidates, random_roles, bids, solver=get_solver("jv"), rng=1
+        )
+        process.compute()
+        assert sum(map(len, process.pairings.values())) > 0
+        assert process.state.candidate_paired.any()
+        assert not any(c.paired for c in random_candidates)
+        assert not any(r.paired or r.no_match for r in random_roles)
+        assert all(bid.count == 0 for bid in bids)
+        assert [b.count for b in process.counted_bids()] == list(
+            process.state.bid_counts
+        )
+
+
+class TestCohortGroups:
+    @staticmethod
+    def single_cohort_roles(random_role_dict, rng=None):
+        roles = []
+        for year in "123":
+            for _ in range(30):
+                data = random_role_dict(rng)
+                data.update(
+                    suitable_for_year_group=year,
+                    passport_requirement="False",
+                    location="Remote",
+                    skill_focus="Digital",
+                )
+                roles.append(Role(**data))
+        return roles
+
+    @staticmethod
+    def bids():
+        return [
+            Bid(Cohort.factory(year), dept, 4) for year in "123" for dept in departments
+        ]
+
+    def test_groups_split_on_shared_roles(self, random_candidates, random_role_dict):
+        roles = self.single_cohort_roles(random_role_dict)
+        process = Process(random_candidates, roles, self.bids(), True)
+        assert process.cohort_groups() == [[Cohort.Three], [Cohort.Two], [Cohort.One]]
+        data = random_role_dict()
+        data.update(suitable_for_year_group="1,3", department=departments[0])
+        process = Process(random_candidates, roles + [Role(**data)], self.bids(), True)
+        assert process.cohort_groups() == [[Cohort.Three, Cohort.One], [Cohort.Two]]
+
+    def test_result_does_not_depend_on_workers(
+        self, random_candidate_dict, random_role_dict
+    ):
+        rng = random.Random(0)
+        random_candidates = [Candidate(**random_candidate_dict(rng)) for _ in range(30)]
+        roles = self.single_cohort_roles(random_role_dict, rng)
+        outcomes = []
+        for workers in (1, 3):
+            process = Process(
+                random_candidates,
+                roles,
+                self.bids(),
+                True,
+                solver=get_solver("jv"),
+                rng=5,
+                cohort_workers=workers,
+            )
+            process.compute()
+            outcomes.append(
+                (
+                    dict(process.pairings),
+                    list(process.state.bid_counts),
+                    process.state.role_paired.sum(),
+                )
+            )
+        assert outcomes[0] == outcomes[1]
+        pairings, counts, roles_paired = outcomes[0]
+        assert 0 < sum(counts) == roles_paired == sum(map(len, pairings.values()))
+
+    def test_groups_go_on_threads_only_if_the_solver_releases_the_gil(
+        self, monkeypatch, random_candidate_dict, random_role_dict
+    ):
+        threads = []
+        monkeypatch.setattr(
+            match,
+            "ThreadPoolExecutor",
+            lambda workers: threads.append(workers) or ThreadPoolExecutor(workers),
+        )
+        rng = random.Random(0)
+        random_candidates = [Candidate(**random_candidate_dict(rng)) for _ in range(30)]
+        roles = self.single_cohort_roles(random_role_dict, rng)
+        for solver in ("sparse", "jv"):
+            process = Process(
+                random_candidates,
+                roles,
+                self.bids(),
+                True,
+                solver=get_solver(solver),
+                cohort_workers=2,
+            )
+            process.compute()
+        assert threads == [2]
@@ -1,3 +1,16 @@
+import csv
+import os
+
+import pytest
+
+from fast_stream_22.matching.columns import Table
+from fast_stream_22.matching.read_in import (
+    CacheInfo,
+    InputCache,
+    input_cache,
+    read_candidates,
+    read_rows,
+)
 from fast_stream_22.specialism.models import Candidate
 
 
@@ -25,3 +38,113 @@ class TestInstantiation:
         ]
         candidate = Candidate(*c_data_row)
         assert candidate
+
+
+def write_candidates(path, rows):
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, rows[0].keys())
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+class TestInputCache:
+    def test_hits_until_the_file_changes(self, tmp_path, random_candidate_dict):
+        path = str(tmp_path / "candidates.csv")
+        rows = [random_candidate_dict() for _ in range(3)]
+        write_candidates(path, rows)
+        cache = InputCache()
+        first = cache.get(path, Candidate)
+        assert isinstance(first, tuple) and len(first) == 3
+        assert [c.uid for c in cache.get(path, Candidate)] == [c.uid for c in first]
+        write_candidates(path, rows[:2])
+        assert len(cache.get(path, Candidate)) == 2
+        assert cache.info() == CacheInfo(hits=1, misses=2, entries=2, max_entries=8)
+
+    def test_same_size_edits_are_noticed(self, tmp_path, random_candidate_dict):
+        path = tmp_path / "candidates.csv"
+        rows = [random_candidate_dict() for _ in range(2)]
+        write_candidates(path, rows)
+        cache = InputCache()
+        stat = os.stat(path)
+        before = cache.get(str(path), Candidate)
+        path.write_text(path.read_text().replace("C-", "X-"))
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        after = cache.get(str(path), Candidate)
+        assert [c.uid[0] for c in before] == ["C", "C"]
+        assert [c.uid[0] for c in after] == ["X", "X"]
+
+    def test_least_recently_used_is_evicted(self, tmp_path, random_candidate_dict):
+        paths = [str(tmp_path / f"{name}.csv") for name in "abc"]
+        for path in paths:
+            write_candidates(path, [random_candidate_dict()])
+        cache = InputCache(max_entries=2)
+        cache.get(paths[0], Candidate)
+        cache.get(paths[1], Candidate)
+        cache.get(paths[0], Candidate)
+        cache.get(paths[2], Candidate)
+        assert cache.info().entries == 2
+        cache.get(paths[0], Candidate)
+        assert cache.info().hits == 2
+        cache.get(paths[1], Candidate)
+        assert cache.info().misses == 4
+
+    def test_callers_share_read_only_objects(self, tmp_path, random_candidate_dict):
+        path = str(tmp_path / "candidates.csv")
+        write_candidates(path, [random_candidate_dict()])
+        cache = InputCache()
+        first = cache.get(path, Candidate)
+        assert cache.get(path, Candidate) is first
+        with pytest.raises(AttributeError):
+            first[0].paired = True
+        with pytest.raises(AttributeError):
+            first[0].prior_departments.add("Somewhere")
+
+    def test_unchanged_files_are_not_read_again(
+        self, monkeypatch, tmp_path, random_candidate_dict
+    ):
+        path = str(tmp_path / "candidates.csv")
+        write_candidates(path, [random_candidate_dict()])
+        cache = InputCache()
+        first = cache.get(path, Candidate)
+        monkeypatch.setattr(cache, "_read", None)
+        assert cache.get(path, Candidate) is first
+        assert cache.info().hits == 1
+
+    def test_tables_are_parsed_from_the_bytes_hashed(self, monkeypatch, csv_inputs):
+        _, roles, candidates = csv_inputs
+        cache = InputCache()
+        read = []
+        monkeypatch.setattr(Table, "read", None)
+        monkeypatch.setattr(
+            cache,
+            "_read",
+            lambda path: read.append(path) or InputCache._read(cache, path),
+        )
+        tables = cache.tables(candidates, roles)
+        assert read == [candidates, roles]
+        assert [len(table) for table in tables] == [30, 90]
+
+    def test_tables_share_read_only_columns(self, csv_inputs):
+        _, roles, candidates = csv_inputs
+        cache = InputCache()
+        first = cache.tables(candidates, roles)
+        second = cache.tables(candidates, roles)
+        assert cache.info() == CacheInfo(hits=1, misses=1, entries=1, max_entries=8)
+        assert second[0].columns["uid"] is first[0].columns["uid"]
+        with pytest.raises(ValueError):
+            first[1].columns["department"][0] = 0
+        first[0].registry["location"].intern("Somewhere new")
+        assert "Somewhere new" not in second[0].registry["location"]
+        assert second[0].registry is second[1].registry
+        with open(roles, "a") as file:
+            file.write(open(roles).read().splitlines()[1] + "\n")
+        assert len(cache.tables(candidates, roles)[1]) == len(first[1]) + 1
+
+    def test_read_candidates_uses_the_shared_cache(self, csv_inputs):
+        _, roles, candidates = csv_inputs
+        input_cache.clear()
+        read_candidates(candidates)
+        read_candidates(candidates)
+        read_rows(candidates, roles)
+        read_rows(candidates, roles)
+        assert input_cache.info().hits == 2
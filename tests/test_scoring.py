@@ -0,0 +1,130 @@
+import random
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from munkres import DISALLOWED
+
+from fast_stream_22.matching.scoring import (
+    ColumnarScorer,
+    GeneralistColumnarScorer,
+    ScoreCache,
+    columnar_scorer_for,
+    score_objects,
+)
+from fast_stream_22.specialism.SEFS import SefsPair
+from fast_stream_22.specialism.generalist import GeneralistPair
+from fast_stream_22.specialism.models import Candidate, Role
+from fast_stream_22.specialism.pair import Pair, reweighted
+
+
+@pytest.fixture
+def varied_candidates(varied_candidate_dicts):
+    return [Candidate(**data) for data in varied_candidate_dicts]
+
+
+@pytest.fixture
+def varied_roles(varied_role_dicts):
+    return [Role(**data) for data in varied_role_dicts]
+
+
+def score_or_disqualify(pair):
+    pair.score_pair()
+    return DISALLOWED if pair.disqualified else pair.score
+
+
+def object_grid(candidates, roles, pair_type):
+    return [[score_or_disqualify(pair_type(c, r)) for r in roles] for c in candidates]
+
+
+def columnar_grid(candidates, roles, scorer):
+    scores, disqualified = scorer(candidates, roles).score()
+    return [
+        [DISALLOWED if dq else score for score, dq in zip(*row)]
+        for row in zip(scores.tolist(), disqualified.tolist())
+    ]
+
+
+class TestColumnarScorer:
+    def test_grid_matches_pair_objects(self, varied_candidates, varied_roles):
+        expected = object_grid(varied_candidates, varied_roles, Pair)
+        assert (
+            columnar_grid(varied_candidates, varied_roles, ColumnarScorer) == expected
+        )
+
+    def test_data_exercises_checks_and_scores(self, varied_candidates, varied_roles):
+        grid = object_grid(varied_candidates, varied_roles, Pair)
+        cells = [cell for row in grid for cell in row]
+        assert DISALLOWED in cells
+        assert any(cell is not DISALLOWED for cell in cells)
+
+    @pytest.mark.parametrize(
+        "method_name", sorted(Pair.scoring_method_names) + ["_check_score"]
+    )
+    def test_each_method_is_mirrored(self, method_name):
+        assert callable(getattr(ColumnarScorer, method_name))
+
+    def test_empty_grid(self):
+        scores, disqualified = ColumnarScorer([], []).score()
+        assert scores.shape == disqualified.shape == (0, 0)
+
+
+class TestColumnarScorerFor:
+    @pytest.mark.parametrize(
+        ["pair_type", "expected"],
+        [
+            (Pair, ColumnarScorer),
+            (GeneralistPair, GeneralistColumnarScorer),
+            (SefsPair, None),
+        ],
+    )
+    def test_exact_pair_types_only(self, pair_type, expected):
+        assert columnar_scorer_for(pair_type) is expected
+
+    def test_reweighted_pair_types_share_a_scorer(self):
+        pair_type = reweighted(Pair, {"skill": 30})
+        scorer = columnar_scorer_for(pair_type)
+        assert issubclass(scorer, ColumnarScorer) and scorer.pair_type is pair_type
+        assert columnar_scorer_for(pair_type) is scorer
+
+
+class TestScoreCache:
+    def test_grid_slices_by_uid(self, varied_candidates, varied_roles):
+        cache = ScoreCache(varied_candidates, varied_roles, Pair)
+        candidates = random.sample(varied_candidates, 20)
+        roles = random.sample(varied_roles, 30)
+        scores, allowed = cache.grid(candidates, roles).to_dense()
+        assert [
+            [score if ok else DISALLOWED for score, ok in zip(*row)]
+            for row in zip(scores.tolist(), allowed.tolist())
+        ] == columnar_grid(candidates, roles, ColumnarScorer)
+
+    def test_score(self, varied_candidates, varied_roles):
+        cache = ScoreCache(varied_candidates, varied_roles, Pair)
+        row, col = np.argwhere(cache.edges.to_dense()[1])[0]
+        candidate, role = varied_candidates[row], varied_roles[col]
+        assert (
+            cache.score(candidate.uid, role.uid) == Pair(candidate, role).score_pair()
+        )
+
+    def test_object_scores_agree_on_allowed_cells(
+        self, varied_candidates, varied_roles
+    ):
+        expected, disqualified = ColumnarScorer(varied_candidates, varied_roles).score()
+        scores, object_disqualified = score_objects(
+            varied_candidates, varied_roles, Pair
+        )
+        assert (object_disqualified == disqualified).all()
+        assert (scores[~disqualified] == expected[~disqualified]).all()
+
+    def test_chunks_are_stacked(self, varied_candidates, varied_roles):
+        whole = ScoreCache(varied_candidates, varied_roles, Pair)
+        with patch.object(ScoreCache, "chunk_size", 7):
+            chunked = ScoreCache(varied_candidates, varied_roles, Pair)
+        for a, b in zip(whole.edges.to_dense(), chunked.edges.to_dense()):
+            assert (a == b).all()
+
+    def test_object_scores_are_typed(self, varied_candidates, varied_roles):
+        scores, disqualified = score_objects(varied_candidates, varied_roles, Pair)
+        assert scores.dtype == np.int32
+        assert disqualified.dtype == bool
@@ -1,10 +1,20 @@
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
-from fast_stream_22.matching.match import conduct_matching
+import pytest
+
+from fast_stream_22.matching.match import (
+    BestOutcomes,
+    SearchBudget,
+    conduct_matching,
+    iteration_seed,
+    prepare_inputs,
+    search_matching,
+)
+from fast_stream_22.specialism.pair import Pair
 
 
 def test_conduct_matching():
-    with patch("fast_stream_22.specialism.pair.Pair._check_score"):
+    with patch.dict(Pair.min_score, clear=True):
         conduct_matching(
             "CML/2022-11-21 - CML - BIDS.csv",
             "CML/2022-11-21 - CML - roles.csv",
@@ -14,3 +24,77 @@ def test_conduct_matching():
             iterations=1,
         )
         assert True
+
+
+def summarise(outcomes):
+    return {
+        i: (outcome.total_score, dict(outcome.outcomes))
+        for i, outcome in outcomes.items()
+    }
+
+
+def test_conduct_matching_is_reproducible_with_workers(csv_inputs):
+    serial = conduct_matching(*csv_inputs, True, None, 4, "jv", workers=1, seed=7)
+    parallel = conduct_matching(*csv_inputs, True, None, 4, "jv", workers=2, seed=7)
+    assert serial
+    assert summarise(serial) == summarise(parallel)
+
+
+def test_replaying_an_iteration_reproduces_it(csv_inputs):
+    search = conduct_matching(*csv_inputs, True, None, 3, "jv", seed=7)
+    replay = conduct_matching(
+        *csv_inputs, True, None, 1, "jv", seed=7, replay_iteration=2
+    )
+    assert list(replay) == [2]
+    assert summarise(replay) == {2: summarise(search)[2]}
+    assert replay[2].seed == search[2].seed == iteration_seed(7, 2)
+
+
+def test_replaying_needs_a_seed(csv_inputs):
+    with pytest.raises(ValueError):
+        conduct_matching(*csv_inputs, True, None, 1, replay_iteration=2)
+
+
+def test_incremental_matching(csv_inputs):
+    outcomes = conduct_matching(
+        *csv_inputs, True, None, 3, "jv", seed=7, incremental=True
+    )
+    assert outcomes
+    for outcome in outcomes.values():
+        assert all(bid.count <= bid.number for bid in outcome.bids)
+
+
+def test_best_outcomes_keeps_the_best_by_each_measure():
+    best = BestOutcomes(keep=2)
+    for iteration, (score, success) in enumerate([(5, 3), (9, 0), (7, 1), (9, 2)]):
+        best.add(
+            MagicMock(iteration=iteration, total_score=score, success_count=success)
+        )
+    assert list(best.outcomes()) == [0, 1, 3]
+
+
+def test_search_keeps_the_best_of_every_iteration(csv_inputs):
+    everything = conduct_matching(*csv_inputs, True, None, 6, "jv", seed=7)
+    inputs = prepare_inputs(*csv_inputs, True, None, "jv")
+    result = search_matching(inputs, range(6), 7, SearchBudget(keep=1))
+    assert result.iterations_run == 6
+    top_score = max(everything.values(), key=lambda o: (o.total_score, -o.iteration))
+    assert top_score.iteration in result.outcomes
+    assert len(result.outcomes) <= 2
+    for i, outcome in result.outcomes.items():
+        assert outcome.total_score == everything[i].total_score
+
+
+@pytest.mark.parametrize(
+    "budget, stopped",
+    [
+        (SearchBudget(patience=1), "no better score"),
+        (SearchBudget(target_success=0), "reached"),
+        (SearchBudget(seconds=0), "ran out of time"),
+    ],
+)
+def test_search_stops_early(csv_inputs, budget, stopped):
+    inputs = prepare_inputs(*csv_inputs, True, None, "jv")
+    result = search_matching(inputs, range(50), 7, budget, workers=2)
+    assert result.iterations_run < 50
+    assert result.stopped_because.startswith(stopped)
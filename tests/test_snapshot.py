@@ -0,0 +1,86 @@
+import json
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from fast_stream_22.matching import snapshot
+from fast_stream_22.matching.match import conduct_matching
+from fast_stream_22.matching.read_in import read_tables
+from fast_stream_22.matching.snapshot import compile_snapshot, load_snapshot
+from fast_stream_22.scripts.process_pairs import process_matches
+
+
+@pytest.fixture
+def compiled(tmp_path, csv_inputs):
+    _, roles, candidates = csv_inputs
+    directory = str(tmp_path / "snapshot")
+    compile_snapshot(candidates, roles, None, directory)
+    return directory, candidates, roles
+
+
+def test_snapshot_matches_csv(compiled):
+    directory, candidates, roles = compiled
+    loaded = load_snapshot(directory, candidates, roles, None)
+    parsed = read_tables(candidates, roles)
+    for from_snapshot, from_csv in zip(loaded, parsed):
+        assert from_snapshot.columns.keys() == from_csv.columns.keys()
+        for name, column in from_snapshot.columns.items():
+            assert isinstance(column, np.memmap)
+            assert np.array_equal(column, from_csv.columns[name])
+        for row, expected in zip(from_snapshot.rows(), from_csv.rows()):
+            assert row.uid == expected.uid
+            assert row.clearance == expected.clearance
+
+
+def test_stale_snapshot_is_ignored(compiled):
+    directory, candidates, roles = compiled
+    with open(roles, "a") as file:
+        file.write("\n")
+    assert load_snapshot(directory, candidates, roles, None) is None
+
+
+def test_other_versions_are_ignored(compiled, monkeypatch):
+    directory, candidates, roles = compiled
+    monkeypatch.setattr(snapshot, "SNAPSHOT_VERSION", snapshot.SNAPSHOT_VERSION + 1)
+    assert load_snapshot(directory, candidates, roles, None) is None
+
+
+def test_other_specialisms_are_ignored(compiled):
+    directory, candidates, roles = compiled
+    assert load_snapshot(directory, candidates, roles, "generalist") is None
+    assert load_snapshot(directory, candidates, roles, "SEFS") is None
+
+
+def test_missing_snapshot(tmp_path, csv_inputs):
+    _, roles, candidates = csv_inputs
+    assert load_snapshot(str(tmp_path / "nowhere"), candidates, roles, None) is None
+
+
+def test_sefs_cannot_be_compiled(tmp_path, csv_inputs):
+    _, roles, candidates = csv_inputs
+    with pytest.raises(ValueError):
+        compile_snapshot(candidates, roles, "SEFS", str(tmp_path))
+
+
+def test_matching_from_snapshot(compiled, csv_inputs):
+    directory = compiled[0]
+    from_csv = conduct_matching(*csv_inputs, True, None, 2, "jv", seed=3)
+    from_snapshot = conduct_matching(
+        *csv_inputs, True, None, 2, "jv", seed=3, snapshot=directory
+    )
+    assert {i: o.total_score for i, o in from_csv.items()} == {
+        i: o.total_score for i, o in from_snapshot.items()
+    }
+
+
+def test_compile_command(tmp_path, csv_inputs):
+    _, roles, candidates = csv_inputs
+    output = tmp_path / "compiled"
+    result = CliRunner().invoke(
+        process_matches,
+        ["compile", "--candidates", candidates, "--roles", roles, "--output", output],
+    )
+    assert result.exit_code == 0, result.output
+    with open(output / "manifest.json") as file:
+        assert json.load(file)["version"] == snapshot.SNAPSHOT_VERSION
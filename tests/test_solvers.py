@@ -0,0 +1,114 @@
+import itertools
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from munkres import UnsolvableMatrix
+
+from fast_stream_22.matching.solvers import (
+    SOLVERS,
+    get_solver,
+    JonkerVolgenantSolver,
+    SparseSolver,
+)
+
+
+def random_grid(rows, cols, disallowed_rate=0.5, seed=0):
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(15, 100, size=(rows, cols))
+    allowed = rng.random((rows, cols)) > disallowed_rate
+    for i in range(min(rows, cols)):
+        allowed[i, i] = True
+    return scores, allowed
+
+
+def total(scores, allowed, pairs):
+    assert all(allowed[row, col] for row, col in pairs)
+    assert (
+        len({row for row, _ in pairs}) == len({col for _, col in pairs}) == len(pairs)
+    )
+    return sum(scores[row, col] for row, col in pairs)
+
+
+def brute_force(scores, allowed):
+    rows, cols = scores.shape
+    if rows > cols:
+        return brute_force(scores.T, allowed.T)
+    return max(
+        sum(scores[row, col] for row, col in enumerate(perm))
+        for perm in itertools.permutations(range(cols), rows)
+        if all(allowed[row, col] for row, col in enumerate(perm))
+    )
+
+
+@pytest.mark.parametrize("name", sorted(SOLVERS))
+class TestSolvers:
+    @pytest.mark.parametrize("shape", [(4, 4), (3, 6), (6, 3)])
+    @pytest.mark.parametrize("seed", range(5))
+    def test_optimal_on_small_grids(self, name, shape, seed):
+        scores, allowed = random_grid(*shape, seed=seed)
+        pairs = get_solver(name).solve(scores, allowed)
+        assert len(pairs) == min(shape)
+        assert total(scores, allowed, pairs) == brute_force(scores, allowed)
+
+    @pytest.mark.parametrize("shape", [(30, 30), (25, 40), (40, 25)])
+    def test_solvers_agree(self, name, shape):
+        scores, allowed = random_grid(*shape, disallowed_rate=0.7, seed=1)
+        expected = total(
+            scores, allowed, JonkerVolgenantSolver().solve(scores, allowed)
+        )
+        assert total(scores, allowed, get_solver(name).solve(scores, allowed)) == (
+            expected
+        )
+
+    def test_unsolvable(self, name):
+        scores = np.array([[20, 20], [20, 20]])
+        allowed = np.array([[True, False], [True, False]])
+        with pytest.raises(UnsolvableMatrix):
+            get_solver(name).solve(scores, allowed)
+
+    def test_empty(self, name):
+        assert get_solver(name).solve(np.zeros((0, 3)), np.zeros((0, 3), bool)) == []
+
+
+def test_sparse_solver_assigns_edges():
+    starts = np.array([0, 2, 3])
+    cols = np.array([0, 1, 0])
+    costs = np.array([0.0, 1.0, 0.0])
+    assert SparseSolver.assign_edges((2, 2), starts, cols, costs).tolist() == [1, 0]
+
+
+def test_unknown_solver():
+    with pytest.raises(ValueError):
+        get_solver("simplex")
+
+
+class TestWarmStart:
+    def test_warm_start_is_optimal(self):
+        solver = JonkerVolgenantSolver()
+        scores, allowed = random_grid(20, 40, disallowed_rate=0.6, seed=2)
+        pairs, duals = solver.solve_from(scores, allowed, None)
+        kept = [col for col in range(40) if col not in {c for r, c in pairs if r < 8}]
+        scores, allowed = scores[8:][:, kept], allowed[8:][:, kept]
+        warm, _ = solver.solve_from(scores, allowed, duals[kept])
+        cold = solver.solve(scores, allowed)
+        assert total(scores, allowed, warm) == total(scores, allowed, cold)
+
+    def test_falls_back_to_cold_start(self):
+        scores, allowed = np.array([[10, 20]]), np.ones((1, 2), dtype=bool)
+        with patch.object(
+            JonkerVolgenantSolver,
+            "_augment",
+            side_effect=JonkerVolgenantSolver._augment,
+        ) as augment:
+            pairs, _ = JonkerVolgenantSolver().solve_from(
+                scores, allowed, np.array([0.0, -20.0])
+            )
+        assert augment.call_count == 2
+        assert pairs == [(0, 1)]
+
+    def test_other_solvers_ignore_duals(self):
+        scores, allowed = random_grid(4, 4, seed=0)
+        pairs, duals = SparseSolver().solve_from(scores, allowed, np.ones(4))
+        assert duals is None
+        assert total(scores, allowed, pairs) == brute_force(scores, allowed)
@@ -0,0 +1,196 @@
+import io
+import json
+import os
+import shutil
+import time
+
+import pytest
+
+from fast_stream_22.matching.match import conduct_matching
+from fast_stream_22.web_app import app as app_module
+from fast_stream_22.web_app.app import create_app
+from fast_stream_22.web_app.service import JobParameters, MatchingService
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = MatchingService(workers=1, root=str(tmp_path / "uploads"))
+    yield service
+    service.shutdown()
+
+
+@pytest.fixture
+def client(service):
+    return create_app(service).test_client()
+
+
+@pytest.fixture
+def dataset(client, csv_inputs):
+    bids, roles, candidates = csv_inputs
+    files = {"bids": bids, "roles": roles, "candidates": candidates}
+    response = client.post(
+        "/datasets",
+        data={
+            name: (io.BytesIO(open(path, "rb").read()), f"{name}.csv")
+            for name, path in files.items()
+        },
+    )
+    assert response.status_code == 201, response.json
+    return response.json
+
+
+def wait_for(client, url):
+    for _ in range(200):
+        status = client.get(url).json
+        if status["status"] in ("done", "cancelled", "failed"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError("The job didn't finish")
+
+
+def test_upload_needs_every_file(client):
+    response = client.post("/datasets", data={})
+    assert response.status_code == 400
+    assert "Missing files" in response.json["error"]
+
+
+def test_match_a_dataset(client, dataset, csv_inputs):
+    assert dataset["candidates"] == 30 and dataset["roles"] == 90
+    response = client.post(
+        f"/datasets/{dataset['id']}/matches",
+        json={"iterations": 3, "seed": 7, "solver": "jv"},
+    )
+    assert response.status_code == 202
+    status = wait_for(client, response.headers["Location"])
+    assert status["status"] == "done"
+    assert status["iterations_done"] == 3
+    expected = conduct_matching(*csv_inputs, True, None, 3, "jv", seed=7)
+    assert status["best_total_score"] == max(o.total_score for o in expected.values())
+    results = client.get(f"/matches/{status['id']}/results?iteration=1").json
+    assert results["total_score"] == expected[1].total_score
+    assert len(results["pairs"]) == sum(len(p) for p in expected[1].outcomes.values())
+
+
+def test_repeat_runs_reuse_the_scores(service, client, dataset):
+    held = service.datasets[dataset["id"]]
+    url = f"/datasets/{dataset['id']}/matches"
+    first = client.post(url, json={"iterations": 1, "solver": "jv"}).json
+    second = client.post(
+        url, json={"iterations": 1, "solver": "jv", "weights": {"skill": 1}}
+    ).json
+    for job in (first, second):
+        assert wait_for(client, f"/matches/{job['id']}")["status"] == "done"
+    assert held.scores({}) is held.scores({})
+    assert held.scores({})[1] is not held.scores({"skill": 1})[1]
+    assert held.scores({"skill": 1})[0].scoring_weights["skill"] == 1
+
+
+@pytest.mark.parametrize(
+    "parameters",
+    [{"iterations": 0}, {"solver": "nope"}, {"colour": "red"}, {"weights": {"x": 1}}],
+)
+def test_bad_parameters(client, dataset, parameters):
+    response = client.post(f"/datasets/{dataset['id']}/matches", json=parameters)
+    assert response.status_code == 400
+
+
+def test_unknown_ids(client):
+    assert client.get("/datasets/nothing").status_code == 404
+    assert client.get("/matches/nothing").status_code == 404
+    assert client.post("/datasets/nothing/matches", json={}).status_code == 404
+
+
+def test_parameters_from_json():
+    assert JobParameters.from_json({}) == JobParameters()
+    with pytest.raises(ValueError):
+        JobParameters.from_json({"senior_first": "yes"})
+
+
+def test_follow_a_match(client, dataset):
+    job = client.post(
+        f"/datasets/{dataset['id']}/matches",
+        json={"iterations": 2, "seed": 7, "solver": "jv"},
+    ).json
+    response = client.get(f"/matches/{job['id']}/events")
+    assert response.mimetype == "text/event-stream"
+    events = [
+        (block.split("\n")[0], json.loads(block.split("\n")[1][len("data: ") :]))
+        for block in response.get_data(as_text=True).strip().split("\n\n")
+    ]
+    names = [name[len("event: ") :] for name, _ in events]
+    assert names[-3:] == ["iteration", "iteration", "done"]
+    assert [data["iteration"]["index"] for _, data in events[-3:-1]] == [0, 1]
+    assert events[-1][1]["iterations_done"] == 2
+    assert client.post(f"/matches/{job['id']}/cancel").status_code == 409
+
+
+def test_cancel_a_match(client, dataset):
+    job = client.post(
+        f"/datasets/{dataset['id']}/matches",
+        json={"iterations": 200, "seed": 7, "solver": "jv"},
+    ).json
+    assert client.post(f"/matches/{job['id']}/cancel").status_code == 202
+    status = wait_for(client, f"/matches/{job['id']}")
+    assert status["status"] == "cancelled"
+    assert status["iterations_done"] < 200
+    results = client.get(f"/matches/{job['id']}/results")
+    assert results.status_code == (200 if status["iterations_solved"] else 404)
+
+
+def test_delete_a_dataset_and_a_match(service, client, dataset):
+    job = client.post(
+        f"/datasets/{dataset['id']}/matches", json={"iterations": 1, "solver": "jv"}
+    ).json
+    wait_for(client, f"/matches/{job['id']}")
+    directory = service.datasets[dataset["id"]].directory
+    assert client.delete(f"/datasets/{dataset['id']}").status_code == 204
+    assert not os.path.exists(directory)
+    assert client.get(f"/datasets/{dataset['id']}").status_code == 404
+    assert client.delete(f"/matches/{job['id']}").status_code == 204
+    assert client.get(f"/matches/{job['id']}").status_code == 404
+    assert client.delete(f"/matches/{job['id']}").status_code == 404
+
+
+def test_least_recently_used_dataset_is_dropped(tmp_path, csv_inputs):
+    service = MatchingService(workers=1, root=str(tmp_path), max_datasets=2)
+    files = dict(zip(("bids", "roles", "candidates"), csv_inputs))
+
+    def upload():
+        return service.add_dataset(
+            {name: Saved(path) for name, path in files.items()}
+        ).uid
+
+    first, second = upload(), upload()
+    service.dataset(first)
+    third = upload()
+    assert list(service.datasets) == [first, third]
+    assert not os.path.exists(tmp_path / second)
+    service.shutdown()
+
+
+def test_finished_jobs_are_forgotten(tmp_path, csv_inputs):
+    service = MatchingService(workers=1, root=str(tmp_path), max_finished_jobs=1)
+    files = dict(zip(("bids", "roles", "candidates"), csv_inputs))
+    dataset = service.add_dataset({name: Saved(path) for name, path in files.items()})
+    parameters = JobParameters(iterations=1, solver="jv")
+    jobs = [service.start(dataset.uid, parameters) for _ in range(3)]
+    for job in jobs:
+        job.wait()
+    assert service.job(jobs[2].uid) is jobs[2]
+    assert list(service.jobs) == [jobs[2].uid]
+    service.job_ttl = 0
+    with pytest.raises(KeyError):
+        service.job(jobs[2].uid)
+    service.shutdown()
+
+
+def test_importing_the_app_starts_nothing():
+    assert not hasattr(app_module, "app")
+
+
+class Saved:
+    def __init__(self, path: str):
+        self.path = path
+
+    def save(self, dst: str) -> None:
+        shutil.copy(self.path, dst)